@@ -1,10 +1,13 @@
 # -*- mode: python ; coding: utf-8 -*-
 
+import sys
 from pathlib import Path
-from PyInstaller.utils.hooks import collect_all
+from PyInstaller.utils.hooks import collect_all, collect_submodules
 
 # SPECPATH = directory containing this spec file (build/windows)
 ROOT = Path(SPECPATH).resolve().parents[1]
+# collect_submodules() imports the package, which may not be installed
+sys.path.insert(0, str(ROOT / "src"))
 
 # Collect EVERYTHING needed for PySide6 (Qt, plugins, DLLs, etc.)
 pyside6_datas, pyside6_binaries, pyside6_hiddenimports = collect_all("PySide6")
@@ -14,7 +17,9 @@ datas = [
 ] + pyside6_datas
 
 binaries = pyside6_binaries
-hiddenimports = pyside6_hiddenimports
+# Command implementations are imported by name on first use (see
+# core/commands.py), so the analysis never sees them
+hiddenimports = pyside6_hiddenimports + collect_submodules("smarttext.bridge.commands")
 
 a = Analysis(
     [str(ROOT / "src" / "smarttext" / "main.py")],
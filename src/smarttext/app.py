@@ -20,12 +20,13 @@ def _resource_path(rel: str) -> Path:
 
 def bootstrap(engine: QQmlApplicationEngine) -> None:
     # Controllers
-    engine._app_controller = AppController()
     engine._settings_store = SettingsStore()
+    engine._app_controller = AppController(engine._settings_store)
 
     # Expose to QML
     engine.rootContext().setContextProperty("app", engine._app_controller)
     engine.rootContext().setContextProperty("settingsStore", engine._settings_store)
+    engine.addImageProvider("minimap", engine._app_controller.minimap_image_provider())
 
     # Save session on exit
     QCoreApplication.instance().aboutToQuit.connect(engine._app_controller.save_session)
@@ -33,3 +34,8 @@ def bootstrap(engine: QQmlApplicationEngine) -> None:
     # Load QML (frozen-safe)
     qml_path = _resource_path("qml/Main.qml")
     engine.load(QUrl.fromLocalFile(str(qml_path)))
+
+    # command shortcuts are dispatched from the main window's key presses
+    roots = engine.rootObjects()
+    if roots:
+        roots[0].installEventFilter(engine._app_controller.commands)
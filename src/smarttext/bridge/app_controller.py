@@ -1,12 +1,58 @@
 from __future__ import annotations
 
+from functools import partial
 from pathlib import Path
-from PySide6.QtCore import QObject, Signal, Slot, Property, QCoreApplication, QUrl
+from typing import TYPE_CHECKING, Callable
+from PySide6.QtCore import QObject, Signal, Slot, Property, QCoreApplication, QThreadPool, QTimer, QUrl
+from PySide6.QtGui import QTextCursor
+from PySide6.QtQuick import QQuickTextDocument
 import mimetypes
 
-from ..core.document import Document
+from ..core.document import Document, TextEdit
+from ..core.hex_dump import SNIFF_BYTES, HexFile, looks_binary
+from ..core.settings_store import SettingsStore
+from ..core.structure import language_for
+from ..core.text_stats import (
+    StatsTracker,
+    TextStats,
+    concat,
+    count_range,
+    count_text,
+    detach,
+    edit_delta,
+)
 from .tabs_model import TabsModel
 from .session_store import SessionStore
+from .quick_open import QuickOpen
+from .minimap import MinimapController, MinimapImageProvider
+from .diff import DiffController
+from .command_palette import CommandController
+from .completion import CompletionController
+from .hex_view import HexViewController
+from .multi_caret import MultiCaretController
+from .structure import StructureController
+from .virtual_editor import VirtualEditor
+from .workers import JobController, run_in_background
+
+if TYPE_CHECKING:
+    from .formatting import FormatController
+    from .line_ops import LineOpsController
+
+# how often the current document's incremental counts are re-checked by a full count
+STATS_RECONCILE_MS = 30_000
+# edits bigger than this are recounted on the thread pool rather than diffed
+STATS_RECOUNT_EDIT_CHARS = 1 << 20
+# concurrent writes for Save All; they mostly wait on the disk, not the GIL
+SAVE_ALL_THREADS = 32
+
+
+def _write_file(path: Path, text: str) -> None:
+    path.parent.mkdir(parents=True, exist_ok=True)
+    path.write_text(text, encoding="utf-8")
+
+
+def _plural(n: int, word: str) -> str:
+    return f"{n} {word}{'' if n == 1 else 's'}"
 
 
 class AppController(QObject):
@@ -18,18 +64,73 @@ class AppController(QObject):
     cursorPositionChanged = Signal()
     scrollYChanged = Signal()
     fileInfoChanged = Signal() 
+    statsChanged = Signal()
+    selectionStatsChanged = Signal()
+    virtualModeChanged = Signal()
+    hexModeChanged = Signal()
+    jobsBusyChanged = Signal()
 
     # requests to QML
     requestSaveAs = Signal()
-    def __init__(self) -> None:
+    # a formatter / line operation result is waiting in apply_pending_text()
+    replaceEditorText = Signal()
+    def __init__(self, settings: SettingsStore | None = None) -> None:
         super().__init__()
 
         self._tabs = TabsModel()
         self._session = SessionStore()
+        self._quick_open = QuickOpen(self)
+        self._quick_open.openRequested.connect(self.open_file)
+        self._minimap = MinimapController(self)
+        self._diff = DiffController(self._tabs, self)
+        self._diff.statusMessage.connect(self._set_status)
+        self._virtual = VirtualEditor(self)
+        self._virtual.edited.connect(self._on_python_edit)
+        self._diff.changesUpdated.connect(self._virtual.refresh_changes)
+        self._virtual_mode = False
+        self._hex = HexViewController(self)
+        self._hex.statusMessage.connect(self._set_status)
+        self._hex.busyChanged.connect(self.jobsBusyChanged)
+        self._hex_mode = False
+        self._carets = MultiCaretController(self._primary_selection, self)
+        self._carets.edited.connect(self._on_python_edit)
+        self._carets.statusMessage.connect(self._set_status)
+        self._structure = StructureController(self)
+        self._structure.statusMessage.connect(self._set_status)
+        self._structure.structureUpdated.connect(self._virtual.refresh_structure)
+        self._structure.foldsAboutToChange.connect(
+            lambda row, removed, added: self._virtual.folds_about_to_change(
+                self._structure.document(), row, removed, added
+            )
+        )
+        self._structure.foldsChanged.connect(self._virtual.folds_changed)
+        self._virtual.caretChanged.connect(lambda: self._structure.set_caret(self._virtual.selection()[1]))
+        self._completion = CompletionController(self._tabs, self)
+        # only their commands use these, so they are built (and their modules
+        # imported) on first use; see _get_formatter / _get_line_ops
+        self._formatter: FormatController | None = None
+        self._line_ops: LineOpsController | None = None
+        # job output for the TextArea, applied from QML
+        self._pending_text: str | None = None
+        self._pending_message = ""
+        self._settings = settings
+        self._commands = CommandController(self, settings, self)
+        self._commands.statusMessage.connect(self._set_status)
+        self._io_pool = QThreadPool(self)
+        self._io_pool.setMaxThreadCount(SAVE_ALL_THREADS)
+        # ids of documents with a Save All write in flight
+        self._saving: set[int] = set()
+        if settings is not None:
+            settings.largeFileLinesChanged.connect(self._update_virtual_mode)
         self._current_index = 0
         self._status_message = "Ready"
         self._reset_session_on_exit = False
 
+        # selection counts; kept incrementally while a selection is dragged
+        self._selection: tuple[int, int] = (0, 0)
+        self._selection_stats: TextStats | None = None
+        self._selection_revision = -1
+
         restored = self._session.load()
         self._restored_session = bool(restored)  # <--- add this
 
@@ -41,6 +142,19 @@ class AppController(QObject):
             self._tabs.add_doc(Document())
             self._current_index = 0
 
+        self._reconcile_timer = QTimer(self)
+        self._reconcile_timer.setInterval(STATS_RECONCILE_MS)
+        self._reconcile_timer.timeout.connect(self._reconcile_stats)
+        self._reconcile_timer.start()
+        self._ensure_stats(self._current_doc())
+        self._minimap.set_document(self._current_doc())
+        self._diff.set_document(self._current_doc())
+        self._set_text_jobs_document(self._current_doc())
+        self._apply_virtual_mode(self._current_doc())
+        self._apply_hex_mode(self._current_doc())
+        self._carets.set_document(self._text_doc(self._current_doc()), self._virtual_mode)
+        self._sync_structure()
+
     def _is_pristine_placeholder(self) -> bool:
         if self._restored_session:
             return False
@@ -81,6 +195,15 @@ class AppController(QObject):
         return self._tabs.doc_at(self._current_index)
 
     def _sync_current_to_qml(self) -> None:
+        self._ensure_stats(self._current_doc())
+        self._minimap.set_document(self._current_doc())
+        self._diff.set_document(self._current_doc())
+        self._set_text_jobs_document(self._current_doc())
+        self._apply_virtual_mode(self._current_doc())
+        self._apply_hex_mode(self._current_doc())
+        self._carets.set_document(self._text_doc(self._current_doc()), self._virtual_mode)
+        self._sync_structure()
+        self._reset_selection()
         self.currentIndexChanged.emit()
         self.textChanged.emit()
         self.modifiedChanged.emit()
@@ -88,11 +211,267 @@ class AppController(QObject):
         self.cursorPositionChanged.emit()
         self.scrollYChanged.emit()
         self.fileInfoChanged.emit()
+        self.statsChanged.emit()
+        self.selectionStatsChanged.emit()
+
+    @staticmethod
+    def _text_doc(doc: Document) -> Document | None:
+        # formatting, line operations and carets have no text to work on in a binary tab
+        return doc if doc.binary is None else None
+
+    def _set_text_jobs_document(self, doc: Document) -> None:
+        for job in (self._formatter, self._line_ops):
+            if job is not None:
+                job.set_document(self._text_doc(doc))
+
+    def _adopt_job(self, job: JobController, on_finished: Callable[..., None]) -> None:
+        job.statusMessage.connect(self._set_status)
+        job.busyChanged.connect(self.jobsBusyChanged)
+        job.finished.connect(on_finished)
+        job.set_document(self._text_doc(self._current_doc()))
+
+    def _get_formatter(self) -> FormatController:
+        if self._formatter is None:
+            from .formatting import FormatController
+
+            self._formatter = FormatController(self)
+            self._adopt_job(self._formatter, self._on_formatted)
+        return self._formatter
+
+    def _get_line_ops(self) -> LineOpsController:
+        if self._line_ops is None:
+            from .line_ops import LineOpsController
+
+            self._line_ops = LineOpsController(self)
+            self._adopt_job(self._line_ops, self._on_line_op)
+        return self._line_ops
+
+    def _jobs(self) -> list[JobController]:
+        return [job for job in (self._formatter, self._line_ops, self._hex) if job is not None]
+
+    def get_jobs_busy(self) -> bool:
+        return any(job.get_busy() for job in self._jobs())
+
+    # a formatter, line operation or hex search is running (Esc cancels it)
+    jobsBusy = Property(bool, get_jobs_busy, notify=jobsBusyChanged)
+
+    @Slot()
+    def cancel_jobs(self) -> None:
+        for job in self._jobs():
+            job.cancel()
 
     def _open_new_tab(self, doc: Document) -> None:
         new_row = self._tabs.add_doc(doc)
         self.set_current_index(new_row)
 
+    # -------------------------
+    # Large-file view
+    # -------------------------
+    def _large_file_lines(self) -> int:
+        return self._settings.getLargeFileLines() if self._settings is not None else 200_000
+
+    def _wants_virtual(self, doc: Document) -> bool:
+        lines = len(doc.line_index()) if doc.has_line_index() else doc.text.count("\n") + 1
+        return lines > self._large_file_lines()
+
+    def _apply_virtual_mode(self, doc: Document, virtual: bool | None = None) -> None:
+        if virtual is None:
+            virtual = self._wants_virtual(doc)
+        self._virtual.set_document(doc if virtual else None)
+        if virtual != self._virtual_mode:
+            self._virtual_mode = virtual
+            self.virtualModeChanged.emit()
+
+    def _update_virtual_mode(self) -> None:
+        if self._wants_virtual(self._current_doc()) != self._virtual_mode:
+            self._sync_current_to_qml()
+
+    def _on_python_edit(self) -> None:
+        # the document was edited from Python (large-file view, multi-caret
+        # batches) rather than through the TextArea
+        self.modifiedChanged.emit()
+        self.documentTitleChanged.emit()
+        self.statsChanged.emit()
+        self._tabs.update_row(self._current_index)
+
+    def get_virtual_mode(self) -> bool:
+        return self._virtual_mode
+
+    # the current document is shown by the virtualized line view instead of the TextArea
+    virtualMode = Property(bool, get_virtual_mode, notify=virtualModeChanged)
+
+    def get_virtual_editor(self) -> QObject:
+        return self._virtual
+
+    virtualEditor = Property(QObject, get_virtual_editor, constant=True)
+
+    # -------------------------
+    # Multiple carets
+    # -------------------------
+    def _primary_selection(self) -> tuple[int, int]:
+        if self._virtual_mode:
+            return self._virtual.selection()
+        start, end = self._selection
+        if end > start:
+            return start, end
+        pos = self._current_doc().cursor_pos
+        return pos, pos
+
+    def get_carets(self) -> QObject:
+        return self._carets
+
+    carets = Property(QObject, get_carets, constant=True)
+
+    # -------------------------
+    # Folding and bracket matching
+    # -------------------------
+    def _sync_structure(self) -> None:
+        doc = self._text_doc(self._current_doc())
+        language = language_for(self.get_file_type_label()) if doc is not None else None
+        # the TextArea counts UTF-16 units; the large-file view, code points
+        self._structure.set_document(doc, language, not self._virtual_mode)
+        if doc is not None:
+            self._structure.set_caret(self._virtual.selection()[1] if self._virtual_mode else doc.cursor_pos)
+
+    def get_structure(self) -> QObject:
+        return self._structure
+
+    structure = Property(QObject, get_structure, constant=True)
+
+    # -------------------------
+    # Binary files
+    # -------------------------
+    def _apply_hex_mode(self, doc: Document) -> None:
+        self._hex.set_file(doc.binary)
+        if (doc.binary is not None) != self._hex_mode:
+            self._hex_mode = doc.binary is not None
+            self.hexModeChanged.emit()
+
+    def _release_documents(self, docs: list[Document]) -> None:
+        open_now = {id(d) for d in self._tabs.docs()}
+        for doc in docs:
+            if id(doc) in open_now:
+                continue
+            self._structure.forget_document(doc)
+            if doc.binary is not None:
+                doc.binary.close()
+
+    def get_hex_mode(self) -> bool:
+        return self._hex_mode
+
+    # the current document is a binary file, shown read-only by hexView
+    hexMode = Property(bool, get_hex_mode, notify=hexModeChanged)
+
+    def get_hex_view(self) -> QObject:
+        return self._hex
+
+    hexView = Property(QObject, get_hex_view, constant=True)
+
+    # -------------------------
+    # Whole-document rewrites (formatting, line operations)
+    # -------------------------
+    def _on_formatted(self, doc: Document, revision: int, text: str) -> None:
+        if text == doc.text and doc.revision == revision:
+            self._set_status("Already formatted")
+            return
+        self._replace_document_text(doc, revision, text, "Formatted")
+
+    def _on_line_op(self, doc: Document, revision: int, text: str, new_tab: bool, summary: str) -> None:
+        if new_tab:
+            self._open_new_tab(Document(text=text, modified=bool(text)))
+            self._set_status(summary)
+        else:
+            self._replace_document_text(doc, revision, text, summary)
+
+    def _replace_document_text(self, doc: Document, revision: int, text: str, done_msg: str) -> None:
+        """Put a background job's result in place of the current document's text as one undo step."""
+        if doc is not self._current_doc() or doc.revision != revision:
+            self._set_status("Result dropped: the document changed meanwhile")
+            return
+        self._pending_text = None
+        if text == doc.text:
+            self._set_status(done_msg)
+            return
+        if self._virtual_mode:
+            self._virtual.replace_document(text)
+        elif text.count("\n") + 1 > self._large_file_lines():
+            # the result belongs in the large-file view: switch first so the
+            # edit (and its undo entry) goes through it
+            doc.line_index()
+            self._apply_virtual_mode(doc, True)
+            self._virtual.replace_document(text)
+            self._sync_current_to_qml()
+        else:
+            # the TextArea owns undo here, so it has to make the edit itself
+            self._pending_text = text
+            self._pending_message = done_msg
+            self.replaceEditorText.emit()
+            return
+        self._set_status(done_msg)
+
+    @Slot(QQuickTextDocument)
+    def apply_pending_text(self, document: QQuickTextDocument) -> None:
+        """Replace the editor's contents with a pending job result as one undo step."""
+        text, self._pending_text = self._pending_text, None
+        if text is None:
+            return
+        # block visibility does not survive the rewrite
+        self._structure.unfold_all()
+        cursor = QTextCursor(document.textDocument())
+        cursor.beginEditBlock()
+        cursor.select(QTextCursor.Document)
+        cursor.insertText(text)
+        cursor.endEditBlock()
+        self.set_text(text)
+        self._set_status(self._pending_message)
+
+    # -------------------------
+    # Document statistics
+    # -------------------------
+    def _on_doc_edit(self, doc: Document, edit: TextEdit) -> None:
+        if doc.stats is None:
+            return
+        if len(edit.removed) + len(edit.inserted) > STATS_RECOUNT_EDIT_CHARS:
+            doc.stats.stats = None  # shows "counting…" until the recount lands
+            self._count_in_background(doc)
+        else:
+            doc.stats.on_edit(edit_delta(doc.text, edit))
+
+    def _ensure_stats(self, doc: Document) -> None:
+        if doc.stats is not None:
+            return
+        doc.stats = StatsTracker()
+        doc.add_listener(self._on_doc_edit)
+        self._count_in_background(doc)
+
+    def _count_in_background(self, doc: Document) -> None:
+        tracker = doc.stats
+        if tracker is None:
+            return
+        gen = tracker.begin_count(doc.revision)
+        snapshot = doc.text  # immutable; safe to hand to the worker
+
+        def done(counted: TextStats) -> None:
+            if tracker.finish_count(gen, counted) and doc is self._current_doc():
+                self.statsChanged.emit()
+
+        run_in_background(lambda: count_text(snapshot), done)
+
+    def _reconcile_stats(self) -> None:
+        doc = self._current_doc()
+        tracker = doc.stats
+        if tracker is None or tracker.counted_revision == doc.revision:
+            return
+        self._count_in_background(doc)
+
+    def _current_stats(self) -> TextStats | None:
+        tracker = self._current_doc().stats
+        return tracker.stats if tracker is not None else None
+
+    def _reset_selection(self) -> None:
+        self._selection = (0, 0)
+        self._selection_stats = None
+
     def _norm_path(self, p: Path) -> Path:
         """Normalize a path for comparisons (best-effort resolve)."""
         try:
@@ -192,9 +571,12 @@ class AppController(QObject):
     documentTitle = Property(str, get_document_title, notify=documentTitleChanged)
 
     def get_text(self) -> str:
-        return self._current_doc().text
+        # large documents never cross into QML as one string; see virtualEditor
+        return "" if self._virtual_mode else self._current_doc().text
 
     def set_text(self, value: str) -> None:
+        if self._virtual_mode or self._hex_mode:
+            return
         doc = self._current_doc()
         if value == doc.text:
             return
@@ -202,6 +584,7 @@ class AppController(QObject):
         self.textChanged.emit()
         self.modifiedChanged.emit()
         self.documentTitleChanged.emit()
+        self.statsChanged.emit()
         self._tabs.update_row(self._current_index)
 
     text = Property(str, get_text, set_text, notify=textChanged)
@@ -217,11 +600,91 @@ class AppController(QObject):
 
     tabsModel = Property(QObject, get_tabs_model, constant=True)
 
+    def get_quick_open(self) -> QObject:
+        return self._quick_open
+
+    quickOpen = Property(QObject, get_quick_open, constant=True)
+
+    def get_minimap(self) -> QObject:
+        return self._minimap
+
+    minimap = Property(QObject, get_minimap, constant=True)
+
+    def get_diff(self) -> QObject:
+        return self._diff
+
+    diff = Property(QObject, get_diff, constant=True)
+
+    def get_completion(self) -> QObject:
+        return self._completion
+
+    completion = Property(QObject, get_completion, constant=True)
+
+    def get_formatter(self) -> QObject:
+        return self._get_formatter()
+
+    formatter = Property(QObject, get_formatter, constant=True)
+
+    def get_commands(self) -> QObject:
+        return self._commands
+
+    commands = Property(QObject, get_commands, constant=True)
+
+    def get_line_ops(self) -> QObject:
+        return self._get_line_ops()
+
+    lineOps = Property(QObject, get_line_ops, constant=True)
+
+    def minimap_image_provider(self) -> MinimapImageProvider:
+        return self._minimap.image_provider()
+
     def get_cursor_position(self) -> int:
         return int(self._current_doc().cursor_pos)
 
     cursorPosition = Property(int, get_cursor_position, notify=cursorPositionChanged)
 
+    # counts are -1 while the first full count of a document is still running
+    def get_line_count(self) -> int:
+        st = self._current_stats()
+        return st.lines if st is not None else -1
+
+    lineCount = Property(int, get_line_count, notify=statsChanged)
+
+    def get_word_count(self) -> int:
+        st = self._current_stats()
+        return st.words if st is not None else -1
+
+    wordCount = Property(int, get_word_count, notify=statsChanged)
+
+    def get_char_count(self) -> int:
+        st = self._current_stats()
+        return st.chars if st is not None else -1
+
+    charCount = Property(int, get_char_count, notify=statsChanged)
+
+    def get_has_selection(self) -> bool:
+        return self._selection[1] > self._selection[0]
+
+    hasSelection = Property(bool, get_has_selection, notify=selectionStatsChanged)
+
+    def get_selection_line_count(self) -> int:
+        st = self._selection_stats
+        return st.lines if st is not None and self.get_has_selection() else 0
+
+    selectionLineCount = Property(int, get_selection_line_count, notify=selectionStatsChanged)
+
+    def get_selection_word_count(self) -> int:
+        st = self._selection_stats
+        return st.words if st is not None and self.get_has_selection() else 0
+
+    selectionWordCount = Property(int, get_selection_word_count, notify=selectionStatsChanged)
+
+    def get_selection_char_count(self) -> int:
+        st = self._selection_stats
+        return st.chars if st is not None and self.get_has_selection() else 0
+
+    selectionCharCount = Property(int, get_selection_char_count, notify=selectionStatsChanged)
+
     def get_scroll_y(self) -> float:
         return float(self._current_doc().scroll_y)
 
@@ -244,30 +707,49 @@ class AppController(QObject):
         existing_i = self._find_open_path_index(path)
         if existing_i is not None:
             self.set_current_index(existing_i)
+            self._quick_open.note_recent(self._norm_path(path))
             self._set_status(f"Already open: {path.name}")
             return
 
-        # Otherwise load from disk
+        # Otherwise load from disk; files that are not UTF-8 text open as bytes
         try:
-            text = path.read_text(encoding="utf-8")
+            with path.open("rb") as f:
+                binary = looks_binary(f.read(SNIFF_BYTES))
+            text = None if binary else path.read_text(encoding="utf-8")
         except UnicodeDecodeError:
-            text = path.read_text(encoding="utf-8", errors="replace")
+            text = None
 
-        opened_doc = Document(text=text, path=self._norm_path(path), modified=False)
+        opened_doc = Document(text=text or "", path=self._norm_path(path), modified=False)
         opened_doc.cursor_pos = 0
+        if text is None:
+            try:
+                opened_doc.binary = HexFile(path)
+            except (OSError, ValueError) as exc:
+                self._set_status(f"Cannot open {path.name}: {exc}")
+                return
 
         placeholder_i = self._find_pristine_placeholder_index()
         if placeholder_i is not None:
+            placeholder = self._tabs.doc_at(placeholder_i)
             self._tabs.set_doc(placeholder_i, opened_doc)
-            self.set_current_index(placeholder_i)
+            self._release_documents([placeholder])
+            if placeholder_i == self._current_index:
+                # same row, new document: set_current_index would be a no-op
+                self._sync_current_to_qml()
+            else:
+                self.set_current_index(placeholder_i)
         else:
             self._open_new_tab(opened_doc)
 
-        self._set_status(f"Opened: {path.name}")
+        self._quick_open.note_recent(opened_doc.path)
+        self._set_status(f"Opened: {path.name}" + (" (binary, read-only)" if text is None else ""))
 
     @Slot()
     def save(self) -> None:
         doc = self._current_doc()
+        if doc.binary is not None:
+            self._set_status("Binary files open read-only")
+            return
 
         # Save behaves like Save As if no path yet
         if doc.path is None:
@@ -275,10 +757,10 @@ class AppController(QObject):
             self.requestSaveAs.emit()
             return
 
-        doc.path.parent.mkdir(parents=True, exist_ok=True)
-        doc.path.write_text(doc.text, encoding="utf-8")
+        _write_file(doc.path, doc.text)
 
         doc.modified = False
+        self._diff.mark_saved(doc)
         self._tabs.update_row(self._current_index)
 
         self.modifiedChanged.emit()
@@ -293,30 +775,142 @@ class AppController(QObject):
             return
 
         doc = self._current_doc()
+        if doc.binary is not None:
+            self._set_status("Binary files open read-only")
+            return
         path.parent.mkdir(parents=True, exist_ok=True)
         path.write_text(doc.text, encoding="utf-8")
 
         doc.path = path
+        self._quick_open.note_recent(self._norm_path(path))
         self.fileInfoChanged.emit()
+        # the new extension may mean another language
+        self._sync_structure()
         doc.modified = False
+        self._diff.mark_saved(doc)
         self._tabs.update_row(self._current_index)
 
         self.modifiedChanged.emit()
         self.documentTitleChanged.emit()
         self._set_status(f"Saved: {path.name}")
 
+    @Slot()
+    def save_all(self) -> None:
+        """Write every modified tab that has a path, all at once; one status line at the end."""
+        jobs: list[tuple[Document, Path, str, int]] = []
+        untitled = 0
+        for doc in self._tabs.docs():
+            if not doc.modified or id(doc) in self._saving:
+                continue
+            if doc.path is None:
+                untitled += 1
+                continue
+            jobs.append((doc, doc.path, doc.text, doc.revision))
+
+        if not jobs:
+            self._set_status(
+                f"{_plural(untitled, 'untitled tab')} need Save As" if untitled else "Nothing to save"
+            )
+            return
+
+        self._set_status(f"Saving {_plural(len(jobs), 'file')}…")
+        results: list[tuple[Document, Path, int, BaseException | None]] = []
+
+        def finished(doc: Document, path: Path, revision: int, error: BaseException | None) -> None:
+            self._saving.discard(id(doc))
+            results.append((doc, path, revision, error))
+            if len(results) == len(jobs):
+                self._finish_save_all(results, untitled)
+
+        for doc, path, text, revision in jobs:
+            self._saving.add(id(doc))
+            run_in_background(
+                partial(_write_file, path, text),
+                lambda _r, d=doc, p=path, rev=revision: finished(d, p, rev, None),
+                lambda e, d=doc, p=path, rev=revision: finished(d, p, rev, e),
+                pool=self._io_pool,
+            )
+
+    def _finish_save_all(
+        self, results: list[tuple[Document, Path, int, BaseException | None]], untitled: int
+    ) -> None:
+        docs = self._tabs.docs()
+        saved, failed, rows = 0, [], []
+        for doc, path, revision, error in results:
+            if error is not None:
+                failed.append(path.name)
+                continue
+            saved += 1
+            if doc.revision == revision:
+                doc.modified = False
+                self._diff.mark_saved(doc)
+            else:
+                # edited while the write was in flight: still modified vs. the file
+                self._diff.reload_baseline(doc)
+            rows.extend(i for i, d in enumerate(docs) if d is doc)
+
+        self._tabs.update_rows(rows)
+        self.modifiedChanged.emit()
+        self.documentTitleChanged.emit()
+
+        parts = [f"Saved {_plural(saved, 'file')}"]
+        if failed:
+            parts.append(f"{len(failed)} failed: {', '.join(sorted(failed))}")
+        if untitled:
+            parts.append(f"{_plural(untitled, 'untitled tab')} skipped")
+        self._set_status(" · ".join(parts))
+
+    def _close_rows(self, rows: list[int], what: str = "tab") -> None:
+        count = self._tabs.count()
+        rows = sorted({r for r in rows if 0 <= r < count})
+        if not rows:
+            self._set_status(f"No {what}s to close")
+            return
+        current = self._current_doc()
+        removed_before = sum(1 for r in rows if r < self._current_index)
+        closed = [self._tabs.doc_at(r) for r in rows]
+
+        self._tabs.remove_rows(rows)
+        self._release_documents(closed)
+        if self._tabs.count() == 0:
+            self._tabs.add_doc(Document())
+
+        kept = next((i for i, d in enumerate(self._tabs.docs()) if d is current), None)
+        if kept is None:
+            kept = min(self._current_index - removed_before, self._tabs.count() - 1)
+        self._current_index = max(0, kept)
+        self._sync_current_to_qml()
+        self._set_status(f"Closed {_plural(len(rows), what)}")
+
+    @Slot()
+    def close_all(self) -> None:
+        self._close_rows(list(range(self._tabs.count())))
+
+    @Slot(int)
+    def close_others(self, index: int) -> None:
+        self._close_rows([i for i in range(self._tabs.count()) if i != index])
+
+    @Slot()
+    def close_saved(self) -> None:
+        docs = self._tabs.docs()
+        self._close_rows([i for i, d in enumerate(docs) if not d.modified], "saved tab")
+
     @Slot()
     def close_current_tab(self) -> None:
         self.close_tab(self._current_index)
 
     @Slot(int)
     def close_tab(self, index: int) -> None:
+        if not 0 <= index < self._tabs.count():
+            return
         if self._tabs.count() <= 1:
             self._reset_session_on_exit = True
             QCoreApplication.quit()
             return
 
+        closed = self._tabs.doc_at(index)
         self._tabs.remove_doc(index)
+        self._release_documents([closed])
 
         if index == self._current_index:
             self._current_index = min(index, self._tabs.count() - 1)
@@ -328,6 +922,8 @@ class AppController(QObject):
     @Slot(int)
     def set_cursor_position(self, pos: int) -> None:
         doc = self._current_doc()
+        # UTF-16 units, which may run past len(doc.text); the controller clamps
+        self._structure.set_caret(int(pos))
         # clamp to text length so it never breaks
         pos = max(0, min(int(pos), len(doc.text)))
         if doc.cursor_pos == pos:
@@ -335,6 +931,42 @@ class AppController(QObject):
         doc.cursor_pos = pos
         self.cursorPositionChanged.emit()
 
+    @Slot(int, int)
+    def set_selection(self, start: int, end: int) -> None:
+        doc = self._current_doc()
+        text = doc.text
+        n = len(text)
+        # QML reports UTF-16 offsets; the counters index code points
+        units = doc.utf16()
+        start, end = sorted(max(0, min(units.from_utf16(int(p)), n)) for p in (start, end))
+        old_start, old_end = self._selection
+        old = self._selection_stats
+        if (start, end) == (old_start, old_end) and self._selection_revision == doc.revision:
+            return
+
+        if end <= start:
+            st = None
+        elif start == 0 and end == n and self._current_stats() is not None:
+            st = self._current_stats()
+        elif old is None or self._selection_revision != doc.revision or old_end <= old_start:
+            st = count_range(text, start, end)
+        elif start == old_start and end > old_end:
+            # drag grows at the end: only count the newly covered range
+            st = concat(text, old, count_range(text, old_end, end), old_end)
+        elif start == old_start and start < end < old_end:
+            st = detach(text, old, count_range(text, end, old_end), end)
+        elif end == old_end and start < old_start:
+            st = concat(text, count_range(text, start, old_start), old, old_start)
+        elif end == old_end and old_start < start < end:
+            st = detach(text, old, count_range(text, old_start, start), start)
+        else:
+            st = count_range(text, start, end)
+
+        self._selection = (start, end)
+        self._selection_stats = st
+        self._selection_revision = doc.revision
+        self.selectionStatsChanged.emit()
+
     @Slot(float)
     def set_scroll_y(self, y: float) -> None:
         doc = self._current_doc()
@@ -351,6 +983,7 @@ class AppController(QObject):
     # -------------------------
 
     def save_session(self) -> None:
+        self._quick_open.save()
         if self._reset_session_on_exit:
             self._session.save([Document()], 0)
             return
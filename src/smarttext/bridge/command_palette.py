@@ -0,0 +1,236 @@
+from __future__ import annotations
+
+from typing import Any, Dict, List
+
+from PySide6.QtCore import (
+    QAbstractListModel,
+    QEvent,
+    QModelIndex,
+    QObject,
+    Property,
+    Qt,
+    Signal,
+    Slot,
+)
+from PySide6.QtGui import QKeySequence
+
+from ..core.commands import (
+    BUILTIN_COMMANDS,
+    SCOPE_EDITOR,
+    SCOPE_NONE,
+    SCOPE_PALETTE,
+    Command,
+    CommandRegistry,
+    discover_plugins,
+)
+from ..core.fuzzy_index import fuzzy_score
+from ..core.settings_store import SettingsStore
+from .workers import run_in_background
+
+_MAX_RESULTS = 50
+
+
+def _combo(sequence: str) -> int | None:
+    """First chord of a portable key sequence, as one int (None if it does not parse)."""
+    seq = QKeySequence(sequence)
+    if seq.isEmpty():
+        return None
+    return seq[0].toCombined()
+
+
+class CommandListModel(QAbstractListModel):
+    IdRole = Qt.UserRole + 1
+    TitleRole = Qt.UserRole + 2
+    CategoryRole = Qt.UserRole + 3
+    ShortcutRole = Qt.UserRole + 4
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._rows: List[tuple[Command, str]] = []
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index: QModelIndex, role: int):
+        if not index.isValid():
+            return None
+        i = index.row()
+        if i < 0 or i >= len(self._rows):
+            return None
+        command, shortcut = self._rows[i]
+        if role == self.IdRole:
+            return command.id
+        if role == self.TitleRole:
+            return command.title
+        if role == self.CategoryRole:
+            return command.category
+        if role == self.ShortcutRole:
+            return shortcut
+        return None
+
+    def roleNames(self):
+        return {
+            self.IdRole: b"commandId",
+            self.TitleRole: b"title",
+            self.CategoryRole: b"category",
+            self.ShortcutRole: b"shortcut",
+        }
+
+    def set_rows(self, rows: List[tuple[Command, str]]) -> None:
+        self.beginResetModel()
+        self._rows = rows
+        self.endResetModel()
+
+    def id_at(self, row: int) -> str | None:
+        if row < 0 or row >= len(self._rows):
+            return None
+        return self._rows[row][0].id
+
+
+class CommandController(QObject):
+    """
+    The command palette and every command key binding.
+
+    Commands come from the registry (built-ins plus entry-point plugins, found
+    off the GUI thread). Key presses on the main window go through one table
+    of key combination -> command id, rebuilt only when a shortcut setting
+    changes; the palette fuzzy-filters the same commands by title.
+    """
+
+    keyScopeChanged = Signal()
+    statusMessage = Signal(str)
+    # asks QML to open a dialog / layer it owns ("openDialog", "lineOps", …)
+    uiRequested = Signal(str)
+
+    def __init__(self, context: Any, settings: SettingsStore | None, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._context = context
+        self._settings = settings
+        self._registry = CommandRegistry(BUILTIN_COMMANDS)
+        self._results = CommandListModel()
+        self._key_scope = SCOPE_EDITOR
+        self._keys: Dict[int, str] = {}
+        self._labels: Dict[str, str] = {}
+        self._last_query = ""
+
+        if settings is not None:
+            for c in BUILTIN_COMMANDS:
+                if c.setting:
+                    getattr(settings, f"{c.setting}Changed").connect(self._rebuild_keys)
+        self._rebuild_keys()
+        run_in_background(discover_plugins, self._add_plugins)
+
+    # ---------- registry ----------
+    def _add_plugins(self, commands: List[Command]) -> None:
+        added = [c for c in commands if self._registry.register(c)]
+        if added:
+            self._rebuild_keys()
+            self.search(self._last_query)
+
+    def _sequence(self, command: Command) -> str:
+        if command.setting and self._settings is not None:
+            return str(getattr(self._settings, command.setting))
+        return command.shortcut
+
+    def _rebuild_keys(self) -> None:
+        keys: Dict[int, str] = {}
+        labels: Dict[str, str] = {}
+        for command in self._registry.commands():
+            sequence = self._sequence(command)
+            combo = _combo(sequence) if sequence else None
+            # the first command to claim a combination keeps it
+            if combo is None or combo in keys:
+                continue
+            keys[combo] = command.id
+            labels[command.id] = QKeySequence(combo).toString(QKeySequence.NativeText)
+        self._keys = keys
+        self._labels = labels
+
+    # ---------- keyboard ----------
+    def get_key_scope(self) -> str:
+        return self._key_scope
+
+    def set_key_scope(self, scope: str) -> None:
+        if scope not in (SCOPE_EDITOR, SCOPE_PALETTE, SCOPE_NONE) or scope == self._key_scope:
+            return
+        self._key_scope = scope
+        self.keyScopeChanged.emit()
+
+    # which bindings are live; set from QML as dialogs and layers open and close
+    keyScope = Property(str, get_key_scope, set_key_scope, notify=keyScopeChanged)
+
+    def eventFilter(self, watched: QObject, event: QEvent) -> bool:
+        if event.type() != QEvent.KeyPress or self._key_scope == SCOPE_NONE:
+            return False
+        combo = event.keyCombination().toCombined() & ~Qt.KeypadModifier.value
+        command_id = self._keys.get(combo)
+        if command_id is None:
+            return False
+        if self._key_scope == SCOPE_PALETTE and not self._registry.get(command_id).in_palette:
+            return False
+        self.run(command_id)
+        return True
+
+    # ---------- running ----------
+    def request_ui(self, name: str) -> None:
+        self.uiRequested.emit(name)
+
+    @Slot(str)
+    def run(self, command_id: str) -> None:
+        command = self._registry.get(command_id)
+        if command is None:
+            self.statusMessage.emit(f"Unknown command: {command_id}")
+            return
+        try:
+            self._registry.run(command_id, self._context)
+        except Exception as exc:  # plugins may fail to import or run
+            self.statusMessage.emit(f"{command.title} failed: {exc}")
+
+    @Slot(int)
+    def activate(self, row: int) -> None:
+        command_id = self._results.id_at(row)
+        if command_id is not None:
+            self.run(command_id)
+
+    @Slot(result="QVariantList")
+    def timings(self) -> list:
+        """Per-command import and call latency (ms), slowest total first."""
+        rows = []
+        for command in self._registry.commands():
+            st = self._registry.stats(command.id)
+            if st.calls:
+                rows.append({
+                    "id": command.id,
+                    "calls": st.calls,
+                    "loadMs": st.load * 1000,
+                    "lastMs": st.last * 1000,
+                    "totalMs": st.total * 1000,
+                })
+        rows.sort(key=lambda r: r["totalMs"], reverse=True)
+        return rows
+
+    # ---------- palette ----------
+    def get_results(self) -> QObject:
+        return self._results
+
+    results = Property(QObject, get_results, constant=True)
+
+    @Slot(str)
+    def search(self, query: str) -> None:
+        self._last_query = query
+        q = "".join(query.lower().split())
+        commands = self._registry.commands()
+        if not q:
+            # recently run first, then in declaration order
+            recent = {cid: i for i, cid in enumerate(self._registry.recent())}
+            commands.sort(key=lambda c: recent.get(c.id, len(recent)))
+        else:
+            scored = []
+            for c in commands:
+                score = max(fuzzy_score(q, c.title), 0.8 * fuzzy_score(q, f"{c.category} {c.title}"))
+                if score > 0:
+                    scored.append((score, c))
+            scored.sort(key=lambda r: r[0], reverse=True)
+            commands = [c for _s, c in scored]
+        labels = self._labels
+        self._results.set_rows([(c, labels.get(c.id, "")) for c in commands[:_MAX_RESULTS]])
@@ -0,0 +1 @@
+"""Built-in command implementations, imported on first use (see core.commands)."""
@@ -0,0 +1,42 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ..app_controller import AppController
+
+
+def add_caret_above(app: AppController) -> None:
+    app.carets.add_caret_line(-1)
+
+
+def add_caret_below(app: AppController) -> None:
+    app.carets.add_caret_line(1)
+
+
+def add_next_occurrence(app: AppController) -> None:
+    app.carets.add_next_occurrence()
+
+
+def select_all_occurrences(app: AppController) -> None:
+    app.carets.select_all_occurrences()
+
+
+def fold(app: AppController) -> None:
+    app.structure.fold_at_caret()
+
+
+def unfold(app: AppController) -> None:
+    app.structure.unfold_at_caret()
+
+
+def fold_all(app: AppController) -> None:
+    app.structure.fold_all()
+
+
+def unfold_all(app: AppController) -> None:
+    app.structure.unfold_all()
+
+
+def jump_to_bracket(app: AppController) -> None:
+    app.structure.jump_to_bracket()
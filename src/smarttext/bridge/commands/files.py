@@ -0,0 +1,46 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ..app_controller import AppController
+
+
+def new_file(app: AppController) -> None:
+    app.new_file()
+
+
+def open_file(app: AppController) -> None:
+    app.commands.request_ui("openDialog")
+
+
+def open_folder(app: AppController) -> None:
+    app.commands.request_ui("projectDialog")
+
+
+def save(app: AppController) -> None:
+    app.save()
+
+
+def save_as(app: AppController) -> None:
+    app.commands.request_ui("saveAsDialog")
+
+
+def save_all(app: AppController) -> None:
+    app.save_all()
+
+
+def close_tab(app: AppController) -> None:
+    app.close_current_tab()
+
+
+def close_others(app: AppController) -> None:
+    app.close_others(app.currentIndex)
+
+
+def close_saved(app: AppController) -> None:
+    app.close_saved()
+
+
+def close_all(app: AppController) -> None:
+    app.close_all()
@@ -0,0 +1,34 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ..app_controller import AppController
+
+
+def format_document(app: AppController) -> None:
+    app.formatter.run("format")
+
+
+def minify_document(app: AppController) -> None:
+    app.formatter.run("minify")
+
+
+def validate_document(app: AppController) -> None:
+    app.formatter.run("validate")
+
+
+def line_tools(app: AppController) -> None:
+    app.commands.request_ui("lineOps")
+
+
+def sort_lines(app: AppController) -> None:
+    app.lineOps.run("sort", False)
+
+
+def unique_lines(app: AppController) -> None:
+    app.lineOps.run("unique", False)
+
+
+def reverse_lines(app: AppController) -> None:
+    app.lineOps.run("reverse", False)
@@ -0,0 +1,22 @@
+from __future__ import annotations
+
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from ..app_controller import AppController
+
+
+def toggle_quick_open(app: AppController) -> None:
+    app.commands.request_ui("quickOpen")
+
+
+def show_commands(app: AppController) -> None:
+    app.commands.request_ui("commands")
+
+
+def toggle_full_screen(app: AppController) -> None:
+    app.commands.request_ui("fullScreen")
+
+
+def open_settings(app: AppController) -> None:
+    app.commands.request_ui("settings")
@@ -0,0 +1,126 @@
+from __future__ import annotations
+
+import re
+from collections import Counter
+
+from PySide6.QtCore import QObject, Slot
+from PySide6.QtGui import QTextCursor
+from PySide6.QtQuick import QQuickTextDocument
+
+from ..core.document import Document, TextEdit
+from ..core.word_index import WordIndex, count_words, edit_words
+from .tabs_model import TabsModel
+from .workers import run_in_background
+
+# shorter prefixes match too much to be useful
+MIN_PREFIX = 2
+SUGGESTIONS = 8
+# edits bigger than this (e.g. a whole-document rewrite) recount the
+# document on the thread pool instead of diffing its words on the GUI thread
+RECOUNT_EDIT_CHARS = 1 << 20
+
+_PREFIX = re.compile(r"[^\W\d]\w*\Z")
+
+
+def _apply(counts: Counter, gone: Counter, new: Counter) -> None:
+    """In-place `counts - gone + new`, dropping words that reach zero."""
+    for w, c in gone.items():
+        left = counts.get(w, 0) - c
+        if left > 0:
+            counts[w] = left
+        else:
+            counts.pop(w, None)
+    counts.update(new)
+
+
+class CompletionController(QObject):
+    """
+    Word completion drawn from every open tab.
+
+    Each document's word counts are taken once on the thread pool and then
+    kept current from its edits; the shared WordIndex only ever sees the
+    differences, so opening, closing or typing never rebuilds it.
+    """
+
+    def __init__(self, tabs: TabsModel, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._tabs = tabs
+        self._index = WordIndex()
+        # documents that are indexed or being indexed, by id
+        self._docs: dict[int, Document] = {}
+        # word changes seen while a document's first count is still running
+        self._backlog: dict[int, list[tuple[Counter, Counter]]] = {}
+
+        tabs.rowsInserted.connect(self._sync_tabs)
+        tabs.rowsRemoved.connect(self._sync_tabs)
+        tabs.modelReset.connect(self._sync_tabs)
+        # set_doc swaps a document in place and only reports dataChanged
+        tabs.dataChanged.connect(self._sync_tabs)
+        self._sync_tabs()
+
+    def _sync_tabs(self, *_args) -> None:
+        open_docs = {id(d): d for d in self._tabs.docs()}
+        for key in [k for k in self._docs if k not in open_docs]:
+            self._forget(self._docs.pop(key))
+        for key, doc in open_docs.items():
+            if key not in self._docs:
+                self._docs[key] = doc
+                self._count_in_background(doc)
+
+    def _forget(self, doc: Document) -> None:
+        doc.remove_listener(self._on_doc_edit)
+        self._backlog.pop(id(doc), None)
+        if doc.words is not None:
+            self._index.remove(doc.words)
+            doc.words = None
+
+    def _count_in_background(self, doc: Document) -> None:
+        backlog = self._backlog[id(doc)] = []
+        doc.add_listener(self._on_doc_edit)
+        snapshot = doc.text
+
+        def done(counts: Counter) -> None:
+            if self._backlog.get(id(doc)) is not backlog:
+                return  # closed or recounted meanwhile
+            del self._backlog[id(doc)]
+            for gone, new in backlog:
+                _apply(counts, gone, new)
+            doc.words = counts
+            self._index.add(counts)
+
+        run_in_background(lambda: count_words(snapshot), done)
+
+    def _on_doc_edit(self, doc: Document, edit: TextEdit) -> None:
+        if len(edit.removed) + len(edit.inserted) > RECOUNT_EDIT_CHARS:
+            self._forget(doc)
+            self._count_in_background(doc)
+            return
+        gone, new = edit_words(doc.text, edit)
+        if not gone and not new:
+            return
+        if doc.words is None:
+            backlog = self._backlog.get(id(doc))
+            if backlog is not None:
+                backlog.append((gone, new))
+            return
+        _apply(doc.words, gone, new)
+        self._index.remove(gone)
+        self._index.add(new)
+
+    @Slot(str, result="QVariantMap")
+    def complete(self, before: str) -> dict:
+        """Suggestions for the word ending `before` (the text left of the caret)."""
+        m = _PREFIX.search(before)
+        prefix = m.group() if m else ""
+        words = self._index.complete(prefix, SUGGESTIONS) if len(prefix) >= MIN_PREFIX else []
+        return {"prefix": prefix, "words": words}
+
+    @Slot(QQuickTextDocument, int, int, str)
+    def accept(self, document: QQuickTextDocument, start: int, end: int, word: str) -> None:
+        """Replace the typed prefix at [start, end) with `word` as one undo step."""
+        cursor = QTextCursor(document.textDocument())
+        cursor.beginEditBlock()
+        cursor.setPosition(start)
+        cursor.setPosition(end, QTextCursor.KeepAnchor)
+        cursor.insertText(word)
+        cursor.endEditBlock()
@@ -0,0 +1,412 @@
+from __future__ import annotations
+
+from array import array
+
+from PySide6.QtCore import (
+    QAbstractListModel,
+    QModelIndex,
+    QObject,
+    Property,
+    Qt,
+    QTimer,
+    Signal,
+    Slot,
+)
+
+from ..core.document import Document, TextEdit
+from ..core.line_diff import (
+    ADDED,
+    DELETED,
+    MODIFIED,
+    ChangeTracker,
+    diff_hashes,
+    line_hashes,
+    read_saved_lines,
+)
+from ..core.line_index import LineIndex
+from .tabs_model import TabsModel
+from .workers import run_in_background
+
+# quiet period before a document whose hunks got out of step is rediffed
+REBASE_DELAY_MS = 300
+# edits inserting more than this are rediffed on the thread pool instead of
+# having their lines hashed on the GUI thread
+REBASE_EDIT_CHARS = 1 << 20
+# gutter markers are sent to QML for the visible lines only, and never more than this
+MAX_MARKERS = 500
+
+_EQUAL, _CHANGED, _REMOVED, _INSERTED = 0, 1, 2, 3
+_KIND_NAMES = {_EQUAL: "", _CHANGED: MODIFIED, _REMOVED: DELETED, _INSERTED: ADDED}
+
+
+def _side_by_side(a: array, b: array) -> tuple[array, array, array, array]:
+    """Rows (left line, right line, kind) of the aligned texts, -1 for a missing side."""
+    left, right, kinds, starts = array("q"), array("q"), array("b"), array("q")
+    ai = bi = 0
+    for h in diff_hashes(a, b):
+        n = h.a0 - ai
+        left.extend(range(ai, h.a0))
+        right.extend(range(bi, h.b0))
+        kinds.extend(bytes(n))
+        starts.append(len(kinds))
+        la, lb = h.a1 - h.a0, h.b1 - h.b0
+        for k in range(max(la, lb)):
+            left.append(h.a0 + k if k < la else -1)
+            right.append(h.b0 + k if k < lb else -1)
+            kinds.append(_CHANGED if k < la and k < lb else (_REMOVED if k < la else _INSERTED))
+        ai, bi = h.a1, h.b1
+    left.extend(range(ai, len(a)))
+    right.extend(range(bi, len(b)))
+    kinds.extend(bytes(len(a) - ai))
+    return left, right, kinds, starts
+
+
+class CompareModel(QAbstractListModel):
+    """Side-by-side rows of two text snapshots; line text is sliced out on demand."""
+
+    LeftNumberRole = Qt.UserRole + 1
+    LeftTextRole = Qt.UserRole + 2
+    RightNumberRole = Qt.UserRole + 3
+    RightTextRole = Qt.UserRole + 4
+    KindRole = Qt.UserRole + 5
+
+    def __init__(self, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self.clear()
+
+    def clear(self) -> None:
+        self.beginResetModel()
+        self._texts = ("", "")
+        self._indexes: tuple[LineIndex, LineIndex] | None = None
+        self._left = array("q")
+        self._right = array("q")
+        self._kinds = array("b")
+        self.change_rows = array("q")
+        self.endResetModel()
+
+    def set_rows(self, texts: tuple[str, str], indexes: tuple[LineIndex, LineIndex], rows) -> None:
+        self.beginResetModel()
+        self._texts = texts
+        self._indexes = indexes
+        self._left, self._right, self._kinds, self.change_rows = rows
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._kinds)
+
+    def _line(self, side: int, line: int) -> str:
+        if line < 0 or self._indexes is None:
+            return ""
+        idx = self._indexes[side]
+        return self._texts[side][idx.line_start(line):idx.line_end(line)]
+
+    def data(self, index: QModelIndex, role: int):
+        if not index.isValid():
+            return None
+        i = index.row()
+        if i < 0 or i >= len(self._kinds):
+            return None
+        if role == self.LeftNumberRole:
+            return self._left[i] + 1
+        if role == self.RightNumberRole:
+            return self._right[i] + 1
+        if role == self.LeftTextRole:
+            return self._line(0, self._left[i])
+        if role == self.RightTextRole:
+            return self._line(1, self._right[i])
+        if role == self.KindRole:
+            return _KIND_NAMES[self._kinds[i]]
+        return None
+
+    def roleNames(self):
+        return {
+            self.LeftNumberRole: b"leftNumber",
+            self.LeftTextRole: b"leftText",
+            self.RightNumberRole: b"rightNumber",
+            self.RightTextRole: b"rightText",
+            self.KindRole: b"kind",
+        }
+
+
+class DiffController(QObject):
+    """
+    Gutter markers for lines changed since the last save, and tab-vs-tab compare.
+
+    Each saved document carries a ChangeTracker (line hashes of the saved and
+    the current text). It is seeded by a full diff on the thread pool and then
+    patched from edit deltas; the saved lines are re-read from disk only when
+    the user asks to see them.
+    """
+
+    markersChanged = Signal()
+    # a document's hunks moved (edit, save, rediff); per-line views re-query them
+    changesUpdated = Signal()
+    savedLinesReady = Signal(int, str)
+    compareChanged = Signal()
+    statusMessage = Signal(str)
+
+    def __init__(self, tabs: TabsModel, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._tabs = tabs
+        self._doc: Document | None = None
+        self._viewport = (0, 0)
+        self._markers: list[dict] = []
+        # ids of documents with a full diff in flight
+        self._rebasing: set[int] = set()
+        self._stale: list[Document] = []
+
+        self._rebase_timer = QTimer(self)
+        self._rebase_timer.setSingleShot(True)
+        self._rebase_timer.setInterval(REBASE_DELAY_MS)
+        self._rebase_timer.timeout.connect(self._rebase_stale)
+
+        self._compare = CompareModel(self)
+        self._compare_title = ""
+        self._compare_summary = ""
+        self._compare_busy = False
+        self._compare_open = False
+        self._compare_generation = 0
+
+    # ---------- gutter ----------
+    def set_document(self, doc: Document) -> None:
+        if doc is not self._doc:
+            # binary tabs hold no text to compare with the file
+            if doc.path is not None and doc.changes is None and doc.binary is None:
+                self._rebase(doc)
+            doc.add_listener(self._on_doc_edit)
+            self._doc = doc
+        self._refresh_markers()
+
+    def mark_saved(self, doc: Document) -> None:
+        """`doc` was just written to its path: the current text is the new baseline."""
+        doc.add_listener(self._on_doc_edit)
+        if doc.changes is not None:
+            doc.changes.mark_saved()
+        else:
+            self._rebase(doc)
+        self._changes_updated(doc)
+
+    def reload_baseline(self, doc: Document) -> None:
+        """The file behind `doc` was rewritten with other text than it holds now; rediff."""
+        doc.add_listener(self._on_doc_edit)
+        self._rebase(doc)
+
+    def _on_doc_edit(self, doc: Document, edit: TextEdit) -> None:
+        tracker = doc.changes
+        if tracker is None:
+            if id(doc) in self._rebasing:
+                self._schedule_rebase(doc)
+            return
+        if not doc.has_line_index() or len(edit.inserted) > REBASE_EDIT_CHARS:
+            doc.changes = None
+            self._schedule_rebase(doc)
+            self._changes_updated(doc)
+            return
+        idx = doc.line_index()
+        first = idx.line_of(edit.start)
+        new_count = edit.inserted.count("\n") + 1
+        new_hashes = line_hashes(doc.text[idx.line_start(first):idx.line_end(first + new_count - 1)])
+        if not tracker.on_edit(first, edit.removed.count("\n") + 1, new_hashes):
+            doc.changes = None
+            self._schedule_rebase(doc)
+        self._changes_updated(doc)
+
+    def _changes_updated(self, doc: Document) -> None:
+        if doc is self._doc:
+            self.changesUpdated.emit()
+            self._refresh_markers()
+
+    def _schedule_rebase(self, doc: Document) -> None:
+        if not any(d is doc for d in self._stale):
+            self._stale.append(doc)
+        self._rebase_timer.start()
+
+    def _rebase_stale(self) -> None:
+        stale, self._stale = self._stale, []
+        for doc in stale:
+            self._rebase(doc)
+
+    def _rebase(self, doc: Document) -> None:
+        """Full diff of the saved file (or the text itself, if unmodified) vs the text."""
+        doc.changes = None
+        path = doc.path
+        if path is None or id(doc) in self._rebasing:
+            return
+        self._rebasing.add(id(doc))
+        modified = doc.modified
+        if doc.has_line_index():
+            snapshot, revision = doc.text, doc.revision
+            build_rev = None
+        else:
+            snapshot, revision = doc.begin_line_index_build()
+            build_rev = revision
+
+        def work():
+            idx = LineIndex.from_text(snapshot) if build_rev is not None else None
+            current = line_hashes(snapshot)
+            if not modified:
+                return idx, ChangeTracker(array("q", current), current, ())
+            try:
+                saved = path.read_text(encoding="utf-8", errors="replace")
+            except OSError:
+                return idx, None
+            return idx, ChangeTracker(line_hashes(saved), current)
+
+        def done(result) -> None:
+            self._rebasing.discard(id(doc))
+            idx, tracker = result
+            if idx is not None:
+                doc.finish_line_index_build(idx, build_rev)
+            if doc.path != path:
+                return
+            if doc.revision != revision:
+                # edited while diffing; try again once typing settles
+                self._schedule_rebase(doc)
+                return
+            doc.changes = tracker
+            self._changes_updated(doc)
+
+        def failed(_exc: BaseException) -> None:
+            self._rebasing.discard(id(doc))
+
+        run_in_background(work, done, failed)
+
+    @Slot(int, int)
+    def set_viewport(self, first_offset: int, last_offset: int) -> None:
+        self._viewport = (int(first_offset), int(last_offset))
+        self._refresh_markers()
+
+    def _refresh_markers(self) -> None:
+        doc = self._doc
+        markers: list[dict] = []
+        if doc is not None and doc.changes is not None and doc.has_line_index():
+            idx = doc.line_index()
+            n = len(doc.text)
+            first = idx.line_of(max(0, min(self._viewport[0], n)))
+            last = idx.line_of(max(0, min(self._viewport[1], n)))
+            for h in doc.changes.hunks_between(first, last)[:MAX_MARKERS]:
+                if h.b0 == h.b1:
+                    # deletion: a tick at the start of the line that now follows it
+                    start = end = idx.line_start(h.b0) if h.b0 < len(idx) else n
+                else:
+                    start = idx.line_start(h.b0)
+                    end = idx.line_end(h.b1 - 1)
+                markers.append({"line": h.b0, "kind": h.kind, "start": start, "end": end})
+        if markers == self._markers:
+            return
+        self._markers = markers
+        self.markersChanged.emit()
+
+    def get_markers(self) -> list:
+        return self._markers
+
+    markers = Property("QVariantList", get_markers, notify=markersChanged)
+
+    @Slot(int)
+    def request_saved_lines(self, line: int) -> None:
+        """Reads the saved version of the hunk at `line` from disk; answers via savedLinesReady."""
+        doc = self._doc
+        if doc is None or doc.path is None or doc.changes is None:
+            return
+        hunk = doc.changes.hunk_at(int(line))
+        if hunk is None or hunk.a0 == hunk.a1:
+            self.savedLinesReady.emit(int(line), "")
+            return
+        path, baseline = doc.path, doc.changes.baseline
+
+        def done(lines) -> None:
+            if lines is None:
+                self.statusMessage.emit(f"{path.name} changed on disk since it was saved")
+                return
+            self.savedLinesReady.emit(int(line), "\n".join(lines))
+
+        run_in_background(lambda: read_saved_lines(path, baseline, hunk.a0, hunk.a1), done)
+
+    # ---------- compare ----------
+    @Slot(int, int)
+    def compare_tabs(self, left_row: int, right_row: int) -> None:
+        count = self._tabs.count()
+        if not (0 <= left_row < count and 0 <= right_row < count) or left_row == right_row:
+            return
+        left, right = self._tabs.doc_at(left_row), self._tabs.doc_at(right_row)
+        texts = (left.text, right.text)
+        self._compare_generation += 1
+        gen = self._compare_generation
+        self._compare.clear()
+        self._compare_title = f"{left.title}  ↔  {right.title}"
+        self._compare_summary = "Comparing…"
+        self._compare_busy = True
+        self._compare_open = True
+        self.compareChanged.emit()
+
+        def work():
+            a, b = line_hashes(texts[0]), line_hashes(texts[1])
+            indexes = (LineIndex.from_text(texts[0]), LineIndex.from_text(texts[1]))
+            return indexes, _side_by_side(a, b)
+
+        def done(result) -> None:
+            if gen != self._compare_generation:
+                return
+            indexes, rows = result
+            self._compare.set_rows(texts, indexes, rows)
+            kinds = rows[2]
+            added, removed = kinds.count(_INSERTED), kinds.count(_REMOVED)
+            changed = kinds.count(_CHANGED)
+            hunks = len(rows[3])
+            self._compare_summary = (
+                "Identical" if not hunks
+                else f"{hunks} change{'s' if hunks != 1 else ''} · "
+                     f"{changed} modified · +{added} · −{removed}"
+            )
+            self._compare_busy = False
+            self.compareChanged.emit()
+
+        def failed(exc: BaseException) -> None:
+            if gen != self._compare_generation:
+                return
+            self._compare_summary = f"Compare failed: {exc}"
+            self._compare_busy = False
+            self.compareChanged.emit()
+
+        run_in_background(work, done, failed)
+
+    @Slot()
+    def close_compare(self) -> None:
+        self._compare_generation += 1
+        self._compare.clear()
+        self._compare_busy = False
+        self._compare_open = False
+        self.compareChanged.emit()
+
+    @Slot(int, int, result=int)
+    def next_change(self, row: int, direction: int) -> int:
+        """First row of the next (direction > 0) or previous change after `row`; -1 if none."""
+        starts = self._compare.change_rows
+        if direction > 0:
+            return next((s for s in starts if s > row), -1)
+        return next((s for s in reversed(starts) if s < row), -1)
+
+    def get_compare_model(self) -> QObject:
+        return self._compare
+
+    compareModel = Property(QObject, get_compare_model, constant=True)
+
+    def get_compare_open(self) -> bool:
+        return self._compare_open
+
+    compareOpen = Property(bool, get_compare_open, notify=compareChanged)
+
+    def get_compare_busy(self) -> bool:
+        return self._compare_busy
+
+    compareBusy = Property(bool, get_compare_busy, notify=compareChanged)
+
+    def get_compare_title(self) -> str:
+        return self._compare_title
+
+    compareTitle = Property(str, get_compare_title, notify=compareChanged)
+
+    def get_compare_summary(self) -> str:
+        return self._compare_summary
+
+    compareSummary = Property(str, get_compare_summary, notify=compareChanged)
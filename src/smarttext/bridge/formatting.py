@@ -0,0 +1,57 @@
+from __future__ import annotations
+
+from PySide6.QtCore import QObject, Signal, Slot
+
+from ..core.document import Document
+from ..core.formatting import FormatError, detect_kind, run_action, supports
+from .workers import JobController
+
+_VERBS = {"format": "Formatting", "minify": "Minifying", "validate": "Checking"}
+
+
+class FormatController(JobController):
+    """
+    Format / minify / validate for JSON, XML, YAML and TOML documents.
+
+    Jobs run on the thread pool over an immutable snapshot; the finished text
+    is handed back through `finished` together with the revision it was made
+    from, so the caller can refuse it if the document moved on meanwhile.
+    """
+
+    # (document, revision of the snapshot, new text)
+    finished = Signal(object, int, object)
+
+    def __init__(self, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._doc: Document | None = None
+
+    def set_document(self, doc: Document | None) -> None:
+        self._doc = doc
+
+    @Slot(str)
+    def run(self, action: str) -> None:
+        doc = self._doc
+        if doc is None:
+            return
+        kind = detect_kind(doc.path, doc.text)
+        if not supports(kind, action):
+            what = kind.upper() if kind else "this file type"
+            self.statusMessage.emit(f"{action.capitalize()} is not available for {what}")
+            return
+
+        snapshot, revision = doc.text, doc.revision
+        label = f"{_VERBS[action]} {kind.upper()}"
+
+        def done(result: str | None) -> None:
+            if result is None:
+                self.statusMessage.emit(f"{kind.upper()} is valid")
+            else:
+                self.finished.emit(doc, revision, result)
+
+        def failed(exc: BaseException) -> None:
+            if isinstance(exc, FormatError):
+                self.statusMessage.emit(f"{kind.upper()} error at {exc}")
+            else:
+                self.statusMessage.emit(f"{label} failed: {exc}")
+
+        self._start(label, lambda report: run_action(kind, action, snapshot, report), done, failed)
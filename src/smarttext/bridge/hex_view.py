@@ -0,0 +1,179 @@
+from __future__ import annotations
+
+from PySide6.QtCore import (
+    QAbstractListModel,
+    QModelIndex,
+    QObject,
+    Property,
+    Qt,
+    Signal,
+    Slot,
+)
+
+from ..core.hex_dump import BYTES_PER_ROW, HexFile, format_row, parse_offset, parse_pattern
+from .workers import JobController
+
+
+class HexRowModel(QAbstractListModel):
+    """One row per BYTES_PER_ROW bytes of a HexFile, formatted only when the view asks for it."""
+
+    OffsetRole = Qt.UserRole + 1
+    HexRole = Qt.UserRole + 2
+    AsciiRole = Qt.UserRole + 3
+
+    def __init__(self, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._file: HexFile | None = None
+
+    def set_file(self, hex_file: HexFile | None) -> None:
+        self.beginResetModel()
+        self._file = hex_file
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        if parent.isValid() or self._file is None:
+            return 0
+        return self._file.rows()
+
+    def data(self, index: QModelIndex, role: int):
+        f = self._file
+        if not index.isValid() or f is None:
+            return None
+        i = index.row()
+        if i < 0 or i >= f.rows():
+            return None
+        if role == self.OffsetRole:
+            return f"{i * BYTES_PER_ROW:08x}"
+        if role == self.HexRole:
+            return format_row(f.row(i))[0]
+        if role == self.AsciiRole:
+            return format_row(f.row(i))[1]
+        return None
+
+    def roleNames(self):
+        return {
+            self.OffsetRole: b"offsetText",
+            self.HexRole: b"hexText",
+            self.AsciiRole: b"asciiText",
+        }
+
+
+class HexViewController(JobController):
+    """
+    Read-only byte view for files that are not text.
+
+    The selection is a byte range (a jump target or a search match); QML gets
+    it as row/column pairs so offsets past 2 GiB never pass through a QML int.
+    """
+
+    fileChanged = Signal()
+    selectionChanged = Signal()
+    # QML should scroll this row into view
+    revealRow = Signal(int)
+
+    def __init__(self, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._model = HexRowModel(self)
+        self._file: HexFile | None = None
+        self._sel_start = 0
+        self._sel_end = 0
+
+    def set_file(self, hex_file: HexFile | None) -> None:
+        if hex_file is self._file:
+            return
+        self._file = hex_file
+        self._sel_start = self._sel_end = 0
+        self._model.set_file(hex_file)
+        self.fileChanged.emit()
+        self.selectionChanged.emit()
+
+    def get_model(self) -> QObject:
+        return self._model
+
+    model = Property(QObject, get_model, constant=True)
+
+    def get_size_text(self) -> str:
+        return f"{self._file.size:,} bytes" if self._file is not None else ""
+
+    sizeText = Property(str, get_size_text, notify=fileChanged)
+
+    # ---------- selection ----------
+    def _select(self, start: int, end: int) -> None:
+        self._sel_start, self._sel_end = start, end
+        self.selectionChanged.emit()
+        self.revealRow.emit(start // BYTES_PER_ROW)
+
+    def get_sel_row(self) -> int:
+        return self._sel_start // BYTES_PER_ROW
+
+    selRow = Property(int, get_sel_row, notify=selectionChanged)
+
+    def get_sel_column(self) -> int:
+        return self._sel_start % BYTES_PER_ROW
+
+    selColumn = Property(int, get_sel_column, notify=selectionChanged)
+
+    def get_sel_end_row(self) -> int:
+        return self._sel_end // BYTES_PER_ROW
+
+    selEndRow = Property(int, get_sel_end_row, notify=selectionChanged)
+
+    def get_sel_end_column(self) -> int:
+        return self._sel_end % BYTES_PER_ROW
+
+    # exclusive: the selection ends just before this column of selEndRow
+    selEndColumn = Property(int, get_sel_end_column, notify=selectionChanged)
+
+    def get_selection_text(self) -> str:
+        n = self._sel_end - self._sel_start
+        if self._file is None or n <= 0:
+            return ""
+        return f"0x{self._sel_start:x}" + (f" +{n}" if n > 1 else "")
+
+    selectionText = Property(str, get_selection_text, notify=selectionChanged)
+
+    # ---------- navigation ----------
+    @Slot(str)
+    def jump(self, text: str) -> None:
+        f = self._file
+        if f is None:
+            return
+        try:
+            offset = parse_offset(text)
+        except ValueError as exc:
+            self.statusMessage.emit(f"Bad offset: {exc}")
+            return
+        if offset >= f.size:
+            self.statusMessage.emit(f"Offset 0x{offset:x} is past the end (0x{f.size:x} bytes)")
+            return
+        self._select(offset, offset + 1)
+
+    @Slot(str, bool)
+    def find(self, text: str, forward: bool) -> None:
+        f = self._file
+        if f is None:
+            return
+        try:
+            pattern = parse_pattern(text)
+        except ValueError as exc:
+            self.statusMessage.emit(f"Bad pattern: {exc}")
+            return
+        has_sel = self._sel_end > self._sel_start
+        # step off the current match so repeated searches move on
+        start = self._sel_start + 1 if forward and has_sel else self._sel_start
+
+        def done(at: int) -> None:
+            if f is not self._file:
+                return
+            if at < 0:
+                self.statusMessage.emit(f"Not found: {text.strip()}")
+                return
+            self._select(at, at + len(pattern))
+            self.statusMessage.emit(f"Found at 0x{at:x}")
+
+        def failed(exc: BaseException) -> None:
+            # a closed tab's mapping fails the search; nobody is waiting for it
+            if f is self._file:
+                self.statusMessage.emit(f"Search failed: {exc}")
+
+        self._start("Searching", lambda report: f.find(pattern, start, forward, report), done, failed)
@@ -0,0 +1,109 @@
+from __future__ import annotations
+
+import re
+from typing import Callable
+
+from PySide6.QtCore import QObject, Signal, Slot
+
+from ..core.document import Document
+from ..core.line_ops import (
+    OPERATIONS,
+    extract_column,
+    filter_lines,
+    reverse_lines,
+    sort_lines,
+    unique_lines,
+)
+from .workers import JobController
+
+_SIMPLE = {"sort": sort_lines, "unique": unique_lines, "reverse": reverse_lines}
+
+
+def _count_lines(text: str) -> int:
+    if not text:
+        return 0
+    return text.count("\n") + (0 if text.endswith("\n") else 1)
+
+
+def _summary(op: str, before: int, after: int) -> str:
+    if op == "sort":
+        return f"Sorted {before:,} lines"
+    if op == "unique":
+        return f"Removed {before - after:,} duplicate lines, {after:,} left"
+    if op == "reverse":
+        return f"Reversed {before:,} lines"
+    if op == "column":
+        return f"Extracted a column from {before:,} lines"
+    return f"Kept {after:,} of {before:,} lines"
+
+
+class LineOpsController(JobController):
+    """
+    Whole-document line operations: sort, dedupe, filter, reverse, column.
+
+    Like formatting, jobs work on a snapshot off the GUI thread; `finished`
+    carries the revision they started from and whether the result was asked
+    for in a new tab instead of the current one.
+    """
+
+    # (document, revision of the snapshot, new text, to a new tab, summary)
+    finished = Signal(object, int, object, bool, str)
+
+    def __init__(self, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._doc: Document | None = None
+
+    def set_document(self, doc: Document | None) -> None:
+        self._doc = doc
+
+    @Slot(str, bool)
+    def run(self, op: str, new_tab: bool) -> None:
+        """Sort, unique or reverse."""
+        fn = _SIMPLE.get(op)
+        if fn is not None:
+            self._launch(op, fn, new_tab)
+
+    @Slot(str, bool, bool)
+    def filter(self, pattern: str, keep: bool, new_tab: bool) -> None:
+        """Keep the lines matching `pattern`, or with `keep` False drop them."""
+        try:
+            re.compile(pattern)
+        except re.error as exc:
+            self.statusMessage.emit(f"Bad pattern: {exc}")
+            return
+        self._launch(
+            "filter" if keep else "exclude",
+            lambda text, report: filter_lines(text, pattern, keep, report),
+            new_tab,
+        )
+
+    @Slot(int, str, bool)
+    def extract_column(self, column: int, delimiter: str, new_tab: bool) -> None:
+        """Field `column` (1-based) of each line, split on `delimiter` or on blanks when it is empty."""
+        if column < 1 or len(delimiter) > 1:
+            self.statusMessage.emit("Column needs a number from 1 and at most a one-character delimiter")
+            return
+        self._launch(
+            "column",
+            lambda text, report: extract_column(text, column, delimiter, report),
+            new_tab,
+        )
+
+    def _launch(self, op: str, fn: Callable, new_tab: bool) -> None:
+        doc = self._doc
+        if doc is None:
+            return
+        snapshot, revision = doc.text, doc.revision
+
+        def work(report: Callable[[float], None]) -> tuple[str, str]:
+            result = fn(snapshot, report)
+            return result, _summary(op, _count_lines(snapshot), _count_lines(result))
+
+        def done(out: tuple[str, str]) -> None:
+            result, summary = out
+            self.finished.emit(doc, revision, result, new_tab, summary)
+
+        def failed(exc: BaseException) -> None:
+            self.statusMessage.emit(f"{OPERATIONS[op]} failed: {exc}")
+
+        self._start(OPERATIONS[op], work, done, failed)
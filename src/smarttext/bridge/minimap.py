@@ -0,0 +1,138 @@
+from __future__ import annotations
+
+from PySide6.QtCore import QObject, Property, QSize, QTimer, Signal
+from PySide6.QtGui import QImage
+from PySide6.QtQuick import QQuickImageProvider
+
+from ..core.document import Document, TextEdit
+from ..core.line_index import LineIndex
+from ..core.minimap import MinimapCache, compute_rows, job_offsets
+from .workers import run_in_background
+
+# quiet period after an edit before dirty blocks are recomputed
+REGENERATE_DELAY_MS = 150
+
+
+class MinimapImageProvider(QQuickImageProvider):
+    """Serves the current document's overview as `image://minimap/<revision>`."""
+
+    def __init__(self) -> None:
+        super().__init__(QQuickImageProvider.Image)
+        self._image = QImage()
+
+    def set_image(self, image: QImage) -> None:
+        self._image = image
+
+    def requestImage(self, id: str, size: QSize, requestedSize: QSize) -> QImage:
+        return self._image
+
+
+class MinimapController(QObject):
+    """
+    Keeps the overview image of the current document up to date.
+
+    Density rows are computed on the thread pool from an immutable text
+    snapshot; the GUI thread only cuts jobs from the dirty blocks and stitches
+    the cached rows into a small grayscale QImage for the image provider.
+    """
+
+    revisionChanged = Signal()
+
+    def __init__(self, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._provider = MinimapImageProvider()
+        self._doc: Document | None = None
+        self._revision = 0
+        self._busy = False
+        self._again = False
+
+        self._timer = QTimer(self)
+        self._timer.setSingleShot(True)
+        self._timer.setInterval(REGENERATE_DELAY_MS)
+        self._timer.timeout.connect(self._regenerate)
+
+    def image_provider(self) -> MinimapImageProvider:
+        return self._provider
+
+    def get_revision(self) -> int:
+        return self._revision
+
+    # bumped whenever a new image is available; QML appends it to the image url
+    revision = Property(int, get_revision, notify=revisionChanged)
+
+    def set_document(self, doc: Document) -> None:
+        if doc.minimap is None:
+            doc.minimap = MinimapCache(doc.text.count("\n") + 1)
+            doc.add_listener(self._on_doc_edit)
+        self._doc = doc
+        self._publish()
+        self._regenerate()
+
+    def _on_doc_edit(self, doc: Document, edit: TextEdit) -> None:
+        if doc.minimap is None:
+            return
+        first = doc.line_index().line_of(edit.start) if doc.has_line_index() else None
+        if first is None:
+            # no index yet: the pending full build will pick the change up
+            doc.minimap.reset(doc.text.count("\n") + 1)
+        else:
+            doc.minimap.on_edit(
+                first, edit.removed.count("\n") + 1, edit.inserted.count("\n") + 1
+            )
+        if doc is self._doc:
+            self._timer.start()
+
+    def _regenerate(self) -> None:
+        doc = self._doc
+        if doc is None or doc.minimap is None:
+            return
+        if self._busy:
+            self._again = True
+            return
+
+        cache = doc.minimap
+        jobs = cache.dirty_jobs()
+        if not jobs:
+            return
+
+        self._busy = True
+        if doc.has_line_index():
+            snapshot, build_rev = doc.text, None
+            resolved = job_offsets(doc.line_index(), jobs)
+        else:
+            (snapshot, build_rev), resolved = doc.begin_line_index_build(), None
+
+        def work():
+            if resolved is not None:
+                return None, compute_rows(snapshot, resolved)
+            idx = LineIndex.from_text(snapshot)
+            return idx, compute_rows(snapshot, job_offsets(idx, jobs))
+
+        def done(result) -> None:
+            idx, rows = result
+            if idx is not None:
+                doc.finish_line_index_build(idx, build_rev)
+            if doc.minimap is cache:
+                cache.fill(rows)
+            self._finish(doc)
+
+        run_in_background(work, done, lambda _e: self._finish(doc))
+
+    def _finish(self, doc: Document) -> None:
+        self._busy = False
+        if doc is not self._doc:
+            return
+        self._publish()
+        if self._again or (doc.minimap is not None and doc.minimap.dirty_jobs()):
+            self._again = False
+            self._timer.start()
+
+    def _publish(self) -> None:
+        doc = self._doc
+        if doc is None or doc.minimap is None:
+            return
+        data, w, h = doc.minimap.render()
+        image = QImage(data, w, h, w, QImage.Format_Grayscale8).copy()
+        self._provider.set_image(image)
+        self._revision += 1
+        self.revisionChanged.emit()
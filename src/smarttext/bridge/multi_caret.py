@@ -0,0 +1,466 @@
+from __future__ import annotations
+
+import re
+from typing import Callable, List, Sequence
+
+from PySide6.QtCore import QObject, Property, Qt, Signal, Slot
+from PySide6.QtGui import QGuiApplication, QTextCursor
+from PySide6.QtQuick import QQuickTextDocument
+
+from ..core.carets import (
+    Selection,
+    between,
+    caret_on_line,
+    column_selections,
+    delete_at_selections,
+    ends_of,
+    merge_selections,
+    move_selections,
+    next_occurrence,
+    occurrences,
+    replace_selections,
+    span,
+)
+from ..core.document import Document, Replacement, TextEdit
+
+# select-all-occurrences stops here
+MAX_CARETS = 100_000
+# extra carets sent to QML for the visible part of the TextArea, at most
+MAX_VISIBLE_CARETS = 2000
+
+_WORD = re.compile(r"\w+")
+
+_MOVES = {
+    Qt.Key_Left: "left",
+    Qt.Key_Right: "right",
+    Qt.Key_Up: "up",
+    Qt.Key_Down: "down",
+    Qt.Key_Home: "home",
+    Qt.Key_End: "end",
+}
+
+
+def _mod(modifiers: int, flag: Qt.KeyboardModifier) -> bool:
+    return bool(int(modifiers) & flag.value)
+
+
+class MultiCaretController(QObject):
+    """
+    Extra carets and column selections, for the TextArea and the large-file view.
+
+    While there is more than one selection, keys come here (`handle_key`):
+    an edit is planned for every caret at once and applied to the Document
+    as one batch, so listeners hear about it once and it is a single undo
+    step. The TextArea then mirrors the batch caret by caret inside one edit
+    block (its own undo entry); the large-file view reads the Document
+    directly and undoes through `doc.undo`.
+
+    Offsets are code points here; the TextArea counts UTF-16 units, so its
+    positions are converted on the way in and out (the large-file view
+    already speaks Python offsets).
+    """
+
+    activeChanged = Signal()
+    caretsChanged = Signal()
+    visibleCaretsChanged = Signal()
+    statusMessage = Signal(str)
+    # a batch is waiting for the TextArea: QML calls apply_to_editor()
+    editorEditsReady = Signal()
+    # the view should put its own selection here: (anchor, caret)
+    primaryMoved = Signal(int, int)
+    # the document was changed from here
+    edited = Signal()
+
+    def __init__(self, primary: Callable[[], Selection], parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        # the view's own selection, used when extra carets are first added
+        self._view_selection = primary
+        self._doc: Document | None = None
+        # large-file view: Python owns the text and the undo history
+        self._owns_undo = False
+        self._sels: List[Selection] = []
+        self._ends: List[int] = []
+        self._primary = 0
+        self._revision = 0
+        self._applying = False
+        # the last batch for the TextArea, in its offsets
+        self._pending: List[Replacement] | None = None
+        self._viewport = (0, 0)
+        self._visible: list[dict] = []
+
+    # ---------- document ----------
+    def set_document(self, doc: Document | None, owns_undo: bool) -> None:
+        if doc is self._doc and owns_undo == self._owns_undo:
+            return
+        self._owns_undo = owns_undo
+        if self._doc is not None:
+            self._doc.remove_listener(self._on_doc_edit)
+        self._doc = doc
+        if doc is not None:
+            doc.add_listener(self._on_doc_edit)
+        self._pending = None
+        self._set([], 0)
+
+    def _on_doc_edit(self, doc: Document, edit: TextEdit) -> None:
+        # typing elsewhere, undo, a formatter…: the carets no longer mean anything
+        if not self._applying and self._sels:
+            self._set([], 0)
+
+    # ---------- view offsets ----------
+    def _to_view(self, pos: int) -> int:
+        if self._owns_undo or self._doc is None:
+            return pos
+        return self._doc.utf16().to_utf16(pos)
+
+    def _from_view(self, pos: int) -> int:
+        if self._owns_undo or self._doc is None:
+            return pos
+        return self._doc.utf16().from_utf16(pos)
+
+    def _move_primary(self, sel: Selection) -> None:
+        self.primaryMoved.emit(self._to_view(sel[0]), self._to_view(sel[1]))
+
+    # ---------- state ----------
+    def get_active(self) -> bool:
+        return len(self._sels) > 1
+
+    active = Property(bool, get_active, notify=activeChanged)
+
+    def get_count(self) -> int:
+        return len(self._sels)
+
+    count = Property(int, get_count, notify=caretsChanged)
+
+    def get_revision(self) -> int:
+        return self._revision
+
+    # bumped whenever the carets change; the large-file rows re-ask on_line()
+    revision = Property(int, get_revision, notify=caretsChanged)
+
+    def _set(self, sels: List[Selection], primary: int) -> None:
+        was_active = self.get_active()
+        if len(sels) <= 1:
+            # back to one selection: the view takes it over
+            if sels:
+                self._move_primary(sels[0])
+            sels = []
+        self._sels = sels
+        self._ends = ends_of(sels)
+        self._primary = max(0, min(primary, len(sels) - 1))
+        self._revision += 1
+        self.caretsChanged.emit()
+        if was_active != self.get_active():
+            self.activeChanged.emit()
+        self._refresh_visible()
+
+    def _seeded(self) -> List[Selection]:
+        if self._sels:
+            return list(self._sels)
+        if self._doc is None:
+            return []
+        n = len(self._doc.text)
+        a, c = map(self._from_view, self._view_selection())
+        return [(max(0, min(a, n)), max(0, min(c, n)))]
+
+    def _set_with_primary(self, sels: List[Selection], primary: Selection) -> None:
+        merged = merge_selections(sels)
+        lo = min(primary)
+        at = next((i for i, s in enumerate(merged) if min(s) <= lo <= max(s)), len(merged) - 1)
+        self._set(merged, at)
+        if self.get_active():
+            self._move_primary(self._sels[self._primary])
+
+    # ---------- viewport (TextArea) ----------
+    @Slot(int, int)
+    def set_viewport(self, first_offset: int, last_offset: int) -> None:
+        self._viewport = (self._from_view(int(first_offset)), self._from_view(int(last_offset)))
+        self._refresh_visible()
+
+    def _refresh_visible(self) -> None:
+        rows: list[dict] = []
+        if self.get_active():
+            first, last = self._viewport
+            to_view = self._to_view
+            for i in between(self._sels, self._ends, first, last):
+                if i != self._primary:
+                    lo, hi = span(self._sels[i])
+                    rows.append({"start": to_view(lo), "end": to_view(hi), "caret": to_view(self._sels[i][1])})
+                    if len(rows) >= MAX_VISIBLE_CARETS:
+                        break
+        if rows == self._visible:
+            return
+        self._visible = rows
+        self.visibleCaretsChanged.emit()
+
+    def get_visible_carets(self) -> list:
+        return self._visible
+
+    # extra carets (not the view's own) in the TextArea's viewport, in its offsets
+    visibleCarets = Property("QVariantList", get_visible_carets, notify=visibleCaretsChanged)
+
+    @Slot(int, result="QVariantList")
+    def on_line(self, line: int) -> list:
+        """Extra carets on one line of the large-file view, as columns."""
+        doc = self._doc
+        if not self.get_active() or doc is None or not doc.has_line_index():
+            return []
+        idx = doc.line_index()
+        if line < 0 or line >= len(idx):
+            return []
+        start = idx.line_start(line)
+        end = start + idx.line_length(line)
+        out = []
+        for i in between(self._sels, self._ends, start, end):
+            if i != self._primary:
+                lo, hi = span(self._sels[i])
+                caret = self._sels[i][1]
+                out.append({
+                    "start": max(lo, start) - start,
+                    "end": min(hi, end) - start,
+                    "caret": caret - start if start <= caret <= end else -1,
+                })
+        return out
+
+    @Slot(int, int, result=int)
+    def offset(self, line: int, column: int) -> int:
+        """Offset of (line, column) in the large-file view."""
+        doc = self._doc
+        if doc is None:
+            return 0
+        idx = doc.line_index()
+        line = max(0, min(line, len(idx) - 1))
+        return idx.line_start(line) + max(0, min(column, idx.line_length(line)))
+
+    # ---------- adding carets ----------
+    @Slot(int)
+    def add_caret(self, pos: int) -> None:
+        sels = self._seeded()
+        if not sels:
+            return
+        pos = max(0, min(self._from_view(pos), len(self._doc.text)))
+        self._set_with_primary(sels + [(pos, pos)], (pos, pos))
+
+    @Slot(int)
+    def add_caret_line(self, step: int) -> None:
+        """A caret `step` lines above/below the primary one, at its column."""
+        sels = self._seeded()
+        if not sels:
+            return
+        primary = self._primary_of(sels)
+        pos = caret_on_line(self._doc.line_index(), primary[1], step)
+        if pos is not None:
+            self._set_with_primary(sels + [(pos, pos)], (pos, pos))
+
+    @Slot(int, int)
+    def column_select(self, anchor: int, caret: int) -> None:
+        """Rectangular selection between two offsets: one selection per line."""
+        doc = self._doc
+        if doc is None:
+            return
+        n = len(doc.text)
+        anchor, caret = self._from_view(anchor), self._from_view(caret)
+        anchor, caret = max(0, min(anchor, n)), max(0, min(caret, n))
+        sels = column_selections(doc.line_index(), anchor, caret)
+        self._set(sels, len(sels) - 1 if caret >= anchor else 0)
+        if self.get_active():
+            self._move_primary(self._sels[self._primary])
+
+    def _primary_of(self, sels: List[Selection]) -> Selection:
+        return sels[self._primary] if self._sels else sels[0]
+
+    def _word_at(self, pos: int) -> Selection | None:
+        text = self._doc.text
+        for m in _WORD.finditer(text, max(0, pos - 100), min(len(text), pos + 100)):
+            if m.start() <= pos <= m.end():
+                return m.start(), m.end()
+        return None
+
+    @Slot()
+    def select_all_occurrences(self) -> None:
+        """Select every match of the primary selection (or of the word at the caret)."""
+        sels = self._seeded()
+        if not sels:
+            return
+        primary = self._primary_of(sels)
+        if min(primary) == max(primary):
+            primary = self._word_at(primary[1])
+            if primary is None:
+                return
+        lo, hi = span(primary)
+        matches = occurrences(self._doc.text, self._doc.text[lo:hi], MAX_CARETS)
+        self._set_with_primary(matches, primary)
+        more = " (limit reached)" if len(matches) >= MAX_CARETS else ""
+        self.statusMessage.emit(f"{len(matches):,} occurrences selected{more}")
+
+    @Slot()
+    def add_next_occurrence(self) -> None:
+        """Add the next match of the primary selection; with a bare caret, select its word first."""
+        sels = self._seeded()
+        if not sels:
+            return
+        primary = self._primary_of(sels)
+        if min(primary) == max(primary):
+            word = self._word_at(primary[1])
+            if word is None:
+                return
+            if self._sels:
+                self._set_with_primary([s for s in sels if s != primary] + [word], word)
+            else:
+                self._move_primary(word)
+            return
+        lo, hi = span(primary)
+        found = next_occurrence(self._doc.text, self._doc.text[lo:hi], hi, sels)
+        if found is None:
+            self.statusMessage.emit("No more occurrences")
+            return
+        self._set_with_primary(sels + [found], found)
+
+    @Slot()
+    def clear(self) -> None:
+        if self._sels:
+            self._set([self._sels[self._primary]], 0)
+
+    # ---------- editing ----------
+    def _apply(self, edits: List[Replacement], carets: List[Selection], typing: bool = False) -> None:
+        doc = self._doc
+        primary = min(self._primary, len(carets) - 1)
+        if edits:
+            before = self._sels[self._primary][1]
+            if not self._owns_undo:
+                # where the TextArea, still holding the old text, has them
+                units = doc.utf16()
+                self._pending = (
+                    [(units.to_utf16(a), units.to_utf16(b), t) for a, b, t in edits] if units else edits
+                )
+            self._applying = True
+            try:
+                if self._owns_undo and doc.undo is not None:
+                    doc.undo.push(doc.apply_edits(edits), before, carets[primary][1], typing)
+                else:
+                    doc.replace_ranges(edits)
+            finally:
+                self._applying = False
+            if not self._owns_undo:
+                self.editorEditsReady.emit()
+            self.edited.emit()
+        self._set(carets, primary)
+        if self.get_active():
+            self._move_primary(self._sels[self._primary])
+
+    @Slot(QQuickTextDocument)
+    def apply_to_editor(self, document: QQuickTextDocument) -> None:
+        """Mirror the last batch in the TextArea, in one edit block (one undo step there)."""
+        pending, self._pending = self._pending, None
+        if pending is None:
+            return
+        text_doc = document.textDocument()
+        cursor = QTextCursor(text_doc)
+        # the block also means one relayout; re-inserting the whole span
+        # instead would copy everything between the first caret and the last
+        cursor.beginEditBlock()
+        set_position, insert = cursor.setPosition, cursor.insertText
+        # last first, so the offsets of the others still hold
+        for start, end, inserted in reversed(pending):
+            set_position(start)
+            if end != start:
+                set_position(end, QTextCursor.KeepAnchor)
+            insert(inserted)
+        cursor.endEditBlock()
+        # the TextArea's text is written back to the document on its next
+        # edit, so a mirror that went wrong must not survive; comparing
+        # lengths catches it without copying the text out
+        doc = self._doc
+        if doc is not None and text_doc.characterCount() - 1 != doc.utf16().to_utf16(len(doc.text)):
+            cursor.select(QTextCursor.Document)
+            cursor.insertText(doc.text)
+            self.statusMessage.emit("Editor text was out of step and has been reloaded")
+
+    @Slot(str)
+    def insert_text(self, text: str) -> None:
+        if not self.get_active() or not text:
+            return
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        self._insert([text] * len(self._sels), typing=len(text) == 1)
+
+    def _insert(self, texts: Sequence[str], typing: bool = False) -> None:
+        edits, carets = replace_selections(self._sels, texts)
+        self._apply(edits, carets, typing)
+
+    @Slot(bool)
+    def delete(self, forward: bool) -> None:
+        if self.get_active():
+            edits, carets = delete_at_selections(self._sels, len(self._doc.text), forward)
+            self._apply(edits, carets)
+
+    @Slot(str, bool)
+    def move(self, kind: str, extend: bool) -> None:
+        if self.get_active():
+            doc = self._doc
+            sels = move_selections(doc.text, doc.line_index(), self._sels, kind, extend)
+            self._set(sels, min(self._primary, len(sels) - 1))
+            if self.get_active():
+                self._move_primary(self._sels[self._primary])
+
+    def _selected_texts(self) -> List[str]:
+        text = self._doc.text
+        return [text[lo:hi] for lo, hi in map(span, self._sels)]
+
+    @Slot()
+    def copy(self) -> None:
+        if self.get_active():
+            QGuiApplication.clipboard().setText("\n".join(self._selected_texts()))
+
+    @Slot()
+    def cut(self) -> None:
+        if self.get_active():
+            self.copy()
+            self._insert([""] * len(self._sels))
+
+    @Slot()
+    def paste(self) -> None:
+        if not self.get_active():
+            return
+        text = QGuiApplication.clipboard().text().replace("\r\n", "\n").replace("\r", "\n")
+        lines = text.split("\n")
+        # one line per caret when the clipboard has exactly as many lines
+        if len(lines) == len(self._sels) and len(lines) > 1:
+            self._insert(lines)
+        elif text:
+            self._insert([text] * len(self._sels))
+
+    @Slot(int, int, str, result=bool)
+    def handle_key(self, key: int, modifiers: int, text: str) -> bool:
+        """A key press while several carets are active; False leaves it to the view."""
+        if not self.get_active():
+            return False
+        shift = _mod(modifiers, Qt.ShiftModifier)
+        ctrl = _mod(modifiers, Qt.ControlModifier)
+        alt = _mod(modifiers, Qt.AltModifier)
+
+        if key == Qt.Key_Escape:
+            self.clear()
+        elif key in _MOVES and not ctrl and not alt:
+            self.move(_MOVES[key], shift)
+        elif key == Qt.Key_Backspace:
+            self.delete(False)
+        elif key == Qt.Key_Delete:
+            self.delete(True)
+        elif key in (Qt.Key_Return, Qt.Key_Enter):
+            self.insert_text("\n")
+        elif key == Qt.Key_Tab and not (shift or ctrl or alt):
+            self.insert_text("    ")
+        elif ctrl and key == Qt.Key_C:
+            self.copy()
+        elif ctrl and key == Qt.Key_X:
+            self.cut()
+        elif ctrl and key == Qt.Key_V:
+            self.paste()
+        elif ctrl and key in (Qt.Key_A, Qt.Key_Z, Qt.Key_Y):
+            # select all / undo / redo are the view's; back to one caret first
+            self.clear()
+            return False
+        elif not ctrl and text and text[0] >= " ":
+            self.insert_text(text)
+        else:
+            return False
+        return True
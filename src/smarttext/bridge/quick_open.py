@@ -0,0 +1,464 @@
+from __future__ import annotations
+
+import json
+import os
+import tempfile
+from pathlib import Path
+from typing import Any, Dict, List
+
+from PySide6.QtCore import (
+    QAbstractListModel,
+    QFileSystemWatcher,
+    QModelIndex,
+    QObject,
+    Property,
+    QStandardPaths,
+    Qt,
+    QThreadPool,
+    QUrl,
+    Signal,
+    Slot,
+)
+
+from ..core.fuzzy_index import FuzzyIndex, fuzzy_score
+from .workers import run_in_background
+
+# directories never worth indexing
+_SKIP_DIRS = {".git", ".hg", ".svn", "node_modules", "__pycache__", ".venv", "venv", ".tox", ".mypy_cache"}
+_MAX_RECENT = 200
+_MAX_WATCHED = 2000
+_MAX_RESULTS = 50
+
+
+def _app_data_dir() -> Path:
+    base = QStandardPaths.writableLocation(QStandardPaths.AppDataLocation)
+    p = Path(base)
+    p.mkdir(parents=True, exist_ok=True)
+    return p
+
+
+def _walk(root: str) -> Dict[str, List[str]]:
+    """Map every directory under `root` to the file names it contains."""
+    out: Dict[str, List[str]] = {}
+    stack = [root]
+    while stack:
+        d = stack.pop()
+        files: List[str] = []
+        try:
+            with os.scandir(d) as it:
+                for e in it:
+                    try:
+                        if e.is_dir(follow_symlinks=False):
+                            if e.name not in _SKIP_DIRS and not e.name.startswith("."):
+                                stack.append(e.path)
+                        elif e.is_file():
+                            files.append(e.name)
+                    except OSError:
+                        continue
+        except OSError:
+            continue
+        out[d] = files
+    return out
+
+
+def _replace_file(path: Path, text: str) -> bool:
+    """Write `path` whole through a temporary file, so a crash never leaves half of it."""
+    tmp = None
+    try:
+        fd, tmp = tempfile.mkstemp(prefix=".quickOpen-", suffix=".tmp", dir=path.parent)
+        with os.fdopen(fd, "w", encoding="utf-8") as f:
+            f.write(text)
+        os.replace(tmp, path)
+    except OSError:
+        if tmp is not None:
+            try:
+                os.unlink(tmp)
+            except OSError:
+                pass
+        return False
+    return True
+
+
+def _rank(query: str, recent: List[str], index: FuzzyIndex) -> List[tuple[str, bool]]:
+    """Result rows for a (lowercase, space-free) query."""
+    if not query:
+        return [(p, True) for p in recent[:_MAX_RESULTS]]
+    # recent files win ties against project files
+    ranked = [(fuzzy_score(query, p) * 1.5, p, True) for p in recent]
+    ranked = [r for r in ranked if r[0] > 0]
+    ranked += [(s, p, False) for s, p in index.search(query, _MAX_RESULTS)]
+    ranked.sort(key=lambda r: r[0], reverse=True)
+    rows: List[tuple[str, bool]] = []
+    seen: set[str] = set()
+    for _s, p, is_recent in ranked:
+        if p in seen:
+            continue
+        seen.add(p)
+        rows.append((p, is_recent))
+        if len(rows) >= _MAX_RESULTS:
+            break
+    return rows
+
+
+def _dirs_from_paths(paths: List[str]) -> Dict[str, List[str]]:
+    out: Dict[str, List[str]] = {}
+    for p in paths:
+        d, name = os.path.split(p)
+        out.setdefault(d, []).append(name)
+    return out
+
+
+class QuickOpenModel(QAbstractListModel):
+    NameRole = Qt.UserRole + 1
+    PathRole = Qt.UserRole + 2
+    FolderRole = Qt.UserRole + 3
+    RecentRole = Qt.UserRole + 4
+
+    def __init__(self) -> None:
+        super().__init__()
+        self._rows: List[tuple[str, bool]] = []
+        self._root = ""
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        return 0 if parent.isValid() else len(self._rows)
+
+    def data(self, index: QModelIndex, role: int):
+        if not index.isValid():
+            return None
+        i = index.row()
+        if i < 0 or i >= len(self._rows):
+            return None
+        path, recent = self._rows[i]
+        if role == self.NameRole:
+            return os.path.basename(path)
+        if role == self.PathRole:
+            return path
+        if role == self.FolderRole:
+            folder = os.path.dirname(path)
+            if self._root and folder.startswith(self._root):
+                folder = os.path.relpath(folder, self._root)
+            return folder
+        if role == self.RecentRole:
+            return recent
+        return None
+
+    def roleNames(self):
+        return {
+            self.NameRole: b"name",
+            self.PathRole: b"path",
+            self.FolderRole: b"folder",
+            self.RecentRole: b"recent",
+        }
+
+    def set_rows(self, rows: List[tuple[str, bool]], root: str) -> None:
+        self.beginResetModel()
+        self._rows = rows
+        self._root = root
+        self.endResetModel()
+
+    def path_at(self, row: int) -> str | None:
+        if row < 0 or row >= len(self._rows):
+            return None
+        return self._rows[row][0]
+
+
+class QuickOpen(QObject):
+    """
+    Fuzzy quick-open over recently opened files and the files of a project root.
+
+    The project index is built (or refreshed) on a worker thread, patched from
+    QFileSystemWatcher events, and persisted next to `session.json` so the
+    palette is usable right after startup.
+
+    Queries run on a thread of their own, one at a time; results for a query
+    that has been typed over are dropped. The file is written by one writer
+    thread, which skips any write a newer one has superseded.
+    """
+
+    projectRootChanged = Signal()
+    indexingChanged = Signal()
+    indexedCountChanged = Signal()
+    openRequested = Signal(str)
+
+    def __init__(self, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._path = _app_data_dir() / "quickOpen.json"
+        self._results = QuickOpenModel()
+        self._recent: List[str] = []
+        self._root = ""
+        self._index = FuzzyIndex()
+        self._dirs: Dict[str, List[str]] = {}
+        self._indexing = False
+        self._generation = 0
+        self._dirty = False
+        self._last_query = ""
+        self._query_generation = 0
+        self._write_generation = 0
+
+        self._searcher = QThreadPool(self)
+        self._searcher.setMaxThreadCount(1)
+        self._writer = QThreadPool(self)
+        self._writer.setMaxThreadCount(1)
+
+        self._watcher = QFileSystemWatcher(self)
+        self._watcher.directoryChanged.connect(self._on_directory_changed)
+
+        self._load()
+
+    # ---------- persistence ----------
+    def _load(self) -> None:
+        if not self._path.exists():
+            return
+        try:
+            data = json.loads(self._path.read_text(encoding="utf-8"))
+        except Exception:
+            return
+        if not isinstance(data, dict):
+            return
+
+        self._recent = [str(p) for p in data.get("recent", [])][:_MAX_RECENT]
+        self._root = str(data.get("root") or "")
+        index_data = data.get("index")
+        if not self._root:
+            return
+        if not isinstance(index_data, dict):
+            self._rebuild()
+            return
+
+        # decoding a large index is not free; do it off the GUI thread, then
+        # re-walk the root to pick up anything that changed while we were closed
+        gen = self._begin_indexing()
+
+        def load() -> tuple[FuzzyIndex, Dict[str, List[str]]]:
+            idx = FuzzyIndex.from_dict(index_data)
+            return idx, _dirs_from_paths(idx.paths())
+
+        def done(result: tuple[FuzzyIndex, Dict[str, List[str]]]) -> None:
+            if gen != self._generation:
+                return
+            self._install(*result)
+            self._rebuild()
+
+        run_in_background(load, done, lambda _e: self._rebuild())
+
+    def _payload(self, root: str, index: FuzzyIndex, recent: List[str]) -> Dict[str, Any]:
+        return {
+            "version": 1,
+            "root": root or None,
+            "recent": recent,
+            "index": index.to_dict() if root else None,
+        }
+
+    def _write_text(self, text: str) -> None:
+        """Queue `text` for the writer thread."""
+        self._write_generation += 1
+        gen = self._write_generation
+        path = self._path
+
+        def write() -> bool:
+            # a newer snapshot is queued behind this one
+            return gen != self._write_generation or _replace_file(path, text)
+
+        def done(written: bool) -> None:
+            if not written:
+                self._dirty = True
+
+        run_in_background(write, done, pool=self._writer)
+
+    def save(self) -> None:
+        """Write what changed since the last write and wait for it (called on exit)."""
+        self._searcher.waitForDone()
+        if self._dirty:
+            self._dirty = False
+            self._write_text(json.dumps(self._payload(self._root, self._index, self._recent), ensure_ascii=False))
+        self._writer.waitForDone()
+
+    # ---------- index lifecycle ----------
+    def _begin_indexing(self) -> int:
+        self._generation += 1
+        if not self._indexing:
+            self._indexing = True
+            self.indexingChanged.emit()
+        return self._generation
+
+    def _rebuild(self) -> None:
+        if not self._root:
+            return
+        root = self._root
+        gen = self._begin_indexing()
+
+        recent = list(self._recent)
+
+        def build() -> tuple[FuzzyIndex, Dict[str, List[str]], str]:
+            dirs = _walk(root)
+            idx = FuzzyIndex(
+                os.path.join(d, name) for d, names in dirs.items() for name in names
+            )
+            # the fresh index isn't shared yet, so it can be serialized right here
+            text = json.dumps(self._payload(root, idx, recent), ensure_ascii=False)
+            return idx, dirs, text
+
+        def done(result: tuple[FuzzyIndex, Dict[str, List[str]], str]) -> None:
+            if gen != self._generation:
+                return
+            idx, dirs, text = result
+            self._write_text(text)
+            self._install(idx, dirs)
+            self._dirty = self._recent != recent
+            self._finish_indexing()
+
+        run_in_background(build, done, lambda _e: self._finish_indexing())
+
+    def _finish_indexing(self) -> None:
+        if self._indexing:
+            self._indexing = False
+            self.indexingChanged.emit()
+
+    def _install(self, index: FuzzyIndex, dirs: Dict[str, List[str]]) -> None:
+        self._index = index
+        self._dirs = dirs
+
+        old = self._watcher.directories()
+        if old:
+            self._watcher.removePaths(old)
+        # shallowest directories first: that's where files are usually created
+        watch = sorted(dirs, key=lambda d: d.count(os.sep))[:_MAX_WATCHED]
+        if watch:
+            self._watcher.addPaths(watch)
+
+        self.indexedCountChanged.emit()
+        if self._last_query:
+            self.search(self._last_query)
+
+    @Slot(str)
+    def _on_directory_changed(self, d: str) -> None:
+        before = set(self._dirs.get(d, []))
+        if not os.path.isdir(d):
+            for name in before:
+                self._index.remove(os.path.join(d, name))
+            self._index.remove_prefix(d + os.sep)
+            self._dirs = {k: v for k, v in self._dirs.items() if k != d and not k.startswith(d + os.sep)}
+            self._dirty = True
+            self.indexedCountChanged.emit()
+            return
+
+        now: set[str] = set()
+        new_dirs: List[str] = []
+        try:
+            with os.scandir(d) as it:
+                for e in it:
+                    try:
+                        if e.is_file():
+                            now.add(e.name)
+                        elif (
+                            e.is_dir(follow_symlinks=False)
+                            and e.path not in self._dirs
+                            and e.name not in _SKIP_DIRS
+                            and not e.name.startswith(".")
+                        ):
+                            new_dirs.append(e.path)
+                    except OSError:
+                        continue
+        except OSError:
+            return
+
+        for name in before - now:
+            self._index.remove(os.path.join(d, name))
+        for name in now - before:
+            self._index.add(os.path.join(d, name))
+        self._dirs[d] = sorted(now)
+
+        for nd in new_dirs:
+            self._index_subtree(nd)
+
+        self._dirty = True
+        self.indexedCountChanged.emit()
+
+    def _index_subtree(self, d: str) -> None:
+        gen = self._generation
+
+        def done(dirs: Dict[str, List[str]]) -> None:
+            if gen != self._generation:
+                return
+            for sub, names in dirs.items():
+                self._dirs[sub] = names
+                for name in names:
+                    self._index.add(os.path.join(sub, name))
+            room = _MAX_WATCHED - len(self._watcher.directories())
+            if room > 0:
+                self._watcher.addPaths(list(dirs)[:room])
+            self._dirty = True
+            self.indexedCountChanged.emit()
+
+        run_in_background(lambda: _walk(d), done)
+
+    # ---------- recent ----------
+    def note_recent(self, path: Path) -> None:
+        p = str(path)
+        if p in self._recent:
+            self._recent.remove(p)
+        self._recent.insert(0, p)
+        del self._recent[_MAX_RECENT:]
+        self._dirty = True
+
+    # ---------- exposed to QML ----------
+    def get_results(self) -> QObject:
+        return self._results
+
+    results = Property(QObject, get_results, constant=True)
+
+    def get_project_root(self) -> str:
+        return self._root
+
+    projectRoot = Property(str, get_project_root, notify=projectRootChanged)
+
+    def get_indexing(self) -> bool:
+        return self._indexing
+
+    indexing = Property(bool, get_indexing, notify=indexingChanged)
+
+    def get_indexed_count(self) -> int:
+        return len(self._index)
+
+    indexedCount = Property(int, get_indexed_count, notify=indexedCountChanged)
+
+    @Slot(str)
+    def set_project_root(self, folder_url_or_path: str) -> None:
+        if folder_url_or_path.startswith("file:"):
+            folder_url_or_path = QUrl(folder_url_or_path).toLocalFile()
+        root = os.path.abspath(folder_url_or_path) if folder_url_or_path else ""
+        if root == self._root:
+            return
+        self._root = root
+        self._install(FuzzyIndex(), {})
+        self._dirty = True
+        self.projectRootChanged.emit()
+        self._rebuild()
+
+    @Slot(str)
+    def search(self, query: str) -> None:
+        self._last_query = query
+        self._query_generation += 1
+        gen = self._query_generation
+        q = "".join(query.lower().split())
+        recent = list(self._recent)
+        if not q:
+            self._results.set_rows(_rank(q, recent, self._index), self._root)
+            return
+        index = self._index
+
+        def rank() -> List[tuple[str, bool]] | None:
+            # queued behind a query that was typed over: skip it
+            return _rank(q, recent, index) if gen == self._query_generation else None
+
+        def done(rows: List[tuple[str, bool]] | None) -> None:
+            if rows is not None and gen == self._query_generation:
+                self._results.set_rows(rows, self._root)
+
+        run_in_background(rank, done, pool=self._searcher)
+
+    @Slot(int)
+    def activate(self, row: int) -> None:
+        path = self._results.path_at(row)
+        if path:
+            self.openRequested.emit(path)
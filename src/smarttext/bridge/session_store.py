@@ -7,6 +7,7 @@ from typing import Any, Dict, List
 from PySide6.QtCore import QObject, QStandardPaths
 
 from ..core.document import Document
+from ..core.hex_dump import HexFile
 
 
 def _app_data_dir() -> Path:
@@ -33,6 +34,7 @@ class SessionStore(QObject):
                     "modified": doc.modified,
                     "cursorPos": doc.cursor_pos,
                     "scrollY": doc.scroll_y,
+                    "binary": doc.binary is not None,
                 }
                 for doc in docs
             ],
@@ -56,6 +58,16 @@ class SessionStore(QObject):
         docs: list[Document] = []
 
         for t in data.get("tabs", []):
+            if t.get("binary"):
+                # reopened from disk; a binary that is gone is dropped
+                try:
+                    doc = Document(path=Path(t["path"]))
+                    doc.binary = HexFile(doc.path)
+                except (KeyError, TypeError, OSError, ValueError):
+                    continue
+                docs.append(doc)
+                continue
+
             text = t.get("text", "")
 
             pos = int(t.get("cursorPos", 0))
@@ -0,0 +1,508 @@
+from __future__ import annotations
+
+from bisect import bisect_right
+from typing import List, Tuple
+
+from PySide6.QtCore import QObject, Property, QTimer, Signal, Slot
+from PySide6.QtQuick import QQuickTextDocument
+
+from ..core.document import Document, TextEdit
+from ..core.line_index import LineIndex
+from ..core.structure import Folds, Language, StructureIndex
+from .workers import run_in_background
+
+# documents longer than this are indexed on the thread pool
+SYNC_BUILD_CHARS = 1 << 20
+# edits inserting more than this rebuild the index instead of repairing it
+REBUILD_EDIT_CHARS = 1 << 20
+# quiet period before a document whose index had to be dropped is rebuilt
+REBUILD_DELAY_MS = 300
+# fold markers are sent to QML for the visible lines only, and never more than this
+MAX_FOLD_MARKERS = 500
+
+
+def _shift_runs(runs: List[Tuple[int, int]], first: int, last: int, delta: int) -> List[Tuple[int, int]]:
+    """Line runs after lines [first, last] were replaced; runs touching them grow to cover the edit."""
+    out = []
+    for a, b in runs:
+        if b < first:
+            out.append((a, b))
+        elif a > last:
+            out.append((a + delta, b + delta))
+        else:
+            out.append((min(a, first), max(b + delta, last + delta, first)))
+    return out
+
+
+def structure_ready(doc: Document) -> bool:
+    """Whether `doc` has a structure index in step with its line index."""
+    return (
+        doc.structure is not None and doc.has_line_index()
+        and len(doc.structure) == len(doc.line_index())
+    )
+
+
+def fold_state(doc: Document, line: int) -> str:
+    """"folded", "open" (a region can be folded here) or "" for one line of `doc`."""
+    if doc.folds is not None and doc.folds.is_folded(line):
+        return "folded"
+    if structure_ready(doc) and doc.structure.fold_start(doc.text, doc.line_index(), line):
+        return "open"
+    return ""
+
+
+class StructureController(QObject):
+    """
+    Code folding and bracket matching for documents of a known language.
+
+    Each such document carries a StructureIndex (brackets per line, outside
+    strings and comments), built once and repaired from edit deltas, and a
+    Folds set of collapsed regions. The large-file view leaves folded lines
+    out of its model; the TextArea hides their text blocks, which drops them
+    from its layout.
+
+    The TextArea counts offsets in UTF-16 units, the index in code points:
+    with `utf16` set, offsets to and from the view are converted.
+    """
+
+    activeChanged = Signal()
+    # rows of the large-file view are about to go (removed) or come back
+    # (added), starting at `row`; row -1 means they may all change
+    foldsAboutToChange = Signal(int, int, int)
+    foldsChanged = Signal()
+    markersChanged = Signal()
+    bracketsChanged = Signal()
+    # brackets or fold regions moved; per-line views re-query them
+    structureUpdated = Signal()
+    # the view should put its caret at this offset
+    moveCaret = Signal(int)
+    statusMessage = Signal(str)
+
+    def __init__(self, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._doc: Document | None = None
+        self._language: Language | None = None
+        self._utf16 = False
+        # what each open document should be indexed as, by id; closed ones are
+        # dropped in forget_document
+        self._languages: dict[int, Language] = {}
+        self._building: set[int] = set()
+        self._stale: list[Document] = []
+        # in the view's offsets: it may arrive before the edit that moved it
+        self._caret = 0
+        self._viewport = (0, 0)
+        self._markers: list[dict] = []
+        self._brackets: list[dict] = []
+        # line runs hidden in the TextArea's text blocks right now
+        self._editor_runs: List[Tuple[int, int]] = []
+
+        self._rebuild_timer = QTimer(self)
+        self._rebuild_timer.setSingleShot(True)
+        self._rebuild_timer.setInterval(REBUILD_DELAY_MS)
+        self._rebuild_timer.timeout.connect(self._rebuild_stale)
+
+        # views hear of an edit only after every document listener has run
+        # (the large-file model moves its rows in one), and the caret usually
+        # moves just before the edit that moved it reaches the document
+        self._dirty = False
+        self._refresh_timer = QTimer(self)
+        self._refresh_timer.setSingleShot(True)
+        self._refresh_timer.setInterval(0)
+        self._refresh_timer.timeout.connect(self._refresh)
+
+    # ---------- document ----------
+    def set_document(self, doc: Document | None, language: Language | None, utf16: bool) -> None:
+        if doc is self._doc and language == self._language and utf16 == self._utf16:
+            return
+        was_active = self.get_active()
+        # another document is reloaded by the views anyway; a new language for
+        # this one may drop its folds
+        same = doc is self._doc
+        if same:
+            self.foldsAboutToChange.emit(-1, 0, 0)
+        else:
+            self._editor_runs = []
+        self._doc = doc
+        self._language = language
+        self._utf16 = utf16
+        if doc is not None:
+            doc.add_listener(self._on_doc_edit)
+            if language is None:
+                self._languages.pop(id(doc), None)
+                doc.structure = None
+                if doc.folds is not None:
+                    doc.folds.clear()
+            else:
+                self._languages[id(doc)] = language
+                if doc.structure is None or doc.structure.language != language:
+                    self._build(doc)
+        if same:
+            self.foldsChanged.emit()
+        if was_active != self.get_active():
+            self.activeChanged.emit()
+        self._updated()
+
+    def forget_document(self, doc: Document) -> None:
+        """Drop what is kept for a closed document so its id can be reused."""
+        doc.remove_listener(self._on_doc_edit)
+        self._languages.pop(id(doc), None)
+        self._stale = [d for d in self._stale if d is not doc]
+        # a build still running holds on to the document; it clears its own mark
+
+    def document(self) -> Document | None:
+        return self._doc
+
+    def get_active(self) -> bool:
+        return self._doc is not None and self._language is not None
+
+    # folding applies to the current document (its index may still be building)
+    active = Property(bool, get_active, notify=activeChanged)
+
+    def _on_doc_edit(self, doc: Document, edit: TextEdit) -> None:
+        if id(doc) not in self._languages:
+            return
+        if not doc.has_line_index():
+            # only while the large-file view indexes lines off-thread
+            doc.structure = None
+            self._schedule_rebuild(doc)
+            return
+        idx = doc.line_index()
+        first = idx.line_of(edit.start)
+        old_count = edit.removed.count("\n") + 1
+        new_count = edit.inserted.count("\n") + 1
+        if doc.folds is not None:
+            doc.folds.on_edit(doc.revision, first, old_count, new_count)
+        index = doc.structure
+        if index is not None:
+            if len(edit.inserted) > REBUILD_EDIT_CHARS or not index.on_edit(
+                doc.text, idx, first, old_count, new_count
+            ):
+                doc.structure = None
+                self._schedule_rebuild(doc)
+        elif id(doc) in self._building:
+            self._schedule_rebuild(doc)
+        if doc is self._doc:
+            self._editor_runs = _shift_runs(
+                self._editor_runs, first, first + old_count - 1, new_count - old_count
+            )
+            if doc.folds is not None and doc.folds.dropped == doc.revision:
+                self.foldsChanged.emit()
+            self._updated()
+
+    def _schedule_rebuild(self, doc: Document) -> None:
+        if not any(d is doc for d in self._stale):
+            self._stale.append(doc)
+        self._rebuild_timer.start()
+
+    def _rebuild_stale(self) -> None:
+        stale, self._stale = self._stale, []
+        for doc in stale:
+            if id(doc) in self._languages:
+                self._build(doc)
+
+    def _build(self, doc: Document) -> None:
+        language = self._languages[id(doc)]
+        doc.structure = None
+        if len(doc.text) <= SYNC_BUILD_CHARS:
+            doc.line_index()
+            doc.structure = StructureIndex.build(doc.text, language)
+            return
+        if id(doc) in self._building:
+            return
+        self._building.add(id(doc))
+        if doc.has_line_index():
+            snapshot, revision = doc.text, doc.revision
+            build_rev = None
+        else:
+            snapshot, revision = doc.begin_line_index_build()
+            build_rev = revision
+
+        def work():
+            idx = LineIndex.from_text(snapshot) if build_rev is not None else None
+            return idx, StructureIndex.build(snapshot, language)
+
+        def done(result) -> None:
+            self._building.discard(id(doc))
+            idx, index = result
+            if idx is not None:
+                doc.finish_line_index_build(idx, build_rev)
+            if self._languages.get(id(doc)) != language:
+                return
+            if doc.revision != revision:
+                # edited while indexing; try again once typing settles
+                self._schedule_rebuild(doc)
+                return
+            doc.structure = index
+            if doc is self._doc:
+                self._updated()
+
+        def failed(exc: BaseException) -> None:
+            self._building.discard(id(doc))
+            self.statusMessage.emit(f"Indexing brackets failed: {exc}")
+
+        run_in_background(work, done, failed)
+
+    def _updated(self) -> None:
+        self._dirty = True
+        self._refresh_timer.start()
+
+    def _refresh(self) -> None:
+        if self._dirty:
+            self._dirty = False
+            self.structureUpdated.emit()
+            self._refresh_markers()
+        self._refresh_brackets()
+
+    def _ready(self) -> bool:
+        return self._doc is not None and structure_ready(self._doc)
+
+    def _to_view(self, pos: int) -> int:
+        return self._doc.utf16().to_utf16(pos) if self._utf16 else pos
+
+    def _from_view(self, pos: int) -> int:
+        return self._doc.utf16().from_utf16(pos) if self._utf16 else pos
+
+    # ---------- folding ----------
+    def _folds(self) -> Folds:
+        if self._doc.folds is None:
+            self._doc.folds = Folds()
+        return self._doc.folds
+
+    @Slot(int, result=bool)
+    def toggle_fold(self, line: int) -> bool:
+        """Fold or unfold the region starting at `line`; False if none starts there."""
+        if self._doc is None:
+            return False
+        if self._doc.folds is not None and self._doc.folds.is_folded(line):
+            self._unfold(line)
+            return True
+        return self._fold(line)
+
+    def _fold(self, line: int) -> bool:
+        if not self._ready():
+            return False
+        doc = self._doc
+        end = doc.structure.fold_end(doc.text, doc.line_index(), line)
+        if end is None:
+            return False
+        # a caret inside the region goes to the end of its header (before
+        # folding, or it would open the region again)
+        idx = doc.line_index()
+        if line < self._caret_line() <= end:
+            self.moveCaret.emit(self._to_view(idx.line_end(line)))
+        folds = self._folds()
+        row, count = folds.rows_hidden_by(line, end)
+        self.foldsAboutToChange.emit(row, count, 0)
+        folds.fold(line, end)
+        self.foldsChanged.emit()
+        self._refresh_markers()
+        return True
+
+    def _unfold(self, line: int) -> None:
+        folds = self._doc.folds
+        row, count = folds.rows_shown_by(line)
+        self.foldsAboutToChange.emit(row, 0, count)
+        folds.unfold(line)
+        self.foldsChanged.emit()
+        self._refresh_markers()
+
+    def _caret_pos(self) -> int:
+        return max(0, min(self._from_view(self._caret), len(self._doc.text)))
+
+    def _caret_line(self) -> int:
+        return self._doc.line_index().line_of(self._caret_pos())
+
+    @Slot()
+    def fold_at_caret(self) -> None:
+        """Fold the innermost region around the caret."""
+        if not self._ready():
+            return
+        doc = self._doc
+        idx = doc.line_index()
+        line = self._caret_line()
+        for start in range(line, -1, -1):
+            if doc.folds is not None and doc.folds.is_folded(start):
+                continue
+            if doc.structure.fold_start(doc.text, idx, start):
+                end = doc.structure.fold_end(doc.text, idx, start)
+                if end is not None and (start == line or end >= line) and self._fold(start):
+                    return
+        self.statusMessage.emit("Nothing to fold here")
+
+    @Slot()
+    def unfold_at_caret(self) -> None:
+        doc = self._doc
+        if doc is None or not doc.folds:
+            return
+        line = self._caret_line()
+        if doc.folds.is_folded(line):
+            self._unfold(line)
+
+    @Slot()
+    def fold_all(self) -> None:
+        """Fold every outermost region (nested ones stay open inside them)."""
+        if not self._ready():
+            return
+        doc = self._doc
+        idx = doc.line_index()
+        index = doc.structure
+        regions = []
+        line, n = 0, len(idx)
+        while line < n:
+            end = index.fold_end(doc.text, idx, line) if index.fold_start(doc.text, idx, line) else None
+            if end is not None:
+                regions.append((line, end))
+                line = end + 1
+            else:
+                line += 1
+        if not regions:
+            return
+        caret_line = self._caret_line()
+        for start, end in regions:
+            if start < caret_line <= end:
+                self.moveCaret.emit(self._to_view(idx.line_end(start)))
+        self.foldsAboutToChange.emit(-1, 0, 0)
+        folds = self._folds()
+        folds.clear()
+        for start, end in regions:
+            folds.fold(start, end)
+        self.foldsChanged.emit()
+        self._refresh_markers()
+        self.statusMessage.emit(f"{len(regions):,} regions folded")
+
+    @Slot()
+    def unfold_all(self) -> None:
+        doc = self._doc
+        if doc is None or not doc.folds:
+            return
+        self.foldsAboutToChange.emit(-1, 0, 0)
+        doc.folds.clear()
+        self.foldsChanged.emit()
+        self._refresh_markers()
+
+    def _reveal(self, line: int) -> None:
+        folds = self._doc.folds
+        for start, _end in folds.containing(line):
+            self._unfold(start)
+
+    # ---------- caret and brackets ----------
+    @Slot(int)
+    def set_caret(self, pos: int) -> None:
+        self._caret = int(pos)
+        doc = self._doc
+        if doc is not None and doc.folds and doc.has_line_index():
+            # a caret may not sit in hidden text: open what hides it
+            line = self._caret_line()
+            if doc.folds.is_hidden(line):
+                self._reveal(line)
+        self._refresh_timer.start()
+
+    def _refresh_brackets(self) -> None:
+        brackets: list[dict] = []
+        doc = self._doc
+        if self._ready():
+            idx = doc.line_index()
+            pos = self._caret_pos()
+            line = idx.line_of(pos)
+            column = pos - idx.line_start(line)
+            # the bracket after the caret wins over the one before it
+            pair = doc.structure.match(line, column) or (column > 0 and doc.structure.match(line, column - 1))
+            if pair:
+                a, b, ok = pair
+                brackets = [
+                    {"offset": self._to_view(idx.line_start(ln) + col), "line": ln, "column": col, "ok": ok}
+                    for ln, col in (a, b)
+                ]
+        if brackets == self._brackets:
+            return
+        self._brackets = brackets
+        self.bracketsChanged.emit()
+
+    def get_brackets(self) -> list:
+        return self._brackets
+
+    # the bracket at the caret and its partner (empty when there is no pair)
+    brackets = Property("QVariantList", get_brackets, notify=bracketsChanged)
+
+    @Slot()
+    def jump_to_bracket(self) -> None:
+        self._refresh_brackets()
+        if not self._brackets:
+            self.statusMessage.emit("No matching bracket here")
+            return
+        a, b = self._brackets
+        target = b if self._caret in (a["offset"], a["offset"] + 1) else a
+        self.moveCaret.emit(target["offset"])
+
+    # ---------- TextArea ----------
+    @Slot(int, int)
+    def set_viewport(self, first_offset: int, last_offset: int) -> None:
+        self._viewport = (int(first_offset), int(last_offset))
+        self._refresh_markers()
+
+    def _refresh_markers(self) -> None:
+        markers: list[dict] = []
+        doc = self._doc
+        if self._ready():
+            idx = doc.line_index()
+            n = len(doc.text)
+            first = idx.line_of(max(0, min(self._from_view(self._viewport[0]), n)))
+            last = idx.line_of(max(0, min(self._from_view(self._viewport[1]), n)))
+            folds = doc.folds if doc.folds is not None else Folds()
+            for line in folds.visible_lines(first, last):
+                state = fold_state(doc, line)
+                if state:
+                    markers.append({
+                        "line": line,
+                        "start": self._to_view(idx.line_start(line)),
+                        "end": self._to_view(idx.line_end(line)),
+                        "folded": state == "folded",
+                    })
+                    if len(markers) >= MAX_FOLD_MARKERS:
+                        break
+        if markers == self._markers:
+            return
+        self._markers = markers
+        self.markersChanged.emit()
+
+    def get_markers(self) -> list:
+        return self._markers
+
+    # fold toggles for the TextArea's visible lines
+    markers = Property("QVariantList", get_markers, notify=markersChanged)
+
+    @Slot(QQuickTextDocument, bool, result=bool)
+    def apply_to_editor(self, document: QQuickTextDocument, reloaded: bool) -> bool:
+        """
+        Hide the text blocks of folded lines (and show unfolded ones again).
+        `reloaded`: the TextArea just got new text, so every block is visible.
+        Returns whether anything changed; the TextArea then needs a relayout.
+        """
+        if reloaded:
+            self._editor_runs = []
+        doc = self._doc
+        want = doc.folds.runs() if doc is not None and doc.folds is not None else []
+        if want == self._editor_runs:
+            return False
+        text_doc = document.textDocument()
+        # every block whose visibility may differ, in order
+        spans = sorted(self._editor_runs + want)
+        merged: List[Tuple[int, int]] = []
+        for a, b in spans:
+            if merged and a <= merged[-1][1] + 1:
+                merged[-1] = (merged[-1][0], max(b, merged[-1][1]))
+            else:
+                merged.append((a, b))
+        firsts = [a for a, _ in want]
+        blocks = text_doc.blockCount()
+        for a, b in merged:
+            block = text_doc.findBlockByNumber(a)
+            for line in range(a, min(b, blocks - 1) + 1):
+                i = bisect_right(firsts, line) - 1
+                block.setVisible(i < 0 or line > want[i][1])
+                block = block.next()
+            start = text_doc.findBlockByNumber(a).position()
+            end_block = text_doc.findBlockByNumber(min(b, blocks - 1))
+            text_doc.markContentsDirty(start, end_block.position() + end_block.length() - start)
+        self._editor_runs = want
+        return True
@@ -1,5 +1,7 @@
 from __future__ import annotations
 
+from typing import Iterable
+
 from PySide6.QtCore import QAbstractListModel, QModelIndex, Qt
 
 from ..core.document import Document
@@ -53,6 +55,28 @@ class TabsModel(QAbstractListModel):
         self._docs.pop(row)
         self.endRemoveRows()
 
+    def remove_rows(self, rows: Iterable[int]) -> None:
+        """Remove several rows with one beginRemoveRows per contiguous run (last run first)."""
+        runs: list[list[int]] = []
+        for r in sorted({r for r in rows if 0 <= r < len(self._docs)}):
+            if runs and runs[-1][1] == r - 1:
+                runs[-1][1] = r
+            else:
+                runs.append([r, r])
+        for first, last in reversed(runs):
+            self.beginRemoveRows(QModelIndex(), first, last)
+            del self._docs[first:last + 1]
+            self.endRemoveRows()
+
+    def update_rows(self, rows: Iterable[int]) -> None:
+        """One dataChanged spanning all of `rows`."""
+        rows = [r for r in rows if 0 <= r < len(self._docs)]
+        if not rows:
+            return
+        self.dataChanged.emit(
+            self.index(min(rows), 0), self.index(max(rows), 0), [self.TitleRole, self.ModifiedRole]
+        )
+
     def update_row(self, row: int) -> None:
         if row < 0 or row >= len(self._docs):
             return
@@ -0,0 +1,496 @@
+from __future__ import annotations
+
+import re
+
+from PySide6.QtCore import (
+    QAbstractListModel,
+    QModelIndex,
+    QObject,
+    Property,
+    Qt,
+    Signal,
+    Slot,
+)
+from PySide6.QtGui import QGuiApplication
+
+from ..core.document import Document, TextEdit
+from ..core.line_index import LineIndex
+from ..core.undo import UndoStack
+from .structure import fold_state
+from .workers import run_in_background
+
+_WORD = re.compile(r"\w+|[^\w\s]+")
+
+
+class LineModel(QAbstractListModel):
+    """
+    One row per visible line of a Document, read straight from its LineIndex
+    (lines inside folded regions have no row).
+
+    Edits are forwarded as the smallest row change (dataChanged for rewritten
+    lines, insert/remove for the difference), so the view only relayouts the
+    delegates that are actually visible.
+    """
+
+    LineTextRole = Qt.UserRole + 1
+    ChangeKindRole = Qt.UserRole + 2
+    LineNumberRole = Qt.UserRole + 3
+    FoldStateRole = Qt.UserRole + 4
+
+    def __init__(self, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._doc: Document | None = None
+        # the rows announced by folds_about_to_change, until folds_changed
+        self._pending: tuple[int, int, int] | None = None
+
+    def set_document(self, doc: Document | None) -> None:
+        self.beginResetModel()
+        if self._doc is not None:
+            self._doc.remove_listener(self._on_doc_edit)
+        self._doc = doc
+        if doc is not None:
+            doc.add_listener(self._on_doc_edit)
+        self.endResetModel()
+
+    def rowCount(self, parent=QModelIndex()) -> int:
+        doc = self._doc
+        if parent.isValid() or doc is None or not doc.has_line_index():
+            return 0
+        hidden = doc.folds.hidden_count() if doc.folds is not None else 0
+        return len(doc.line_index()) - hidden
+
+    def line_of_row(self, row: int) -> int:
+        folds = self._doc.folds if self._doc is not None else None
+        return folds.line_at(row) if folds else row
+
+    def row_of_line(self, line: int) -> int:
+        folds = self._doc.folds if self._doc is not None else None
+        return folds.row_of(line) if folds else line
+
+    def data(self, index: QModelIndex, role: int):
+        doc = self._doc
+        if not index.isValid() or doc is None or not doc.has_line_index():
+            return None
+        if index.row() < 0 or index.row() >= self.rowCount():
+            return None
+        i = self.line_of_row(index.row())
+        idx = doc.line_index()
+        if role == self.LineNumberRole:
+            return i
+        if role == self.FoldStateRole:
+            return fold_state(doc, i)
+        if role == self.LineTextRole:
+            start = idx.line_start(i)
+            return doc.text[start:start + idx.line_length(i)]
+        if role == self.ChangeKindRole:
+            hunk = doc.changes.hunk_at(i) if doc.changes is not None else None
+            return hunk.kind if hunk is not None else ""
+        return None
+
+    def roleNames(self):
+        return {
+            self.LineTextRole: b"lineText",
+            self.ChangeKindRole: b"changeKind",
+            self.LineNumberRole: b"lineNumber",
+            self.FoldStateRole: b"foldState",
+        }
+
+    def _refresh_role(self, role: int) -> None:
+        rows = self.rowCount()
+        if rows:
+            self.dataChanged.emit(self.index(0, 0), self.index(rows - 1, 0), [role])
+
+    def refresh_changes(self) -> None:
+        self._refresh_role(self.ChangeKindRole)
+
+    def refresh_structure(self) -> None:
+        self._refresh_role(self.FoldStateRole)
+
+    def folds_about_to_change(self, doc: Document | None, row: int, removed: int, added: int) -> None:
+        """Rows [row, row + removed or added) go or come back; row -1 means any may change."""
+        if doc is None or doc is not self._doc or not doc.has_line_index():
+            return
+        self._pending = (row, removed, added)
+        if row < 0:
+            self.beginResetModel()
+        elif removed:
+            self.beginRemoveRows(QModelIndex(), row, row + removed - 1)
+        elif added:
+            self.beginInsertRows(QModelIndex(), row, row + added - 1)
+
+    def folds_changed(self) -> None:
+        pending, self._pending = self._pending, None
+        if pending is None:
+            return
+        row, removed, added = pending
+        if row < 0:
+            self.endResetModel()
+            return
+        if removed:
+            self.endRemoveRows()
+        elif added:
+            self.endInsertRows()
+        # the header (just above the rows) flipped its fold arrow
+        header = row - 1 if removed or added else row
+        self.dataChanged.emit(self.index(header, 0), self.index(header, 0), [self.FoldStateRole])
+
+    def _on_doc_edit(self, doc: Document, edit: TextEdit) -> None:
+        if doc is not self._doc or not doc.has_line_index():
+            return
+        first = doc.line_index().line_of(edit.start)
+        old = edit.removed.count("\n") + 1
+        new = edit.inserted.count("\n") + 1
+        folds = doc.folds
+        if folds is not None:
+            folds.on_edit(doc.revision, first, old, new)
+            if folds.dropped == doc.revision:
+                # an edit inside folded lines unfolds them
+                self.beginResetModel()
+                self.endResetModel()
+                return
+            first = folds.row_of(first)
+        common = min(old, new)
+        self.dataChanged.emit(self.index(first, 0), self.index(first + common - 1, 0))
+        if new > old:
+            self.beginInsertRows(QModelIndex(), first + old, first + new - 1)
+            self.endInsertRows()
+        elif old > new:
+            self.beginRemoveRows(QModelIndex(), first + new, first + old - 1)
+            self.endRemoveRows()
+
+
+class VirtualEditor(QObject):
+    """
+    Editing state for the virtualized large-file view.
+
+    The document text stays in Python: QML only renders the visible rows of
+    `model` and forwards keys and clicks here. Caret and selection are kept as
+    offsets and handed to QML as (line, column) pairs.
+    """
+
+    caretChanged = Signal()
+    readyChanged = Signal()
+    # the document was changed through this editor (QML never sees the text)
+    edited = Signal()
+
+    def __init__(self, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._model = LineModel(self)
+        self._doc: Document | None = None
+        self._anchor = 0
+        self._caret = 0
+        self._goal_column: int | None = None
+        self._page_lines = 30
+
+    # ---------- document ----------
+    def set_document(self, doc: Document | None) -> None:
+        if doc is self._doc:
+            return
+        if self._doc is not None:
+            self._doc.remove_listener(self._on_doc_edit)
+        self._doc = doc
+        if doc is None:
+            self._model.set_document(None)
+            self.readyChanged.emit()
+            return
+        if doc.undo is None:
+            doc.undo = UndoStack()
+        doc.add_listener(self._on_doc_edit)
+        self._anchor = self._caret = max(0, min(doc.cursor_pos, len(doc.text)))
+        self._goal_column = None
+        if doc.has_line_index():
+            self._model.set_document(doc)
+        else:
+            self._model.set_document(None)
+            snapshot, revision = doc.begin_line_index_build()
+
+            def done(index: LineIndex) -> None:
+                doc.finish_line_index_build(index, revision)
+                if doc is self._doc:
+                    self._model.set_document(doc)
+                    self.readyChanged.emit()
+                    self.caretChanged.emit()
+
+            run_in_background(lambda: LineIndex.from_text(snapshot), done)
+        self.readyChanged.emit()
+        self.caretChanged.emit()
+
+    def _on_doc_edit(self, doc: Document, edit: TextEdit) -> None:
+        # keep caret/anchor on the same text when something else edits the document
+        end = edit.start + len(edit.removed)
+        delta = len(edit.inserted) - len(edit.removed)
+
+        def shift(pos: int) -> int:
+            if pos >= end:
+                return pos + delta
+            return min(pos, edit.start + len(edit.inserted)) if pos > edit.start else pos
+
+        self._anchor, self._caret = shift(self._anchor), shift(self._caret)
+
+    def refresh_changes(self) -> None:
+        self._model.refresh_changes()
+
+    def refresh_structure(self) -> None:
+        self._model.refresh_structure()
+
+    def folds_about_to_change(self, doc: Document | None, row: int, removed: int, added: int) -> None:
+        self._model.folds_about_to_change(doc, row, removed, added)
+
+    def folds_changed(self) -> None:
+        self._model.folds_changed()
+        # the caret's row moved with the lines above it
+        self.caretChanged.emit()
+
+    def get_model(self) -> QObject:
+        return self._model
+
+    model = Property(QObject, get_model, constant=True)
+
+    def get_ready(self) -> bool:
+        return self._doc is not None and self._doc.has_line_index()
+
+    ready = Property(bool, get_ready, notify=readyChanged)
+
+    # ---------- caret ----------
+    def _line_col(self, pos: int) -> tuple[int, int]:
+        idx = self._doc.line_index()
+        line = idx.line_of(pos)
+        return line, pos - idx.line_start(line)
+
+    def _offset(self, line: int, column: int) -> int:
+        idx = self._doc.line_index()
+        line = max(0, min(line, len(idx) - 1))
+        return idx.line_start(line) + max(0, min(column, idx.line_length(line)))
+
+    def get_caret_line(self) -> int:
+        return self._line_col(self._caret)[0] if self.get_ready() else 0
+
+    caretLine = Property(int, get_caret_line, notify=caretChanged)
+
+    def get_caret_row(self) -> int:
+        return self._model.row_of_line(self.get_caret_line()) if self.get_ready() else 0
+
+    # the caret's row in `model` (lines in folded regions have none)
+    caretRow = Property(int, get_caret_row, notify=caretChanged)
+
+    def get_caret_column(self) -> int:
+        return self._line_col(self._caret)[1] if self.get_ready() else 0
+
+    caretColumn = Property(int, get_caret_column, notify=caretChanged)
+
+    def get_anchor_line(self) -> int:
+        return self._line_col(self._anchor)[0] if self.get_ready() else 0
+
+    anchorLine = Property(int, get_anchor_line, notify=caretChanged)
+
+    def get_anchor_column(self) -> int:
+        return self._line_col(self._anchor)[1] if self.get_ready() else 0
+
+    anchorColumn = Property(int, get_anchor_column, notify=caretChanged)
+
+    def get_selection_start(self) -> int:
+        return min(self._anchor, self._caret)
+
+    selectionStart = Property(int, get_selection_start, notify=caretChanged)
+
+    def get_selection_end(self) -> int:
+        return max(self._anchor, self._caret)
+
+    selectionEnd = Property(int, get_selection_end, notify=caretChanged)
+
+    def get_page_lines(self) -> int:
+        return self._page_lines
+
+    def set_page_lines(self, n: int) -> None:
+        self._page_lines = max(1, int(n))
+
+    pageLines = Property(int, get_page_lines, set_page_lines)
+
+    def _set_caret(self, pos: int, extend: bool, keep_goal: bool = False) -> None:
+        self._caret = pos
+        if not extend:
+            self._anchor = pos
+        if not keep_goal:
+            self._goal_column = None
+        if self._doc is not None:
+            self._doc.cursor_pos = pos
+        self.caretChanged.emit()
+
+    def selection(self) -> tuple[int, int]:
+        return self._anchor, self._caret
+
+    @Slot(int, int)
+    def set_selection(self, anchor: int, caret: int) -> None:
+        if self.get_ready():
+            n = len(self._doc.text)
+            self._anchor = max(0, min(anchor, n))
+            self._set_caret(max(0, min(caret, n)), True)
+
+    @Slot(int, int, bool)
+    def set_caret(self, line: int, column: int, extend: bool) -> None:
+        if self.get_ready():
+            self._set_caret(self._offset(line, column), extend)
+
+    @Slot()
+    def select_all(self) -> None:
+        if self.get_ready():
+            self._anchor = 0
+            self._set_caret(len(self._doc.text), True)
+
+    @Slot(str, bool)
+    def move(self, kind: str, extend: bool) -> None:
+        """Caret motion: left/right/up/down/home/end/pageUp/pageDown/wordLeft/wordRight/docStart/docEnd."""
+        if not self.get_ready():
+            return
+        doc = self._doc
+        pos, n = self._caret, len(doc.text)
+        lo, hi = sorted((self._anchor, self._caret))
+        line, col = self._line_col(pos)
+
+        if kind in ("left", "right") and lo != hi and not extend:
+            self._set_caret(lo if kind == "left" else hi, False)
+            return
+        if kind == "left":
+            pos = max(0, pos - 1)
+        elif kind == "right":
+            pos = min(n, pos + 1)
+        elif kind in ("up", "down", "pageUp", "pageDown"):
+            step = {"up": -1, "down": 1, "pageUp": -self._page_lines, "pageDown": self._page_lines}[kind]
+            goal = col if self._goal_column is None else self._goal_column
+            # steps are rows, so folded regions are passed over
+            target = self._model.row_of_line(line) + step
+            if target < 0:
+                pos = 0
+            elif target >= self._model.rowCount():
+                pos = n
+            else:
+                pos = self._offset(self._model.line_of_row(target), goal)
+            self._set_caret(pos, extend, keep_goal=True)
+            self._goal_column = goal
+            return
+        elif kind == "home":
+            start = pos - col
+            text = self._line_text(line)
+            indent = len(text) - len(text.lstrip())
+            # first press goes to the indentation, a second one to column 0
+            pos = start + indent if col != indent else start
+        elif kind == "end":
+            pos = doc.line_index().line_end(line)
+        elif kind == "docStart":
+            pos = 0
+        elif kind == "docEnd":
+            pos = n
+        elif kind in ("wordLeft", "wordRight"):
+            pos = self._word_boundary(line, col, kind == "wordRight")
+        else:
+            return
+        self._set_caret(pos, extend)
+
+    def _line_text(self, line: int) -> str:
+        idx = self._doc.line_index()
+        start = idx.line_start(line)
+        return self._doc.text[start:start + idx.line_length(line)]
+
+    def _word_boundary(self, line: int, col: int, forward: bool) -> int:
+        idx = self._doc.line_index()
+        start = idx.line_start(line)
+        text = self._line_text(line)
+        if forward:
+            if col >= len(text):
+                return min(len(self._doc.text), start + len(text) + 1)
+            for m in _WORD.finditer(text, col):
+                if m.end() > col:
+                    return start + m.end()
+            return start + len(text)
+        if col == 0:
+            return max(0, start - 1)
+        best = 0
+        for m in _WORD.finditer(text, 0, col):
+            best = m.start()
+        return start + best
+
+    # ---------- editing ----------
+    def _replace(self, start: int, end: int, inserted: str, typing: bool = False) -> None:
+        doc = self._doc
+        before = self._caret
+        edit = doc.apply_edit(start, end, inserted)
+        after = start + len(inserted)
+        doc.undo.push([edit], before, after, typing)
+        self._set_caret(after, False)
+        self.edited.emit()
+
+    def replace_document(self, text: str) -> None:
+        """Swap in new contents as one undoable edit, keeping the caret where it was."""
+        if not self.get_ready():
+            return
+        caret = self._caret
+        self._replace(0, len(self._doc.text), text)
+        self._set_caret(min(caret, len(text)), False)
+
+    @Slot(str)
+    def insert_text(self, text: str) -> None:
+        if not self.get_ready() or not text:
+            return
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        lo, hi = sorted((self._anchor, self._caret))
+        self._replace(lo, hi, text, typing=(lo == hi and len(text) == 1))
+
+    @Slot()
+    def backspace(self) -> None:
+        if not self.get_ready():
+            return
+        lo, hi = sorted((self._anchor, self._caret))
+        if lo != hi:
+            self._replace(lo, hi, "")
+        elif lo > 0:
+            self._replace(lo - 1, lo, "")
+
+    @Slot()
+    def delete_forward(self) -> None:
+        if not self.get_ready():
+            return
+        lo, hi = sorted((self._anchor, self._caret))
+        if lo != hi:
+            self._replace(lo, hi, "")
+        elif hi < len(self._doc.text):
+            self._replace(hi, hi + 1, "")
+
+    @Slot(result=str)
+    def selected_text(self) -> str:
+        if self._doc is None:
+            return ""
+        lo, hi = sorted((self._anchor, self._caret))
+        return self._doc.text[lo:hi]
+
+    @Slot()
+    def copy(self) -> None:
+        text = self.selected_text()
+        if text:
+            QGuiApplication.clipboard().setText(text)
+
+    @Slot()
+    def cut(self) -> None:
+        if self.get_ready() and self._anchor != self._caret:
+            self.copy()
+            self._replace(*sorted((self._anchor, self._caret)), "")
+
+    @Slot()
+    def paste(self) -> None:
+        self.insert_text(QGuiApplication.clipboard().text())
+
+    @Slot()
+    def undo(self) -> None:
+        self._step(self._doc.undo.undo if self._doc is not None and self.get_ready() else None)
+
+    @Slot()
+    def redo(self) -> None:
+        self._step(self._doc.undo.redo if self._doc is not None and self.get_ready() else None)
+
+    def _step(self, action) -> None:
+        if action is None:
+            return
+        caret = action(self._doc)
+        if caret is None:
+            return
+        self._set_caret(max(0, min(caret, len(self._doc.text))), False)
+        self.edited.emit()
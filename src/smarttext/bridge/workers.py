@@ -0,0 +1,168 @@
+from __future__ import annotations
+
+from typing import Any, Callable
+
+from PySide6.QtCore import Property, QObject, QThreadPool, QTimer, Signal, Slot
+
+# how often a running job's progress is put in the status bar
+PROGRESS_INTERVAL_MS = 250
+
+
+class _Relay(QObject):
+    """Lives on the GUI thread and forwards a worker's result back to it."""
+
+    finished = Signal(object)
+    failed = Signal(object)
+
+    def __init__(
+        self,
+        on_done: Callable[[Any], None] | None,
+        on_error: Callable[[BaseException], None] | None,
+    ) -> None:
+        super().__init__()
+        self._on_done = on_done
+        self._on_error = on_error
+        self.finished.connect(self._deliver_result)
+        self.failed.connect(self._deliver_error)
+
+    @Slot(object)
+    def _deliver_result(self, result: Any) -> None:
+        _pending.discard(self)
+        if self._on_done is not None:
+            self._on_done(result)
+
+    @Slot(object)
+    def _deliver_error(self, exc: BaseException) -> None:
+        _pending.discard(self)
+        if self._on_error is not None:
+            self._on_error(exc)
+
+
+# keeps relays alive until their worker reports back
+_pending: set[_Relay] = set()
+
+
+def run_in_background(
+    fn: Callable[[], Any],
+    on_done: Callable[[Any], None] | None = None,
+    on_error: Callable[[BaseException], None] | None = None,
+    pool: QThreadPool | None = None,
+) -> None:
+    """
+    Run `fn` on `pool` (the global thread pool by default).
+
+    `on_done` / `on_error` are always called on the GUI thread (queued through a
+    QObject that lives there), so they may touch models and emit signals freely.
+    `fn` itself must only read immutable snapshots (e.g. a `str`), never live
+    `Document` objects.
+    """
+    relay = _Relay(on_done, on_error)
+    _pending.add(relay)
+
+    def job() -> None:
+        try:
+            result = fn()
+        except BaseException as exc:  # report everything, the GUI decides
+            relay.failed.emit(exc)
+            return
+        relay.finished.emit(result)
+
+    (pool or QThreadPool.globalInstance()).start(job)
+
+
+class Cancelled(Exception):
+    """Raised inside a job whose JobProgress was cancelled."""
+
+
+class JobProgress:
+    """
+    Progress and cancel flag shared by one worker job and the GUI thread.
+
+    The job calls `report()` now and then; the GUI polls `fraction` and may
+    `cancel()`, which makes the next `report()` raise Cancelled.
+    """
+
+    def __init__(self) -> None:
+        self.fraction = 0.0
+        self.cancelled = False
+
+    def report(self, fraction: float) -> None:
+        if self.cancelled:
+            raise Cancelled()
+        self.fraction = fraction
+
+    def cancel(self) -> None:
+        self.cancelled = True
+
+
+class JobController(QObject):
+    """
+    Base for controllers that run one cancellable job at a time.
+
+    While the job runs its progress goes out through `statusMessage` every
+    PROGRESS_INTERVAL_MS; `cancel()` stops it at its next progress report.
+    """
+
+    busyChanged = Signal()
+    statusMessage = Signal(str)
+
+    def __init__(self, parent: QObject | None = None) -> None:
+        super().__init__(parent)
+        self._job: JobProgress | None = None
+        self._label = ""
+
+        self._timer = QTimer(self)
+        self._timer.setInterval(PROGRESS_INTERVAL_MS)
+        self._timer.timeout.connect(self._report_progress)
+
+    def get_busy(self) -> bool:
+        return self._job is not None
+
+    busy = Property(bool, get_busy, notify=busyChanged)
+
+    def _start(
+        self,
+        label: str,
+        fn: Callable[[Callable[[float], None]], Any],
+        on_done: Callable[[Any], None],
+        on_error: Callable[[BaseException], None],
+    ) -> bool:
+        """Run `fn(report)` in the background unless a job is already running."""
+        if self._job is not None:
+            self.statusMessage.emit(f"{self._label} is still running")
+            return False
+        job = JobProgress()
+        self._job = job
+        self._label = label
+        self.busyChanged.emit()
+        self.statusMessage.emit(f"{label}…")
+        self._timer.start()
+
+        def done(result: Any) -> None:
+            self._end(job)
+            on_done(result)
+
+        def failed(exc: BaseException) -> None:
+            self._end(job)
+            if isinstance(exc, Cancelled):
+                self.statusMessage.emit(f"{label} cancelled")
+            else:
+                on_error(exc)
+
+        run_in_background(lambda: fn(job.report), done, failed)
+        return True
+
+    @Slot()
+    def cancel(self) -> None:
+        if self._job is not None:
+            self._job.cancel()
+
+    def _end(self, job: JobProgress) -> None:
+        if self._job is job:
+            self._job = None
+            self._timer.stop()
+            self.busyChanged.emit()
+
+    def _report_progress(self) -> None:
+        if self._job is not None:
+            self.statusMessage.emit(f"{self._label}… {int(self._job.fraction * 100)}%  (Esc to cancel)")
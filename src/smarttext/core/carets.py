@@ -0,0 +1,218 @@
+from __future__ import annotations
+
+from bisect import bisect_left
+from typing import Iterable, List, Sequence, Tuple
+
+from .document import Replacement
+from .line_index import LineIndex
+
+# (anchor, caret) offsets; the caret is the end that moves
+Selection = Tuple[int, int]
+
+
+def span(sel: Selection) -> tuple[int, int]:
+    a, c = sel
+    return (a, c) if a <= c else (c, a)
+
+
+def merge_selections(sels: Iterable[Selection]) -> List[Selection]:
+    """Sorted by position, with overlapping selections (and carets on the same spot) merged."""
+    out: List[Selection] = []
+    for sel in sorted(sels, key=span):
+        lo, hi = span(sel)
+        if out:
+            plo, phi = span(out[-1])
+            # a bare caret at the edge of a selection is swallowed by it
+            if lo < phi or (lo == phi and (lo == hi or plo == phi)):
+                if hi > phi:
+                    out[-1] = (plo, hi) if sel[1] >= sel[0] else (hi, plo)
+                continue
+        out.append(sel)
+    return out
+
+
+def ends_of(sels: Sequence[Selection]) -> List[int]:
+    return [a if a > c else c for a, c in sels]
+
+
+def between(sels: Sequence[Selection], ends: Sequence[int], first: int, last: int) -> range:
+    """Indexes of the merged selections touching offsets [first, last]; `ends` as from `ends_of`."""
+    i = bisect_left(ends, first)
+    j = i
+    n = len(sels)
+    while j < n and min(sels[j]) <= last:
+        j += 1
+    return range(i, j)
+
+
+# ---------- edits ----------
+def replace_selections(
+    sels: Sequence[Selection], texts: Sequence[str]
+) -> tuple[List[Replacement], List[Selection]]:
+    """
+    Replace each selection with its text. Returns the replacements (against the
+    text before) and the carets after them, shifted in one pass by the running
+    length change.
+    """
+    # the hot path of typing with many carets: no helper calls per caret
+    edits: List[Replacement] = []
+    carets: List[Selection] = []
+    add_edit, add_caret = edits.append, carets.append
+    delta = 0
+    for (lo, hi), text in zip(sels, texts):
+        if lo > hi:
+            lo, hi = hi, lo
+        size = len(text)
+        if lo != hi or size:
+            add_edit((lo, hi, text))
+        pos = lo + delta + size
+        add_caret((pos, pos))
+        delta += size - (hi - lo)
+    return edits, carets
+
+
+def delete_at_selections(
+    sels: Sequence[Selection], length: int, forward: bool
+) -> tuple[List[Replacement], List[Selection]]:
+    """Backspace (or Delete): selections are removed, bare carets take one character with them."""
+    edits: List[Replacement] = []
+    carets: List[Selection] = []
+    delta = 0
+    prev_end = 0
+    for lo, hi in sels:
+        if lo > hi:
+            lo, hi = hi, lo
+        if lo == hi:
+            lo, hi = (lo, min(length, lo + 1)) if forward else (max(0, lo - 1), lo)
+        # neighbouring carets may reach for the same character
+        lo = max(lo, prev_end)
+        hi = max(hi, lo)
+        if hi > lo:
+            edits.append((lo, hi, ""))
+        pos = lo + delta
+        carets.append((pos, pos))
+        delta -= hi - lo
+        prev_end = hi
+    # the carets come out in order; neighbours that met are now equal
+    return edits, list(dict.fromkeys(carets))
+
+
+# ---------- motion ----------
+def _line_finder(index: LineIndex):
+    """
+    line_of/line_start for offsets that mostly come in order (merged carets):
+    the same or the next line is checked before a full lookup.
+    """
+    lines = len(index)
+    line, start, end = -1, 0, -1
+
+    def find(pos: int) -> tuple[int, int]:
+        nonlocal line, start, end
+        if start <= pos <= end:
+            return line, start
+        if 0 <= line < lines - 1 and end < pos <= end + 1 + index.line_length(line + 1):
+            line, start = line + 1, end + 1
+        else:
+            line = index.line_of(pos)
+            start = index.line_start(line)
+        end = start + index.line_length(line)
+        return line, start
+
+    return find
+
+
+def move_selections(
+    text: str, index: LineIndex, sels: Sequence[Selection], kind: str, extend: bool
+) -> List[Selection]:
+    """Move every caret: left/right/up/down/home/end; with `extend` the anchors stay put."""
+    n = len(text)
+    lines = len(index)
+    find = _line_finder(index)
+    out: List[Selection] = []
+    for anchor, caret in sels:
+        lo, hi = span((anchor, caret))
+        if kind in ("left", "right") and lo != hi and not extend:
+            pos = lo if kind == "left" else hi
+            out.append((pos, pos))
+            continue
+        if kind == "left":
+            pos = max(0, caret - 1)
+        elif kind == "right":
+            pos = min(n, caret + 1)
+        else:
+            line, start = find(caret)
+            if kind in ("up", "down"):
+                target = line + (1 if kind == "down" else -1)
+                if target < 0:
+                    pos = 0
+                elif target >= lines:
+                    pos = n
+                else:
+                    length = index.line_length(target)
+                    # the neighbouring line starts right after (or ends right before) this one
+                    tstart = start + index.line_length(line) + 1 if target > line else start - 1 - length
+                    pos = tstart + min(caret - start, length)
+            elif kind == "home":
+                line_text = text[start:start + index.line_length(line)]
+                indent = start + len(line_text) - len(line_text.lstrip())
+                # first press goes to the indentation, a second one to column 0
+                pos = indent if caret != indent else start
+            elif kind == "end":
+                pos = start + index.line_length(line)
+            else:
+                pos = caret
+        out.append((anchor if extend else pos, pos))
+    return merge_selections(out)
+
+
+# ---------- making selections ----------
+def column_selections(index: LineIndex, anchor: int, caret: int) -> List[Selection]:
+    """One selection per line of the rectangle between two offsets (columns clamped to each line)."""
+    a_line, c_line = index.line_of(anchor), index.line_of(caret)
+    a_col = anchor - index.line_start(a_line)
+    c_col = caret - index.line_start(c_line)
+    step = 1 if c_line >= a_line else -1
+    out: List[Selection] = []
+    for line in range(a_line, c_line + step, step):
+        start = index.line_start(line)
+        length = index.line_length(line)
+        out.append((start + min(a_col, length), start + min(c_col, length)))
+    return merge_selections(out)
+
+
+def caret_on_line(index: LineIndex, caret: int, step: int) -> int | None:
+    """The same column `step` lines away (clamped to that line), or None past either end."""
+    line = index.line_of(caret)
+    target = line + step
+    if target < 0 or target >= len(index):
+        return None
+    return index.line_start(target) + min(caret - index.line_start(line), index.line_length(target))
+
+
+def occurrences(text: str, needle: str, limit: int) -> List[Selection]:
+    """Up to `limit` non-overlapping matches of `needle`, as selections."""
+    out: List[Selection] = []
+    if not needle:
+        return out
+    find = text.find
+    size = len(needle)
+    i = find(needle)
+    while i >= 0 and len(out) < limit:
+        out.append((i, i + size))
+        i = find(needle, i + size)
+    return out
+
+
+def next_occurrence(text: str, needle: str, after: int, taken: Sequence[Selection]) -> Selection | None:
+    """The first match of `needle` from `after` on (wrapping) that is not already selected."""
+    if not needle:
+        return None
+    taken_starts = {min(s) for s in taken}
+    size = len(needle)
+    for lo, hi in ((after, len(text)), (0, after + size - 1)):
+        i = text.find(needle, lo, hi)
+        while i >= 0:
+            if i not in taken_starts:
+                return (i, i + size)
+            i = text.find(needle, i + 1, hi)
+    return None
@@ -0,0 +1,188 @@
+from __future__ import annotations
+
+import importlib
+import time
+from dataclasses import dataclass
+from typing import Any, Callable, Dict, Iterable, List
+
+# entry-point group plugins register commands under:
+#   [project.entry-points."smarttext.commands"]
+#   "mytool.shout" = "mytool.commands:shout"
+ENTRY_POINT_GROUP = "smarttext.commands"
+
+# key scopes: commands run from the keyboard only while the window is in a
+# scope they allow
+SCOPE_EDITOR = "editor"    # nothing modal is open
+SCOPE_PALETTE = "palette"  # the Ctrl+Space layer is open
+SCOPE_NONE = "none"        # dialogs, settings, shortcut capture
+
+
+@dataclass(frozen=True)
+class Command:
+    """
+    What the palette and the key table need to know about a command.
+
+    `target` names the implementation as "module:function"; the module is
+    imported the first time the command runs, and the function is called
+    with the AppController.
+    """
+
+    id: str
+    title: str
+    target: str
+    category: str = ""
+    # default key sequence in portable text ("Ctrl+Alt+F"), if any
+    shortcut: str = ""
+    # SettingsStore property holding the user's key sequence, if configurable
+    setting: str = ""
+    # also reachable from the keyboard while the palette is open
+    in_palette: bool = False
+
+
+@dataclass
+class CommandStats:
+    calls: int = 0
+    # seconds spent importing the implementation (first call only)
+    load: float = 0.0
+    last: float = 0.0
+    total: float = 0.0
+
+
+_FILES = "smarttext.bridge.commands.files"
+_VIEW = "smarttext.bridge.commands.view"
+_TEXT = "smarttext.bridge.commands.text"
+_EDIT = "smarttext.bridge.commands.edit"
+
+BUILTIN_COMMANDS: tuple[Command, ...] = (
+    Command("file.new", "New File", f"{_FILES}:new_file", "File", "Ctrl+N", "shortcutNew"),
+    Command("file.open", "Open File…", f"{_FILES}:open_file", "File", "Ctrl+O", "shortcutOpen"),
+    Command("file.openFolder", "Open Folder…", f"{_FILES}:open_folder", "File"),
+    Command("file.save", "Save", f"{_FILES}:save", "File", "Ctrl+S", "shortcutSave"),
+    Command("file.saveAs", "Save As…", f"{_FILES}:save_as", "File", "Ctrl+Shift+S", "shortcutSaveAs"),
+    Command("file.saveAll", "Save All", f"{_FILES}:save_all", "File"),
+    Command("file.close", "Close Tab", f"{_FILES}:close_tab", "File", "Ctrl+W", "shortcutClose"),
+    Command("file.closeOthers", "Close Other Tabs", f"{_FILES}:close_others", "File"),
+    Command("file.closeSaved", "Close Saved Tabs", f"{_FILES}:close_saved", "File"),
+    Command("file.closeAll", "Close All Tabs", f"{_FILES}:close_all", "File"),
+    Command("view.quickOpen", "Go to File…", f"{_VIEW}:toggle_quick_open", "View",
+            "Ctrl+Space", "shortcutSearch", in_palette=True),
+    Command("view.commands", "Show All Commands", f"{_VIEW}:show_commands", "View",
+            "Ctrl+Shift+P", in_palette=True),
+    Command("view.fullScreen", "Toggle Full Screen", f"{_VIEW}:toggle_full_screen", "View", "F11"),
+    Command("view.settings", "Settings…", f"{_VIEW}:open_settings", "View"),
+    Command("edit.addCaretAbove", "Add Caret Above", f"{_EDIT}:add_caret_above", "Selection", "Ctrl+Alt+Up"),
+    Command("edit.addCaretBelow", "Add Caret Below", f"{_EDIT}:add_caret_below", "Selection", "Ctrl+Alt+Down"),
+    Command("edit.addNextOccurrence", "Add Next Occurrence", f"{_EDIT}:add_next_occurrence", "Selection",
+            "Ctrl+D"),
+    Command("edit.selectAllOccurrences", "Select All Occurrences", f"{_EDIT}:select_all_occurrences",
+            "Selection", "Ctrl+Shift+L"),
+    Command("edit.fold", "Fold", f"{_EDIT}:fold", "Folding", "Ctrl+Alt+["),
+    Command("edit.unfold", "Unfold", f"{_EDIT}:unfold", "Folding", "Ctrl+Alt+]"),
+    Command("edit.foldAll", "Fold All", f"{_EDIT}:fold_all", "Folding"),
+    Command("edit.unfoldAll", "Unfold All", f"{_EDIT}:unfold_all", "Folding"),
+    Command("edit.matchingBracket", "Go to Matching Bracket", f"{_EDIT}:jump_to_bracket", "Folding",
+            "Ctrl+Alt+B"),
+    Command("text.format", "Format Document", f"{_TEXT}:format_document", "Text", "Ctrl+Alt+F"),
+    Command("text.minify", "Minify Document", f"{_TEXT}:minify_document", "Text", "Ctrl+Alt+M"),
+    Command("text.validate", "Validate Document", f"{_TEXT}:validate_document", "Text", "Ctrl+Alt+V"),
+    Command("lines.tools", "Line Operations…", f"{_TEXT}:line_tools", "Lines", "Ctrl+Alt+L"),
+    Command("lines.sort", "Sort Lines", f"{_TEXT}:sort_lines", "Lines"),
+    Command("lines.unique", "Remove Duplicate Lines", f"{_TEXT}:unique_lines", "Lines"),
+    Command("lines.reverse", "Reverse Lines", f"{_TEXT}:reverse_lines", "Lines"),
+)
+
+
+def _title_from_id(command_id: str) -> str:
+    name = command_id.rsplit(".", 1)[-1].replace("_", " ").replace("-", " ").strip()
+    return name[:1].upper() + name[1:] if name else command_id
+
+
+def discover_plugins(group: str = ENTRY_POINT_GROUP) -> List[Command]:
+    """
+    Commands declared by installed distributions, from their metadata only.
+
+    Nothing is imported here: the entry point's name is the command id (its
+    last dotted part becomes the title) and its value is the target.
+    """
+    from importlib.metadata import entry_points
+
+    found: List[Command] = []
+    for ep in entry_points(group=group):
+        found.append(Command(ep.name, _title_from_id(ep.name), ep.value, "Plugins"))
+    return found
+
+
+class CommandRegistry:
+    """
+    Command metadata by id, with implementations resolved on first use.
+
+    Every run is timed; `stats()` reports import and call latency per
+    command.
+    """
+
+    def __init__(self, commands: Iterable[Command] = ()) -> None:
+        self._commands: Dict[str, Command] = {}
+        self._impls: Dict[str, Callable[[Any], Any]] = {}
+        self._stats: Dict[str, CommandStats] = {}
+        # most recently run first
+        self._recent: List[str] = []
+        for c in commands:
+            self.register(c)
+
+    def __len__(self) -> int:
+        return len(self._commands)
+
+    def __contains__(self, command_id: str) -> bool:
+        return command_id in self._commands
+
+    def register(self, command: Command) -> bool:
+        """Add `command`; ids already taken (e.g. by a built-in) are refused."""
+        if command.id in self._commands:
+            return False
+        self._commands[command.id] = command
+        return True
+
+    def get(self, command_id: str) -> Command | None:
+        return self._commands.get(command_id)
+
+    def commands(self) -> List[Command]:
+        return list(self._commands.values())
+
+    def recent(self) -> List[str]:
+        return list(self._recent)
+
+    def is_loaded(self, command_id: str) -> bool:
+        return command_id in self._impls
+
+    def stats(self, command_id: str) -> CommandStats:
+        return self._stats.setdefault(command_id, CommandStats())
+
+    def _resolve(self, command: Command) -> Callable[[Any], Any]:
+        impl = self._impls.get(command.id)
+        if impl is None:
+            module_name, _, attr = command.target.partition(":")
+            started = time.perf_counter()
+            impl = importlib.import_module(module_name)
+            for part in attr.split(".") if attr else ():
+                impl = getattr(impl, part)
+            self.stats(command.id).load = time.perf_counter() - started
+            self._impls[command.id] = impl
+        return impl
+
+    def run(self, command_id: str, context: Any) -> Any:
+        """Run a command with `context` (the AppController); KeyError for unknown ids."""
+        command = self._commands[command_id]
+        impl = self._resolve(command)
+        started = time.perf_counter()
+        try:
+            return impl(context)
+        finally:
+            took = time.perf_counter() - started
+            st = self.stats(command_id)
+            st.calls += 1
+            st.last = took
+            st.total += took
+            if command_id in self._recent:
+                self._recent.remove(command_id)
+            self._recent.insert(0, command_id)
+
@@ -1,7 +1,90 @@
 from __future__ import annotations
 
-from dataclasses import dataclass
+from dataclasses import dataclass, field
 from pathlib import Path
+from typing import TYPE_CHECKING, Callable, List, Sequence, Tuple
+
+if TYPE_CHECKING:
+    from collections import Counter
+
+    from .hex_dump import HexFile
+    from .line_diff import ChangeTracker
+    from .line_index import LineIndex
+    from .minimap import MinimapCache
+    from .structure import Folds, StructureIndex
+    from .text_stats import StatsTracker
+    from .undo import UndoStack
+    from .utf16 import Utf16Index
+
+# initial probe size when scanning for the edited region; doubles up to _MAX_PROBE
+_MIN_PROBE = 256
+_MAX_PROBE = 1 << 20
+
+
+@dataclass(frozen=True)
+class TextEdit:
+    """`removed` was replaced by `inserted` at offset `start`."""
+
+    start: int
+    removed: str
+    inserted: str
+
+
+def _common_prefix_len(a: str, b: str) -> int:
+    n = min(len(a), len(b))
+    i = 0
+    step = _MIN_PROBE
+    while i < n:
+        j = min(n, i + step)
+        # compares in C without copying `b`; only the probe window of `a` is sliced
+        if b.startswith(a[i:j], i):
+            i = j
+            step = min(step * 2, _MAX_PROBE)
+            continue
+        lo, hi = i, j  # a[:lo] == b[:lo], first mismatch is in [lo, hi)
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if b.startswith(a[lo:mid], lo):
+                lo = mid
+            else:
+                hi = mid
+        return lo
+    return n
+
+
+def _common_suffix_len(a: str, b: str, limit: int) -> int:
+    la, lb = len(a), len(b)
+    k = 0
+    step = _MIN_PROBE
+    while k < limit:
+        j = min(limit, k + step)
+        if b.endswith(a[la - j:la - k], 0, lb - k):
+            k = j
+            step = min(step * 2, _MAX_PROBE)
+            continue
+        lo, hi = k, j  # last `lo` chars match, first mismatch is within the last `hi`
+        while hi - lo > 1:
+            mid = (lo + hi) // 2
+            if b.endswith(a[la - mid:la - lo], 0, lb - lo):
+                lo = mid
+            else:
+                hi = mid
+        return lo
+    return limit
+
+
+def diff_text(old: str, new: str) -> TextEdit | None:
+    """Smallest single contiguous edit that turns `old` into `new` (None if equal)."""
+    if old == new:
+        return None
+    p = _common_prefix_len(old, new)
+    s = _common_suffix_len(old, new, min(len(old), len(new)) - p)
+    return TextEdit(p, old[p:len(old) - s], new[p:len(new) - s])
+
+
+EditListener = Callable[["Document", TextEdit], None]
+# (start, end, inserted): one of several replacements made together
+Replacement = Tuple[int, int, str]
 
 
 @dataclass
@@ -12,10 +95,139 @@ class Document:
     cursor_pos: int = 0
     scroll_y: float = 0.0
 
+    # bumped on every edit; lets background jobs detect that their snapshot is stale
+    revision: int = field(default=0, init=False, repr=False, compare=False)
+    stats: StatsTracker | None = field(default=None, init=False, repr=False, compare=False)
+    minimap: MinimapCache | None = field(default=None, init=False, repr=False, compare=False)
+    # lines changed since the last save (only for documents with a path)
+    changes: ChangeTracker | None = field(default=None, init=False, repr=False, compare=False)
+    # history of edits applied from Python (the TextArea keeps its own)
+    undo: UndoStack | None = field(default=None, init=False, repr=False, compare=False)
+    # completion word counts; None until the first count finishes
+    words: Counter[str] | None = field(default=None, init=False, repr=False, compare=False)
+    # set for files that are not text: shown read-only as bytes, `text` stays empty
+    binary: HexFile | None = field(default=None, init=False, repr=False, compare=False)
+    # brackets per line, for folding and matching; None for plain text or while it is built
+    structure: StructureIndex | None = field(default=None, init=False, repr=False, compare=False)
+    # collapsed regions (kept through rebuilds of `structure`)
+    folds: Folds | None = field(default=None, init=False, repr=False, compare=False)
+    _line_index: LineIndex | None = field(default=None, init=False, repr=False, compare=False)
+    # (revision, index) of the last utf16() call
+    _utf16: tuple[int, Utf16Index] | None = field(default=None, init=False, repr=False, compare=False)
+    # edits made while a line index is being built off-thread, replayed on adoption
+    _index_backlog: List[tuple[int, TextEdit]] | None = field(
+        default=None, init=False, repr=False, compare=False
+    )
+    _listeners: List[EditListener] = field(
+        default_factory=list, init=False, repr=False, compare=False
+    )
+
     @property
     def title(self) -> str:
         return self.path.name if self.path else "Untitled"
 
+    def line_index(self) -> LineIndex:
+        """Line offsets, built on first use and then kept current by every edit."""
+        if self._line_index is None:
+            from .line_index import LineIndex
+
+            self._line_index = LineIndex.from_text(self.text)
+        return self._line_index
+
+    def utf16(self) -> Utf16Index:
+        """Code-point <-> UTF-16 offsets (Qt's text positions), rebuilt when the text has changed."""
+        if self._utf16 is None or self._utf16[0] != self.revision:
+            from .utf16 import Utf16Index
+
+            self._utf16 = (self.revision, Utf16Index(self.text))
+        return self._utf16[1]
+
+    def has_line_index(self) -> bool:
+        return self._line_index is not None
+
+    def begin_line_index_build(self) -> tuple[str, int]:
+        """Start logging edits; returns the snapshot (and its revision) to index off-thread."""
+        if self._index_backlog is None:
+            self._index_backlog = []
+        return self.text, self.revision
+
+    def finish_line_index_build(self, index: LineIndex, revision: int) -> None:
+        """Adopt an index built from the snapshot taken at `revision`."""
+        backlog, self._index_backlog = self._index_backlog, None
+        if self._line_index is not None or backlog is None:
+            return
+        for rev, edit in backlog:
+            if rev > revision:
+                index.apply(edit)
+        self._line_index = index
+
+    def add_listener(self, listener: EditListener) -> None:
+        if listener not in self._listeners:
+            self._listeners.append(listener)
+
+    def remove_listener(self, listener: EditListener) -> None:
+        if listener in self._listeners:
+            self._listeners.remove(listener)
+
     def set_text(self, text: str) -> None:
+        edit = diff_text(self.text, text)
+        if edit is None:
+            self.modified = True
+            return
+        self._commit(edit, text)
+
+    def apply_edit(self, start: int, end: int, inserted: str) -> TextEdit:
+        edit = TextEdit(start, self.text[start:end], inserted)
+        self._commit(edit, self.text[:start] + inserted + self.text[end:])
+        return edit
+
+    def apply_edits(self, replacements: Sequence[Replacement]) -> List[TextEdit]:
+        """
+        `replace_ranges`, returning the individual edits (in the coordinates
+        of the text before), e.g. for an undo stack.
+        """
+        old = self.text
+        edits = [TextEdit(start, old[start:end], inserted) for start, end, inserted in replacements]
+        self.replace_ranges(replacements)
+        return edits
+
+    def replace_ranges(self, replacements: Sequence[Replacement]) -> None:
+        """
+        Make several non-overlapping replacements, given in ascending order
+        against the current text, as one change.
+
+        The new text is built in a single pass and listeners are told once,
+        with one edit spanning the first replacement to the last.
+        """
+        if not replacements:
+            return
+        old = self.text
+        if len(replacements) == 1:
+            start, end, inserted = replacements[0]
+            self._commit(TextEdit(start, old[start:end], inserted), old[:start] + inserted + old[end:])
+            return
+
+        pieces: List[str] = []
+        append = pieces.append
+        prev = 0
+        for start, end, inserted in replacements:
+            append(old[prev:start])
+            append(inserted)
+            prev = end
+        append(old[prev:])
+        text = "".join(pieces)
+
+        first, last = replacements[0][0], replacements[-1][1]
+        new_last = last + len(text) - len(old)
+        self._commit(TextEdit(first, old[first:last], text[first:new_last]), text)
+
+    def _commit(self, edit: TextEdit, text: str) -> None:
         self.text = text
         self.modified = True
+        self.revision += 1
+        if self._line_index is not None:
+            self._line_index.apply(edit)
+        elif self._index_backlog is not None:
+            self._index_backlog.append((self.revision, edit))
+        for listener in list(self._listeners):
+            listener(self, edit)
@@ -0,0 +1,465 @@
+from __future__ import annotations
+
+import re
+from functools import lru_cache
+from importlib.util import find_spec
+from pathlib import Path
+from typing import Callable, List
+
+# called with the fraction of input consumed; may raise to abort the job
+Progress = Callable[[float], None]
+
+KINDS = {
+    ".json": "json",
+    ".xml": "xml",
+    ".yaml": "yaml",
+    ".yml": "yaml",
+    ".toml": "toml",
+}
+# kinds that can be rewritten; YAML and TOML are only checked (rewriting
+# them through a parser would drop comments)
+FORMATTABLE = {"json", "xml"}
+# kinds whose checks need a module that may be missing (PyYAML is the
+# optional "yaml" extra; tomllib arrived in Python 3.11)
+_REQUIRES = {"yaml": "yaml", "toml": "tomllib"}
+
+# tokens between progress reports / output flushes
+_BATCH = 1 << 16
+# XML is fed to expat in slices this big
+_XML_CHUNK = 1 << 20
+
+
+class FormatError(ValueError):
+    """Malformed input, located by 1-based line and column."""
+
+    def __init__(self, message: str, line: int, column: int) -> None:
+        super().__init__(message)
+        self.message = message
+        self.line = line
+        self.column = column
+
+    def __str__(self) -> str:
+        return f"{self.line}:{self.column}: {self.message}"
+
+
+def _error_at(text: str, pos: int, message: str) -> FormatError:
+    line = text.count("\n", 0, pos) + 1
+    return FormatError(message, line, pos - (text.rfind("\n", 0, pos) + 1) + 1)
+
+
+def detect_kind(path: Path | None, text: str) -> str | None:
+    """Structured format of a document: by suffix, or sniffed for untitled ones."""
+    if path is not None:
+        return KINDS.get(path.suffix.lower())
+    head = text[:4096].lstrip()
+    if head.startswith(("{", "[")):
+        return "json"
+    if head.startswith("<"):
+        return "xml"
+    return None
+
+
+# ---------------------------------------------------------------------------
+# JSON
+# ---------------------------------------------------------------------------
+
+# String bodies are written as "unrolled" loops (plain run, then escape and
+# plain run, ...) so there is only one way to match them: a string that never
+# closes fails in one pass instead of backtracking through every split.
+_STRING_BODY = r'[^"\\\x00-\x1f]*(?:\\(?:["\\/bfnrt]|u[0-9a-fA-F]{4})[^"\\\x00-\x1f]*)*'
+_SCALAR_RE = r'(?:-?(?:0|[1-9][0-9]*)(?:\.[0-9]+)?(?:[eE][+-]?[0-9]+)?|true|false|null)(?![^ \t\n\r{}\[\],:"])'
+
+# Splits a slice into tokens; every character lands in one, so offsets can be
+# recovered by summing lengths. Malformed input comes back as "" (it sits
+# outside the only group), which marks the first lexical error. So does a
+# string cut off by the slice end: the last token of a slice is re-read with
+# the next, and at the end of the text it is an error.
+_JSON_TOKEN = re.compile(
+    r"""(
+        "%(body)s"
+      | [{}\[\],:]
+      | [ \t\n\r]+
+      | %(scalar)s
+    )
+    | "%(body)s(?:\\(?:u[0-9a-fA-F]{0,3})?)?\Z
+    | [^ \t\n\r{}\[\],:"]+
+    | .""" % {"body": _STRING_BODY, "scalar": _SCALAR_RE},
+    re.VERBOSE | re.DOTALL,
+)
+_JSON_JUNK = re.compile(r'[^ \t\n\r{}\[\],:"]+')
+# small enough that one findall() never holds the GIL for long
+_JSON_CHUNK = 1 << 18
+
+# token kinds, by first character
+_WS, _STRING, _SCALAR, _OPEN_OBJ, _OPEN_ARR, _CLOSE_OBJ, _CLOSE_ARR, _COMMA, _COLON = range(9)
+_JSON_KIND = {
+    " ": _WS, "\t": _WS, "\n": _WS, "\r": _WS, '"': _STRING,
+    "{": _OPEN_OBJ, "[": _OPEN_ARR, "}": _CLOSE_OBJ, "]": _CLOSE_ARR, ",": _COMMA, ":": _COLON,
+}
+
+# Parser states. Containers push the state to return to once they close.
+(_TOP, _DONE, _OBJ_FIRST, _OBJ_KEY, _OBJ_COLON, _OBJ_VALUE, _OBJ_NEXT,
+ _ARR_FIRST, _ARR_VALUE, _ARR_NEXT) = range(10)
+_ERR, _PUSH_OBJ, _PUSH_ARR, _POP = -1, -2, -3, -4
+# states that take a value, and where each goes once the value is complete
+_AFTER_VALUE = {_TOP: _DONE, _OBJ_VALUE: _OBJ_NEXT, _ARR_FIRST: _ARR_NEXT, _ARR_VALUE: _ARR_NEXT}
+
+
+def _transitions() -> List[List[int]]:
+    table = [[_ERR] * 9 for _ in range(10)]
+    for state, after in _AFTER_VALUE.items():
+        table[state][_STRING] = table[state][_SCALAR] = after
+        table[state][_OPEN_OBJ] = _PUSH_OBJ
+        table[state][_OPEN_ARR] = _PUSH_ARR
+    table[_OBJ_FIRST][_STRING] = table[_OBJ_KEY][_STRING] = _OBJ_COLON
+    table[_OBJ_FIRST][_CLOSE_OBJ] = table[_OBJ_NEXT][_CLOSE_OBJ] = _POP
+    table[_OBJ_COLON][_COLON] = _OBJ_VALUE
+    table[_OBJ_NEXT][_COMMA] = _OBJ_KEY
+    table[_ARR_FIRST][_CLOSE_ARR] = table[_ARR_NEXT][_CLOSE_ARR] = _POP
+    table[_ARR_NEXT][_COMMA] = _ARR_VALUE
+    return table
+
+
+_TABLE = _transitions()
+
+
+def _json_pass(text: str, indent: str | None, emit: bool, progress: Progress | None) -> str:
+    """
+    Tokenize `text` slice by slice, checking the grammar as it goes.
+
+    With `emit`, tokens are written back out: pretty-printed with `indent`,
+    or minified when it is None. Each slice's output is joined on its own so
+    memory stays near the size of the result.
+    """
+    n = len(text)
+    chunks: List[str] = []
+    stack: List[int] = []
+    state = _TOP
+    pending_open = False  # an opener was written; its newline waits for a non-closer
+    kinds, table, after_value = _JSON_KIND, _TABLE, _AFTER_VALUE
+    pretty = emit and indent is not None
+    pos = 0
+    step = _JSON_CHUNK
+    while pos < n:
+        end = min(n, pos + step)
+        tokens = _JSON_TOKEN.findall(text, pos, end)
+        if end < n:
+            if len(tokens) < 2:
+                step *= 2  # one token longer than a slice
+                continue
+            last = tokens.pop()
+            # malformed tokens come back empty, so their length is unknown
+            next_pos = end - len(last) if last else pos + sum(map(len, tokens))
+            step = _JSON_CHUNK
+        else:
+            next_pos = end
+        bad = tokens.index("") if "" in tokens else -1
+        if bad >= 0:
+            del tokens[bad:]  # the grammar may still fail before it
+        out: List[str] = []
+        append = out.append
+
+        for i, tok in enumerate(tokens):
+            kind = kinds.get(tok[0], _SCALAR)
+            if kind == _WS:
+                continue
+            nxt = table[state][kind]
+            if nxt >= 0:
+                state = nxt
+            elif nxt == _PUSH_OBJ or nxt == _PUSH_ARR:
+                stack.append(after_value[state])
+                state = _OBJ_FIRST if nxt == _PUSH_OBJ else _ARR_FIRST
+            elif nxt == _POP:
+                state = stack.pop()
+            else:
+                at = pos + sum(map(len, tokens[:i]))
+                raise _error_at(text, at, _unexpected(tok, state))
+
+            if not pretty:
+                if emit:
+                    append(tok)
+                continue
+            depth = len(stack)
+            if pending_open:
+                pending_open = False
+                if kind != _CLOSE_OBJ and kind != _CLOSE_ARR:
+                    append("\n" + indent * (depth - 1 if nxt == _PUSH_OBJ or nxt == _PUSH_ARR else depth))
+            elif nxt == _POP:
+                append("\n" + indent * depth)
+            if kind == _COMMA:
+                append(",\n" + indent * depth)
+            elif kind == _COLON:
+                append(": ")
+            else:
+                append(tok)
+                pending_open = nxt == _PUSH_OBJ or nxt == _PUSH_ARR
+
+        if bad >= 0:
+            at = pos + sum(map(len, tokens))
+            raise _error_at(text, at, _bad_token(text, at))
+        if emit:
+            chunks.append("".join(out))
+        pos = next_pos
+        if progress is not None:
+            progress(pos / n)
+
+    if state != _DONE:
+        raise _error_at(text, n, "empty document" if state == _TOP else "unexpected end of input")
+    if pretty:
+        chunks.append("\n")
+    return "".join(chunks)
+
+
+def _unexpected(tok: str, state: int) -> str:
+    if state == _DONE:
+        return f"unexpected {tok[:20]!r} after the top-level value"
+    if state in (_OBJ_FIRST, _OBJ_KEY):
+        return "expected a string key"
+    return f"unexpected {tok[:20]!r}"
+
+
+def _bad_token(text: str, at: int) -> str:
+    if text[at] == '"':
+        return "invalid string (unterminated, bad escape or control character)"
+    m = _JSON_JUNK.match(text, at)
+    return f"unexpected {(m.group() if m else text[at])[:20]!r}"
+
+
+def format_json(text: str, indent: int = 4, progress: Progress | None = None) -> str:
+    return _json_pass(text, " " * indent, True, progress)
+
+
+def minify_json(text: str, progress: Progress | None = None) -> str:
+    return _json_pass(text, None, True, progress)
+
+
+def validate_json(text: str, progress: Progress | None = None) -> None:
+    _json_pass(text, None, False, progress)
+
+
+# ---------------------------------------------------------------------------
+# XML
+# ---------------------------------------------------------------------------
+
+_XML_TOKEN = re.compile(
+    r"""<!--.*?-->
+      | <!\[CDATA\[.*?\]\]>
+      | <\?.*?\?>
+      | <!(?:[^\[>]|\[.*?\])*>
+      | </[^>]*>
+      | <[^>]*?/>
+      | <[^>]*>
+      | [^<]+""",
+    re.VERBOSE | re.DOTALL,
+)
+
+
+def validate_xml(text: str, progress: Progress | None = None) -> None:
+    """Well-formedness check with expat, fed slice by slice."""
+    from xml.parsers import expat
+
+    parser = expat.ParserCreate()
+    size = max(1, len(text))
+    try:
+        for i in range(0, len(text), _XML_CHUNK):
+            parser.Parse(text[i:i + _XML_CHUNK], False)
+            if progress is not None:
+                progress(min(1.0, (i + _XML_CHUNK) / size))
+        parser.Parse("", True)
+    except expat.ExpatError as exc:
+        raise FormatError(expat.ErrorString(exc.code), exc.lineno, exc.offset + 1) from None
+
+
+_XML_SPACE = re.compile(r"""\sxml:space\s*=\s*(["'])(preserve|default)\1""")
+
+
+def _xml_verbatim(text: str, progress: Progress | None) -> set[int]:
+    """
+    Offsets of the start tags whose content must be kept as it is: mixed
+    content (character data or CDATA next to the children) or xml:space="preserve".
+    """
+    size = max(1, len(text))
+    keep: set[int] = set()
+    # [start tag offset, content must be kept]
+    stack: List[list] = []
+    n = 0
+    for m in _XML_TOKEN.finditer(text):
+        tok = m.group()
+        if tok[0] != "<" or tok.startswith("<![CDATA["):
+            if stack and (tok[0] == "<" or tok.strip()):
+                stack[-1][1] = True
+        elif tok.startswith("</"):
+            if stack:
+                start, kept = stack.pop()
+                if kept:
+                    keep.add(start)
+        elif not tok.startswith(("<!", "<?")) and not tok.endswith("/>"):
+            space = _XML_SPACE.search(tok)
+            stack.append([m.start(), space is not None and space.group(2) == "preserve"])
+        n += 1
+        if progress is not None and n % _BATCH == 0:
+            progress(m.end() / size)
+    return keep
+
+
+def _xml_pass(text: str, indent: str | None, progress: Progress | None) -> str:
+    # the token regex is lenient; expat has already vouched for the input.
+    # Only whitespace between tags is layout: character data, CDATA and the
+    # insides of elements holding them are copied unchanged.
+    scan, emit = _halves(progress)
+    keep = _xml_verbatim(text, scan)
+    size = max(1, len(text))
+    chunks: List[str] = []
+    out: List[str] = []
+    depth = 0
+    # depth of the element being copied unchanged, if any
+    verbatim: int | None = None
+    # the last token was a start tag (an element without content stays on one line)
+    opened = False
+    n = 0
+
+    def newline(d: int) -> None:
+        if indent is not None and (out or chunks):
+            out.append("\n" + indent * d)
+
+    for m in _XML_TOKEN.finditer(text):
+        tok = m.group()
+        is_end = tok.startswith("</")
+        is_start = not is_end and tok[0] == "<" and not tok.startswith(("<!", "<?")) and not tok.endswith("/>")
+        if verbatim is not None:
+            out.append(tok)
+            opened = False
+            if is_end:
+                depth -= 1
+                if depth == verbatim:
+                    verbatim = None
+            elif is_start:
+                depth += 1
+        elif tok[0] != "<":
+            # whitespace between tags
+            if tok.strip():
+                out.append(tok)
+                opened = False
+            continue
+        elif is_end:
+            depth -= 1
+            if not opened:
+                newline(depth)
+            out.append(tok)
+            opened = False
+        else:
+            newline(depth)
+            out.append(tok)
+            opened = is_start
+            if is_start:
+                if m.start() in keep:
+                    verbatim = depth
+                depth += 1
+
+        n += 1
+        if n % _BATCH == 0:
+            if emit is not None:
+                emit(m.end() / size)
+            chunks.append("".join(out))
+            out.clear()
+
+    chunks.append("".join(out))
+    if indent is not None:
+        chunks.append("\n")
+    return "".join(chunks)
+
+
+def _halves(progress: Progress | None) -> tuple[Progress | None, Progress | None]:
+    """Split one progress range over a check pass and a rewrite pass."""
+    if progress is None:
+        return None, None
+    return (lambda f: progress(f / 2)), (lambda f: progress(0.5 + f / 2))
+
+
+def format_xml(text: str, indent: int = 4, progress: Progress | None = None) -> str:
+    check, rewrite = _halves(progress)
+    validate_xml(text, check)
+    return _xml_pass(text, " " * indent, rewrite)
+
+
+def minify_xml(text: str, progress: Progress | None = None) -> str:
+    check, rewrite = _halves(progress)
+    validate_xml(text, check)
+    return _xml_pass(text, None, rewrite)
+
+
+# ---------------------------------------------------------------------------
+# YAML / TOML (checks only)
+# ---------------------------------------------------------------------------
+
+def validate_yaml(text: str, progress: Progress | None = None) -> None:
+    try:
+        import yaml
+    except ImportError:
+        raise RuntimeError("YAML checks need PyYAML (pip install smarttext[yaml])") from None
+    loader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+    size = max(1, len(text))
+    try:
+        for i, event in enumerate(yaml.parse(text, Loader=loader)):
+            if progress is not None and i % _BATCH == 0 and event.start_mark is not None:
+                progress(event.start_mark.index / size)
+    except yaml.MarkedYAMLError as exc:
+        mark = exc.problem_mark or exc.context_mark
+        line, col = (mark.line + 1, mark.column + 1) if mark is not None else (1, 1)
+        raise FormatError(exc.problem or exc.context or "invalid YAML", line, col) from None
+
+
+_TOML_AT = re.compile(r"\s*\(at (?:line (\d+), column (\d+)|end of document)\)")
+
+
+def validate_toml(text: str, progress: Progress | None = None) -> None:
+    try:
+        import tomllib
+    except ImportError:  # Python < 3.11
+        raise RuntimeError("TOML checks need Python 3.11 or newer") from None
+    try:
+        tomllib.loads(text)
+    except tomllib.TOMLDecodeError as exc:
+        msg = str(exc)
+        m = _TOML_AT.search(msg)
+        if m and m.group(1):
+            line, col = int(m.group(1)), int(m.group(2))
+        else:
+            line = text.count("\n") + 1
+            col = len(text) - text.rfind("\n")
+        raise FormatError(_TOML_AT.sub("", msg), line, col) from None
+
+
+_ACTIONS = {
+    ("json", "format"): format_json,
+    ("json", "minify"): minify_json,
+    ("json", "validate"): validate_json,
+    ("xml", "format"): format_xml,
+    ("xml", "minify"): minify_xml,
+    ("xml", "validate"): validate_xml,
+    ("yaml", "validate"): validate_yaml,
+    ("toml", "validate"): validate_toml,
+}
+
+
+def run_action(kind: str, action: str, text: str, progress: Progress | None = None) -> str | None:
+    """Run `action` ("format", "minify" or "validate"); returns the new text, or None for checks."""
+    fn = _ACTIONS[(kind, action)]
+    result = fn(text, progress=progress)
+    return result if action != "validate" else None
+
+
+@lru_cache(maxsize=None)
+def _installed(module: str) -> bool:
+    try:
+        return find_spec(module) is not None
+    except (ImportError, ValueError):
+        return False
+
+
+def supports(kind: str | None, action: str) -> bool:
+    """Whether `action` can run on `kind` here (its parser, if optional, is installed)."""
+    if (kind, action) not in _ACTIONS:
+        return False
+    module = _REQUIRES.get(kind)
+    return module is None or _installed(module)
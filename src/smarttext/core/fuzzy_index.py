@@ -0,0 +1,255 @@
+from __future__ import annotations
+
+import base64
+import heapq
+import re
+import sys
+from array import array
+from bisect import bisect_left, bisect_right
+from typing import Any, Dict, Iterable, List, Tuple
+
+_BOUNDARY = set("/\\_-. ")
+
+# possessive quantifiers arrived in Python 3.11
+_STAR = "*+" if sys.version_info >= (3, 11) else "*"
+
+
+def _norm(s: str) -> str:
+    """Lowercase and keep only alphanumerics (what trigrams are built from)."""
+    return "".join(ch for ch in s.lower() if ch.isalnum())
+
+
+def _trigrams(s: str) -> set[str]:
+    return {s[i:i + 3] for i in range(len(s) - 2)}
+
+
+def _sorted_contains(lst: array, value: int) -> bool:
+    i = bisect_left(lst, value)
+    return i < len(lst) and lst[i] == value
+
+
+def _basename_start(path: str) -> int:
+    return max(path.rfind("/"), path.rfind("\\")) + 1
+
+
+def fuzzy_score(query: str, path: str) -> float:
+    """
+    Score `query` (lowercase, no spaces) as a subsequence of `path`.
+    Returns 0.0 when it isn't a subsequence. Matches in the file name,
+    consecutive runs and matches on word boundaries score higher.
+    """
+    if not query:
+        return 1.0
+    low = path.lower()
+    base = _basename_start(path)
+
+    # try the file name first, fall back to the whole path
+    for start, bonus in ((base, 2.0), (0, 1.0)):
+        score = 0.0
+        run = 0
+        pos = start
+        ok = True
+        for ch in query:
+            i = low.find(ch, pos)
+            if i < 0:
+                ok = False
+                break
+            if i == pos and i != start:
+                run += 1
+                score += 2.0 + run
+            else:
+                run = 0
+                score += 1.0
+            if i == start or low[i - 1] in _BOUNDARY or (path[i].isupper() and path[i - 1].islower()):
+                score += 3.0
+            pos = i + 1
+        if ok:
+            # shorter paths first among equal matches
+            return (score * bonus) + 10.0 / (1 + len(path) - start)
+    return 0.0
+
+
+class FuzzyIndex:
+    """
+    Trigram + subsequence index over file paths.
+
+    Paths get a stable integer id; every trigram of the (normalized) file name maps
+    to a sorted `array('I')` posting list. A query first intersects the posting
+    lists of its own trigrams (smallest list first) and only then runs the
+    comparatively slow subsequence scorer on the survivors.
+
+    One thread mutates the index while searches may run on another: paths
+    and posting lists only grow or get tombstoned, which a search tolerates.
+    `to_dict()` compacts in place and must not overlap a search.
+    """
+
+    def __init__(self, paths: Iterable[str] = ()) -> None:
+        self._paths: List[str | None] = []
+        self._ids: Dict[str, int] = {}
+        self._grams: Dict[str, array] = {}
+        self._dead = 0
+        # bumped by every change; tells whether the scan blob is current
+        self._version = 0
+        # (version, newline-joined lowercase paths, start of each) for the
+        # regex subsequence scan, built lazily
+        self._blob: Tuple[int, str, array] | None = None
+        for p in paths:
+            self.add(p)
+
+    def __len__(self) -> int:
+        return len(self._ids)
+
+    def __contains__(self, path: str) -> bool:
+        return path in self._ids
+
+    def paths(self) -> List[str]:
+        return [p for p in self._paths if p is not None]
+
+    # ---------- mutation ----------
+    def add(self, path: str) -> None:
+        if path in self._ids:
+            return
+        pid = len(self._paths)
+        self._paths.append(path)
+        self._ids[path] = pid
+        self._version += 1
+        # ids only grow, so appending keeps every posting list sorted
+        for g in _trigrams(_norm(path[_basename_start(path):])):
+            lst = self._grams.get(g)
+            if lst is None:
+                lst = self._grams[g] = array("I")
+            lst.append(pid)
+
+    def remove(self, path: str) -> None:
+        pid = self._ids.pop(path, None)
+        if pid is None:
+            return
+        # tombstone; posting lists are filtered lazily and compacted on save/load
+        self._paths[pid] = None
+        self._dead += 1
+        self._version += 1
+
+    def remove_prefix(self, prefix: str) -> None:
+        for p in [p for p in self._ids if p.startswith(prefix)]:
+            self.remove(p)
+
+    # ---------- query ----------
+    def _candidates(self, query: str) -> Iterable[int] | None:
+        grams = _trigrams(_norm(query[_basename_start(query):]))
+        if not grams:
+            return None
+        lists = []
+        for g in grams:
+            lst = self._grams.get(g)
+            if lst is None:
+                return ()
+            lists.append(lst)
+        lists.sort(key=len)
+        result = set(lists[0])
+        for lst in lists[1:]:
+            if len(result) * 16 < len(lst):
+                # few survivors: binary-search them in the (sorted) posting list
+                result = {pid for pid in result if _sorted_contains(lst, pid)}
+            else:
+                result.intersection_update(lst)
+            if not result:
+                break
+        return sorted(result)
+
+    def _scan_blob(self) -> Tuple[str, array]:
+        cached = self._blob
+        version = self._version
+        if cached is not None and cached[0] == version:
+            return cached[1], cached[2]
+        # built from the paths as of `version`: a change made meanwhile (on
+        # the other thread) leaves it stale, and the next scan rebuilds it
+        lowered = [(p or "").lower() for p in self._paths]
+        starts = array("q")
+        pos = 0
+        for p in lowered:
+            starts.append(pos)
+            pos += len(p) + 1
+        blob = "\n".join(lowered)
+        self._blob = (version, blob, starts)
+        return blob, starts
+
+    def _scan_candidates(self, query: str) -> Iterable[int]:
+        blob, starts = self._scan_blob()
+
+        # "a[^b\n]*+b[^c\n]*+c…" has exactly one way to match from each "a", so the
+        # blob is scanned at C speed without backtracking
+        first, rest = query[0], query[1:]
+        pattern = re.escape(first) + "".join(
+            f"[^{re.escape(ch)}\\n]{_STAR}{re.escape(ch)}" for ch in rest
+        )
+        last = -1
+        for m in re.finditer(pattern, blob):
+            pid = bisect_right(starts, m.start()) - 1
+            if pid != last:
+                last = pid
+                yield pid
+
+    def search(self, query: str, limit: int = 50) -> List[Tuple[float, str]]:
+        q = "".join(query.lower().split())
+        if not q:
+            return []
+
+        best = self._best(q, self._candidates(q) or (), limit)
+        if not best:
+            # short or scattered (non-substring) query: regex subsequence scan
+            best = self._best(q, self._scan_candidates(q), limit)
+        return best
+
+    def _best(self, query: str, ids: Iterable[int], limit: int) -> List[Tuple[float, str]]:
+        """The `limit` best matches among `ids`; every candidate is scored before any is dropped."""
+        paths = self._paths
+
+        def scored():
+            for pid in ids:
+                p = paths[pid]
+                if p is None:
+                    continue
+                s = fuzzy_score(query, p)
+                if s > 0:
+                    yield s, p
+
+        return heapq.nlargest(limit, scored())
+
+    # ---------- persistence ----------
+    def to_dict(self) -> Dict[str, Any]:
+        if self._dead:
+            self._compact()
+        return {
+            "paths": self._paths,
+            "grams": {
+                g: base64.b64encode(lst.tobytes()).decode("ascii")
+                for g, lst in self._grams.items()
+            },
+        }
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "FuzzyIndex":
+        idx = cls()
+        paths = [str(p) for p in data.get("paths", [])]
+        grams = data.get("grams")
+        if not isinstance(grams, dict):
+            # older/partial file: rebuild postings from the path list
+            return cls(paths)
+        idx._paths = list(paths)
+        idx._ids = {p: i for i, p in enumerate(paths)}
+        for g, b64 in grams.items():
+            lst = array("I")
+            lst.frombytes(base64.b64decode(b64))
+            idx._grams[g] = lst
+        return idx
+
+    def _compact(self) -> None:
+        live = self.paths()
+        fresh = FuzzyIndex(live)
+        self._paths, self._ids, self._grams, self._dead = (
+            fresh._paths,
+            fresh._ids,
+            fresh._grams,
+            0,
+        )
+        self._version += 1
@@ -0,0 +1,145 @@
+from __future__ import annotations
+
+import codecs
+import mmap
+import re
+from pathlib import Path
+from typing import TYPE_CHECKING
+
+if TYPE_CHECKING:
+    from .formatting import Progress
+
+# bytes looked at when deciding whether a file is text
+SNIFF_BYTES = 8192
+BYTES_PER_ROW = 16
+# searches scan the file this many bytes at a time, reporting progress in between
+_SEARCH_CHUNK = 1 << 24
+
+# printable ASCII as is, everything else as "."
+_PRINTABLE = bytes(b if 0x20 <= b < 0x7F else 0x2E for b in range(256))
+_HEX_DIGITS = re.compile(r"(?:0x)?([0-9a-fA-F]+)")
+
+
+def looks_binary(head: bytes) -> bool:
+    """Whether a file starting with `head` must not be opened as UTF-8 text."""
+    if b"\0" in head:
+        return True
+    try:
+        # not final: `head` may end in the middle of a multi-byte character
+        codecs.getincrementaldecoder("utf-8")().decode(head, final=False)
+    except UnicodeDecodeError:
+        return True
+    return False
+
+
+def format_row(chunk: bytes) -> tuple[str, str]:
+    """Hex column (two groups of eight) and printable-ASCII column for one row of bytes."""
+    half = BYTES_PER_ROW // 2
+    hex_part = chunk[:half].hex(" ")
+    if len(chunk) > half:
+        hex_part += "  " + chunk[half:].hex(" ")
+    return hex_part, chunk.translate(_PRINTABLE).decode("ascii")
+
+
+def parse_offset(text: str) -> int:
+    """A byte offset typed as hex, with or without "0x" (ValueError otherwise)."""
+    m = _HEX_DIGITS.fullmatch(text.strip())
+    if m is None:
+        raise ValueError(f"not a hex offset: {text!r}")
+    return int(m.group(1), 16)
+
+
+def parse_pattern(text: str) -> bytes:
+    """
+    Bytes to search for: hex pairs ("de ad be ef", "0xDEADBEEF"), or text in
+    double quotes, encoded as UTF-8. ValueError for anything else.
+    """
+    text = text.strip()
+    if len(text) >= 2 and text[0] == text[-1] == '"':
+        pattern = text[1:-1].encode("utf-8")
+    else:
+        digits = "".join(text.split())
+        if digits[:2].lower() == "0x":
+            digits = digits[2:]
+        try:
+            pattern = bytes.fromhex(digits)
+        except ValueError:
+            raise ValueError('use hex bytes like "de ad", or "text" in quotes') from None
+    if not pattern:
+        raise ValueError("nothing to search for")
+    return pattern
+
+
+class HexFile:
+    """
+    A file's bytes, mapped read-only.
+
+    Nothing is read up front; rows are sliced out of the mapping when they are
+    shown, so memory use does not depend on the file size.
+    """
+
+    def __init__(self, path: Path) -> None:
+        self.path = path
+        with open(path, "rb") as f:
+            size = f.seek(0, 2)
+            # empty files cannot be mapped
+            self._data: mmap.mmap | bytes = (
+                mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ) if size else b""
+            )
+        self.size = size
+
+    def close(self) -> None:
+        if isinstance(self._data, mmap.mmap):
+            self._data.close()
+        self._data = b""
+        self.size = 0
+
+    def _drop(self, a: int, b: int) -> None:
+        # let go of pages a search has read, so scanning the whole file does not
+        # leave all of it resident; they are read back from the file if needed
+        if isinstance(self._data, mmap.mmap) and hasattr(mmap, "MADV_DONTNEED"):
+            a -= a % mmap.PAGESIZE
+            self._data.madvise(mmap.MADV_DONTNEED, a, b - a)
+
+    def rows(self) -> int:
+        return -(-self.size // BYTES_PER_ROW)
+
+    def row(self, i: int) -> bytes:
+        start = i * BYTES_PER_ROW
+        return self._data[start:start + BYTES_PER_ROW]
+
+    def find(self, pattern: bytes, start: int, forward: bool = True, progress: Progress | None = None) -> int:
+        """
+        Offset of the first `pattern` at or after `start` (or, backwards, the last
+        one before it), wrapping around the file once; -1 if there is none.
+        """
+        data, n, m = self._data, self.size, len(pattern)
+        if not m or m > n:
+            return -1
+        start = max(0, min(start, n))
+        # match starts are looked for in [lo, hi); a chunk's search window runs
+        # m - 1 bytes past its end so matches that straddle chunks are found
+        spans = ((start, n), (0, start)) if forward else ((0, start), (start, n))
+        scanned = 0
+        for lo, hi in spans:
+            if forward:
+                for a in range(lo, hi, _SEARCH_CHUNK):
+                    b = min(hi, a + _SEARCH_CHUNK)
+                    i = data.find(pattern, a, min(n, b + m - 1))
+                    self._drop(a, min(n, b + m - 1))
+                    if i >= 0:
+                        return i
+                    scanned += b - a
+                    if progress is not None:
+                        progress(scanned / n)
+            else:
+                for b in range(hi, lo, -_SEARCH_CHUNK):
+                    a = max(lo, b - _SEARCH_CHUNK)
+                    i = data.rfind(pattern, a, min(n, b + m - 1))
+                    self._drop(a, min(n, b + m - 1))
+                    if i >= 0:
+                        return i
+                    scanned += b - a
+                    if progress is not None:
+                        progress(scanned / n)
+        return -1
@@ -0,0 +1,290 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_left, bisect_right
+from pathlib import Path
+from typing import Iterable, List, NamedTuple, Sequence
+
+# text is split in slices this big when hashing, to bound temporary memory
+_SCAN = 1 << 20
+# forward/backward search depth per bisection; past it a region is reported
+# as one replaced block instead of being aligned line by line
+_MAX_D = 1024
+# prefix/suffix trimming compares this many hashes at first, doubling on success
+_MIN_PROBE = 64
+
+ADDED = "added"
+MODIFIED = "modified"
+DELETED = "deleted"
+
+
+class Hunk(NamedTuple):
+    """Lines a[a0:a1] (old side) were replaced by b[b0:b1] (new side)."""
+
+    a0: int
+    a1: int
+    b0: int
+    b1: int
+
+    @property
+    def kind(self) -> str:
+        if self.a0 == self.a1:
+            return ADDED
+        if self.b0 == self.b1:
+            return DELETED
+        return MODIFIED
+
+
+def line_hashes(text: str) -> array:
+    """One 64-bit hash per line; two texts' hashes compare like their lines."""
+    out = array("q")
+    carry = ""
+    for i in range(0, len(text), _SCAN):
+        parts = text[i:i + _SCAN].split("\n")
+        if len(parts) == 1:
+            carry += parts[0]
+            continue
+        parts[0] = carry + parts[0]
+        carry = parts.pop()
+        out.extend(map(hash, parts))
+    out.append(hash(carry))
+    return out
+
+
+def _common_prefix(a: Sequence[int], a0: int, a1: int, b: Sequence[int], b0: int, b1: int) -> int:
+    n = min(a1 - a0, b1 - b0)
+    i = 0
+    step = _MIN_PROBE
+    while i < n:
+        j = min(n, i + step)
+        if a[a0 + i:a0 + j] == b[b0 + i:b0 + j]:
+            i = j
+            step *= 2
+            continue
+        while a[a0 + i] == b[b0 + i]:
+            i += 1
+        return i
+    return n
+
+
+def _common_suffix(a: Sequence[int], a0: int, a1: int, b: Sequence[int], b0: int, b1: int) -> int:
+    n = min(a1 - a0, b1 - b0)
+    i = 0
+    step = _MIN_PROBE
+    while i < n:
+        j = min(n, i + step)
+        if a[a1 - j:a1 - i] == b[b1 - j:b1 - i]:
+            i = j
+            step *= 2
+            continue
+        while a[a1 - 1 - i] == b[b1 - 1 - i]:
+            i += 1
+        return i
+    return n
+
+
+def _forward_run(a: Sequence[int], x: int, x1: int, b: Sequence[int], y: int, y1: int) -> int:
+    """Length of the common run starting at a[x], b[y] (a snake)."""
+    n = min(x1 - x, y1 - y)
+    k = 0
+    while k < n and k < 8:
+        if a[x + k] != b[y + k]:
+            return k
+        k += 1
+    return k if k == n else k + _common_prefix(a, x + k, x1, b, y + k, y1)
+
+
+def _backward_run(a: Sequence[int], x0: int, x: int, b: Sequence[int], y0: int, y: int) -> int:
+    """Length of the common run ending just before a[x], b[y]."""
+    n = min(x - x0, y - y0)
+    k = 0
+    while k < n and k < 8:
+        if a[x - 1 - k] != b[y - 1 - k]:
+            return k
+        k += 1
+    return k if k == n else k + _common_suffix(a, x0, x - k, b, y0, y - k)
+
+
+def _split_point(
+    a: Sequence[int], a0: int, a1: int, b: Sequence[int], b0: int, b1: int
+) -> tuple[int, int] | None:
+    """
+    Myers' linear-space bisection of a[a0:a1] vs b[b0:b1]: an absolute (x, y)
+    on an optimal edit path where the forward and backward searches meet.
+    None when no meeting point is found within _MAX_D steps.
+    """
+    n, m = a1 - a0, b1 - b0
+    max_d = min((n + m + 1) // 2, _MAX_D)
+    off = max_d
+    size = 2 * max_d + 2
+    vf = [-1] * size
+    vb = [-1] * size
+    vf[off + 1] = 0
+    vb[off + 1] = 0
+    delta = n - m
+    front = bool(delta & 1)
+    # diagonals that ran off the grid are skipped on later rounds
+    kf_start = kf_end = kb_start = kb_end = 0
+    for d in range(max_d):
+        for k in range(-d + kf_start, d + 1 - kf_end, 2):
+            i = off + k
+            if k == -d or (k != d and vf[i - 1] < vf[i + 1]):
+                x = vf[i + 1]
+            else:
+                x = vf[i - 1] + 1
+            y = x - k
+            if x < n and y < m:
+                step = _forward_run(a, a0 + x, a1, b, b0 + y, b1)
+                x += step
+                y += step
+            vf[i] = x
+            if x > n:
+                kf_end += 2
+            elif y > m:
+                kf_start += 2
+            elif front:
+                j = off + delta - k
+                if 0 <= j < size and vb[j] != -1 and x >= n - vb[j]:
+                    return a0 + x, b0 + y
+        for k in range(-d + kb_start, d + 1 - kb_end, 2):
+            i = off + k
+            if k == -d or (k != d and vb[i - 1] < vb[i + 1]):
+                x = vb[i + 1]
+            else:
+                x = vb[i - 1] + 1
+            y = x - k
+            if x < n and y < m:
+                step = _backward_run(a, a0, a1 - x, b, b0, b1 - y)
+                x += step
+                y += step
+            vb[i] = x
+            if x > n:
+                kb_end += 2
+            elif y > m:
+                kb_start += 2
+            elif not front:
+                j = off + delta - k
+                if 0 <= j < size and vf[j] != -1:
+                    fx = vf[j]
+                    if fx >= n - x:
+                        return a0 + fx, b0 + fx - (j - off)
+    return None
+
+
+def diff_hashes(
+    a: Sequence[int], b: Sequence[int], a0: int = 0, a1: int | None = None,
+    b0: int = 0, b1: int | None = None,
+) -> List[Hunk]:
+    """Changed regions between a[a0:a1] and b[b0:b1], in order, adjacent ones merged."""
+    a1 = len(a) if a1 is None else a1
+    b1 = len(b) if b1 is None else b1
+    hunks: List[Hunk] = []
+
+    def emit(h: Hunk) -> None:
+        if hunks and hunks[-1].a1 == h.a0 and hunks[-1].b1 == h.b0:
+            hunks[-1] = Hunk(hunks[-1].a0, h.a1, hunks[-1].b0, h.b1)
+        else:
+            hunks.append(h)
+
+    stack = [(a0, a1, b0, b1)]
+    while stack:
+        x0, x1, y0, y1 = stack.pop()
+        p = _common_prefix(a, x0, x1, b, y0, y1)
+        x0 += p
+        y0 += p
+        s = _common_suffix(a, x0, x1, b, y0, y1)
+        x1 -= s
+        y1 -= s
+        if x0 == x1 and y0 == y1:
+            continue
+        if x0 == x1 or y0 == y1:
+            emit(Hunk(x0, x1, y0, y1))
+            continue
+        split = _split_point(a, x0, x1, b, y0, y1)
+        if split is None:
+            emit(Hunk(x0, x1, y0, y1))
+            continue
+        x, y = split
+        # right half is pushed first so the left one is emitted first
+        stack.append((x, x1, y, y1))
+        stack.append((x0, x, y0, y))
+    return hunks
+
+
+def read_saved_lines(path: Path, hashes: Sequence[int], first: int, last: int) -> List[str] | None:
+    """
+    Lines [first, last) of the file at `path`, or None when it no longer matches
+    the `hashes` it was saved with (changed on disk, gone, unreadable).
+    """
+    try:
+        text = path.read_text(encoding="utf-8", errors="replace")
+    except OSError:
+        return None
+    lines = text.split("\n")
+    if len(lines) != len(hashes):
+        return None
+    out = lines[first:last]
+    if any(hash(line) != h for line, h in zip(out, hashes[first:last])):
+        return None
+    return out
+
+
+class ChangeTracker:
+    """
+    Lines changed since the last save, kept as hunks of `baseline` vs `current`.
+
+    Both sides are line hashes only; the saved text itself is re-read from disk
+    on demand. Edits re-diff just the window between the nearest unchanged
+    lines around them, so typing never rediffs the whole file.
+    """
+
+    # windows bigger than this are left to a full rediff off the GUI thread
+    MAX_WINDOW = 5_000
+
+    def __init__(self, baseline: array, current: array, hunks: Iterable[Hunk] | None = None) -> None:
+        self.baseline = baseline
+        self.current = current
+        self.hunks: List[Hunk] = list(diff_hashes(baseline, current) if hunks is None else hunks)
+
+    def mark_saved(self) -> None:
+        self.baseline = array("q", self.current)
+        self.hunks = []
+
+    def on_edit(self, first: int, old_count: int, new_hashes: array) -> bool:
+        """
+        Lines [first, first + old_count) were replaced by lines hashing to
+        `new_hashes`. Returns False when the window is too big to re-diff here.
+        """
+        e0, e1 = first, first + old_count
+        hunks = self.hunks
+        # hunks touching [e0, e1], adjacency included
+        i0 = bisect_left(hunks, e0, key=lambda h: h.b1)
+        i1 = bisect_right(hunks, e1, key=lambda h: h.b0)
+        w0 = min(e0, hunks[i0].b0) if i0 < i1 else e0
+        w1 = max(e1, hunks[i1 - 1].b1) if i0 < i1 else e1
+        before = hunks[i0 - 1] if i0 > 0 else None
+        shift0 = before.a1 - before.b1 if before else 0
+        last = hunks[i1 - 1] if i1 > 0 else None
+        shift1 = last.a1 - last.b1 if last else 0
+        a0, a1 = w0 + shift0, w1 + shift1
+
+        delta = len(new_hashes) - old_count
+        self.current[e0:e1] = new_hashes
+        if (a1 - a0) + (w1 + delta - w0) > self.MAX_WINDOW:
+            return False
+        fresh = diff_hashes(self.baseline, self.current, a0, a1, w0, w1 + delta)
+        tail = [Hunk(h.a0, h.a1, h.b0 + delta, h.b1 + delta) for h in hunks[i1:]] if delta else hunks[i1:]
+        self.hunks = hunks[:i0] + fresh + tail
+        return True
+
+    def hunks_between(self, first: int, last: int) -> List[Hunk]:
+        """Hunks touching current lines [first, last]."""
+        # a deletion (b0 == b1) sits on the line that now follows it
+        i0 = bisect_right(self.hunks, first, key=lambda h: max(h.b1, h.b0 + 1))
+        i1 = bisect_right(self.hunks, last, key=lambda h: h.b0)
+        return self.hunks[i0:i1]
+
+    def hunk_at(self, line: int) -> Hunk | None:
+        for h in self.hunks_between(line, line):
+            return h
+        return None
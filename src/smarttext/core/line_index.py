@@ -0,0 +1,147 @@
+from __future__ import annotations
+
+from array import array
+from bisect import bisect_right
+from itertools import accumulate
+from typing import Iterable, List
+
+from .document import TextEdit
+
+# lines per chunk; chunks split at twice this and are never merged below one
+_CHUNK_LINES = 1024
+# text is scanned in slices this big when building, to bound temporary memory
+_SCAN = 1 << 20
+
+
+class LineIndex:
+    """
+    Line lengths (without the trailing newline) stored in chunks of `array('q')`.
+
+    Offsets are derived from cached per-chunk prefix sums, so an edit only
+    rewrites the chunk(s) it touches plus an O(chunks) re-accumulation on the
+    next lookup — never an O(lines) shift of every following offset.
+    """
+
+    def __init__(self, lengths: Iterable[int] = (0,)) -> None:
+        flat = array("q", lengths)
+        if not flat:
+            flat.append(0)
+        self._chunks: List[array] = [
+            flat[i:i + _CHUNK_LINES] for i in range(0, len(flat), _CHUNK_LINES)
+        ]
+        # chars per chunk, every line counting its newline (the last line's missing
+        # one never matters because nothing is looked up past the end)
+        self._chars: List[int] = [sum(c) + len(c) for c in self._chunks]
+        self._cum_lines: List[int] | None = None
+        self._cum_chars: List[int] | None = None
+
+    @classmethod
+    def from_text(cls, text: str) -> "LineIndex":
+        lengths = array("q")
+        carry = 0
+        for i in range(0, len(text), _SCAN):
+            parts = text[i:i + _SCAN].split("\n")
+            tail = len(parts.pop())
+            if parts:
+                first = len(parts[0]) + carry
+                lengths.append(first)
+                lengths.extend(map(len, parts[1:]))
+                carry = tail
+            else:
+                carry += tail
+        lengths.append(carry)
+        return cls(lengths)
+
+    # ---------- prefix sums ----------
+    def _sums(self) -> tuple[List[int], List[int]]:
+        if self._cum_lines is None or self._cum_chars is None:
+            self._cum_lines = [0, *accumulate(map(len, self._chunks))]
+            self._cum_chars = [0, *accumulate(self._chars)]
+        return self._cum_lines, self._cum_chars
+
+    def _locate(self, line: int) -> tuple[int, int]:
+        cum_lines, _ = self._sums()
+        k = bisect_right(cum_lines, line) - 1
+        k = max(0, min(k, len(self._chunks) - 1))
+        return k, line - cum_lines[k]
+
+    # ---------- queries ----------
+    def __len__(self) -> int:
+        return self._sums()[0][-1]
+
+    def line_length(self, line: int) -> int:
+        k, j = self._locate(line)
+        return self._chunks[k][j]
+
+    def line_start(self, line: int) -> int:
+        k, j = self._locate(line)
+        chunk = self._chunks[k]
+        return self._sums()[1][k] + sum(chunk[:j]) + j
+
+    def line_end(self, line: int) -> int:
+        """Offset of the line's newline (or of the end of the text for the last line)."""
+        return self.line_start(line) + self.line_length(line)
+
+    def line_of(self, offset: int) -> int:
+        cum_lines, cum_chars = self._sums()
+        k = bisect_right(cum_chars, offset) - 1
+        k = max(0, min(k, len(self._chunks) - 1))
+        pos = cum_chars[k]
+        for j, n in enumerate(self._chunks[k]):
+            if offset <= pos + n:
+                return cum_lines[k] + j
+            pos += n + 1
+        return cum_lines[k] + len(self._chunks[k]) - 1
+
+    def lengths(self) -> array:
+        """Flat copy of every line length (for handing to worker threads)."""
+        out = array("q")
+        for c in self._chunks:
+            out.extend(c)
+        return out
+
+    def lengths_between(self, first: int, last: int) -> array:
+        """Lengths of lines [first, last)."""
+        out = array("q")
+        line = first
+        while line < last:
+            k, j = self._locate(line)
+            take = self._chunks[k][j:j + (last - line)]
+            out.extend(take)
+            line += len(take)
+        return out
+
+    # ---------- updates ----------
+    def apply(self, edit: TextEdit) -> None:
+        first = self.line_of(edit.start)
+        last = first + edit.removed.count("\n")
+        start_first = self.line_start(first)
+        k_last, j_last = self._locate(last)
+
+        head = edit.start - start_first  # chars of `first` kept before the edit
+        # chars of `last` kept after the edit
+        tail = self._chunks[k_last][j_last] - (edit.start + len(edit.removed) - self.line_start(last))
+
+        pieces = edit.inserted.split("\n")
+        if len(pieces) == 1:
+            new = array("q", (head + len(pieces[0]) + tail,))
+        else:
+            new = array("q", (head + len(pieces[0]),))
+            new.extend(map(len, pieces[1:-1]))
+            new.append(len(pieces[-1]) + tail)
+
+        self._replace(first, last, new)
+
+    def _replace(self, first: int, last: int, new: array) -> None:
+        """Replace lines [first, last] (inclusive) with `new` lengths."""
+        k0, j0 = self._locate(first)
+        k1, j1 = self._locate(last)
+        merged = self._chunks[k0][:j0] + new + self._chunks[k1][j1 + 1:]
+        if len(merged) <= 2 * _CHUNK_LINES:
+            parts = [merged]
+        else:
+            parts = [merged[i:i + _CHUNK_LINES] for i in range(0, len(merged), _CHUNK_LINES)]
+        self._chunks[k0:k1 + 1] = parts
+        self._chars[k0:k1 + 1] = [sum(p) + len(p) for p in parts]
+        self._cum_lines = None
+        self._cum_chars = None
@@ -0,0 +1,240 @@
+from __future__ import annotations
+
+import re
+from array import array
+from bisect import bisect_left
+from itertools import accumulate
+from operator import add
+from typing import TYPE_CHECKING, Iterator, List
+
+if TYPE_CHECKING:
+    from .formatting import Progress
+
+# operation name -> label used in status messages
+OPERATIONS = {
+    "sort": "Sorting lines",
+    "unique": "Removing duplicate lines",
+    "reverse": "Reversing lines",
+    "filter": "Filtering lines",
+    "exclude": "Filtering lines",
+    "column": "Extracting column",
+}
+
+# lines are handled a slice of about this many chars at a time
+_SLICE = 1 << 20
+# sorting: chars of lines sorted in memory per run before the runs are merged
+_RUN = 1 << 22
+# sorting: every this many lines of a sorted run is a candidate splitter
+_SAMPLE = 256
+
+
+def _body_end(text: str) -> tuple[int, str]:
+    """End of the lines proper: a final newline terminates the last line, it does not start another."""
+    if text.endswith("\n"):
+        return len(text) - 1, "\n"
+    return len(text), ""
+
+
+def _slices(text: str, n: int, size: int = _SLICE) -> Iterator[tuple[int, int]]:
+    """(start, end) of consecutive runs of whole lines in text[:n]; `end` excludes the newline."""
+    a = 0
+    while True:
+        b = text.find("\n", min(n, a + size), n) if a + size < n else -1
+        if b < 0:
+            yield a, n
+            return
+        yield a, b
+        a = b + 1
+
+
+def _report(progress: Progress | None, done: int, total: int) -> None:
+    if progress is not None:
+        progress(done / max(1, total))
+
+
+def sort_lines(text: str, progress: Progress | None = None) -> str:
+    """
+    Lines in ascending order.
+
+    Runs of up to _RUN chars are sorted in memory and kept only as arrays of
+    line offsets. The runs are then cut at shared splitter lines, and each
+    band is sliced back out of the text and merged on its own, so about one
+    run's worth of line strings is alive at a time.
+    """
+    n, tail = _body_end(text)
+    spans = list(_slices(text, n, _RUN))
+    if len(spans) == 1:
+        lines = text[:n].split("\n")
+        lines.sort()
+        _report(progress, 1, 1)
+        return "\n".join(lines) + tail
+
+    runs: List[tuple[array, array]] = []
+    samples: List[str] = []
+    for a, b in spans:
+        lines = text[a:b].split("\n")
+        starts = list(accumulate(map((1).__add__, map(len, lines[:-1])), initial=a))
+        ends = list(map(add, starts, map(len, lines)))
+        order = sorted(range(len(lines)), key=lines.__getitem__)
+        runs.append((array("q", [starts[i] for i in order]), array("q", [ends[i] for i in order])))
+        samples.extend(lines[i] for i in order[::_SAMPLE])
+        del lines, starts, ends, order
+        # sorting the runs is about half the work
+        _report(progress, b, 2 * n)
+
+    samples.sort()
+    bands = len(runs)
+    splitters = [samples[len(samples) * k // bands] for k in range(1, bands)]
+    del samples
+    get = text.__getitem__
+    lows = [0] * len(runs)
+    pieces: List[str] = []
+    for k in range(bands):
+        band: List[str] = []
+        for r, (starts, ends) in enumerate(runs):
+            lo = lows[r]
+            if k + 1 < bands:
+                hi = bisect_left(range(len(starts)), splitters[k], lo, key=lambda i: get(slice(starts[i], ends[i])))
+            else:
+                hi = len(starts)
+            band.extend(map(get, map(slice, starts[lo:hi], ends[lo:hi])))
+            lows[r] = hi
+        # each run's share is already sorted; the sort only merges them
+        if band:
+            band.sort()
+            pieces.append("\n".join(band))
+        del band
+        _report(progress, bands + k + 1, 2 * bands)
+    return "\n".join(pieces) + tail
+
+
+def unique_lines(text: str, progress: Progress | None = None) -> str:
+    """
+    Lines with repeats dropped, keeping each line where it first appears.
+
+    Seen lines are remembered by hash and offset rather than by their text;
+    a hash match is confirmed against the earlier line before dropping.
+    """
+    n, tail = _body_end(text)
+    seen: dict[int, int] = {}
+    # lines whose hash collided with a different line
+    spilled: set[str] = set()
+    startswith = text.startswith
+    pieces: List[str] = []
+    for a, b in _slices(text, n):
+        kept: List[str] = []
+        pos = a
+        for line in text[a:b].split("\n"):
+            h = hash(line)
+            first = seen.get(h)
+            if first is None:
+                seen[h] = pos
+                kept.append(line)
+            else:
+                end = first + len(line)
+                same = startswith(line, first) and (end == n or text[end] == "\n")
+                if not same and line not in spilled:
+                    spilled.add(line)
+                    kept.append(line)
+            pos += len(line) + 1
+        if kept:
+            pieces.append("\n".join(kept))
+        _report(progress, b, n)
+    return "\n".join(pieces) + tail
+
+
+def reverse_lines(text: str, progress: Progress | None = None) -> str:
+    n, tail = _body_end(text)
+    pieces: List[str] = []
+    for a, b in reversed(list(_slices(text, n))):
+        lines = text[a:b].split("\n")
+        lines.reverse()
+        pieces.append("\n".join(lines))
+        _report(progress, n - a, n)
+    return "\n".join(pieces) + tail
+
+
+def _matching_lines(pattern: re.Pattern, text: str, n: int, progress: Progress | None) -> Iterator[tuple[int, int]]:
+    """
+    (start, end) of every line in text[:n] containing a match, in order.
+
+    The pattern runs over a slice of lines at a time rather than line by
+    line; a match that runs past its line is re-checked against that line
+    alone.
+    """
+    search, find, rfind = pattern.search, text.find, text.rfind
+    for a, b in _slices(text, n):
+        pos = a
+        while pos <= b:
+            m = search(text, pos, b)
+            if m is None:
+                break
+            at = m.start()
+            s = rfind("\n", 0, at) + 1
+            e = find("\n", at, b)
+            if e < 0:
+                e = b
+            if m.end() <= e or search(text, s, e):
+                yield s, e
+            pos = e + 1
+        _report(progress, b, n)
+
+
+def filter_lines(
+    text: str, pattern: str, keep: bool = True, progress: Progress | None = None
+) -> str:
+    """
+    Lines that match `pattern` (or, with `keep` False, that do not).
+
+    `^` and `$` anchor at line boundaries. Non-matching stretches are copied
+    as whole slices, so excluding a few lines from a big file is cheap.
+    """
+    regex = re.compile(pattern, re.MULTILINE)
+    n, tail = _body_end(text)
+    pieces: List[str] = []
+    if keep:
+        for s, e in _matching_lines(regex, text, n, progress):
+            pieces.append(text[s:e])
+        return "\n".join(pieces) + tail if pieces else ""
+    prev = 0
+    for s, e in _matching_lines(regex, text, n, progress):
+        if s > prev:
+            pieces.append(text[prev:s - 1])
+        prev = e + 1
+    if prev <= n:
+        pieces.append(text[prev:n])
+    return "\n".join(pieces) + tail if pieces else ""
+
+
+def _column_regex(column: int, delimiter: str) -> re.Pattern:
+    if delimiter:
+        d = re.escape(delimiter)
+        field = rf"[^{d}\r\n]*"
+        head = rf"(?:{field}{d}){{{column - 1}}}({field})"
+    else:
+        # runs of blanks separate fields; leading blanks are ignored (like awk)
+        field = r"[^ \t\r\n]+"
+        head = rf"[ \t]*(?:{field}[ \t]+){{{column - 1}}}({field})"
+    return re.compile(rf"^(?:{head})?[^\n]*$", re.MULTILINE)
+
+
+def extract_column(
+    text: str, column: int, delimiter: str = "", progress: Progress | None = None
+) -> str:
+    """
+    The `column`-th field (1-based) of every line; lines that are too short give an empty line.
+
+    Fields are split on `delimiter` (a single character) or, when it is empty,
+    on runs of spaces and tabs.
+    """
+    if column < 1:
+        raise ValueError("columns are numbered from 1")
+    if len(delimiter) > 1:
+        raise ValueError("the delimiter must be a single character")
+    findall = _column_regex(column, delimiter).findall
+    n, tail = _body_end(text)
+    pieces: List[str] = []
+    for a, b in _slices(text, n):
+        pieces.append("\n".join(findall(text, a, b)))
+        _report(progress, b, n)
+    return "\n".join(pieces) + tail
@@ -0,0 +1,155 @@
+from __future__ import annotations
+
+import math
+from dataclasses import dataclass
+from itertools import accumulate
+from typing import List, Sequence, Tuple
+
+from .line_index import LineIndex
+
+WIDTH = 64          # image columns
+COLS_PER_PX = 2     # text columns folded into one image column
+TARGET_ROWS = 1024  # image rows we aim for; long files fold many lines into one
+
+_BG = 0x11          # editor background (#111111)
+_FG = 0xB4          # fully covered pixel
+
+# (block number, block version, first line, line count)
+Job = Tuple[int, int, int, int]
+
+
+@dataclass
+class _Block:
+    lines: int
+    version: int
+    row: bytes | None = None  # None until (re)computed
+
+
+def density_row(text: str, start: int, end: int, lines: int) -> bytes:
+    """
+    One image row for the lines in text[start:end]: each column's brightness is
+    the fraction of those lines whose non-blank extent covers it.
+    """
+    diff = [0] * (WIDTH + 1)
+    for line in text[start:end].split("\n"):
+        if "\t" in line:
+            line = line.expandtabs(4)
+        body = line.rstrip()
+        if not body:
+            continue
+        a = (len(body) - len(body.lstrip())) // COLS_PER_PX
+        if a >= WIDTH:
+            continue
+        b = min(WIDTH, -(-len(body) // COLS_PER_PX))
+        diff[a] += 1
+        diff[b] -= 1
+    span = _FG - _BG
+    lines = max(1, lines)
+    return bytes(
+        _BG + (span * min(c, lines)) // lines for c in accumulate(diff[:WIDTH])
+    )
+
+
+def compute_rows(
+    text: str, jobs: Sequence[Tuple[int, int, int, int, int]]
+) -> List[Tuple[int, int, bytes]]:
+    """Worker-side: density rows for (block, version, start, end, lines) jobs."""
+    return [
+        (block, version, density_row(text, start, end, count))
+        for block, version, start, end, count in jobs
+    ]
+
+
+def job_offsets(index: LineIndex, jobs: Sequence[Job]) -> List[Tuple[int, int, int, int, int]]:
+    """Resolve the line ranges of `jobs` to character offsets."""
+    return [
+        (block, version, index.line_start(first), index.line_end(first + count - 1), count)
+        for block, version, first, count in jobs
+    ]
+
+
+class MinimapCache:
+    """
+    Per-document overview image kept as one density row per block of lines.
+
+    Edits only invalidate the blocks covering the lines they touched (blocks
+    grow/shrink with inserted/removed lines and are split when they get too
+    tall), so regenerating after typing touches a single block.
+    """
+
+    def __init__(self, total_lines: int) -> None:
+        self._version = 0
+        self.reset(total_lines)
+
+    def _next_version(self) -> int:
+        self._version += 1
+        return self._version
+
+    def reset(self, total_lines: int) -> None:
+        total = max(1, total_lines)
+        self.lines_per_block = max(1, math.ceil(total / TARGET_ROWS))
+        k = self.lines_per_block
+        self._blocks: List[_Block] = [
+            _Block(min(k, total - i), self._next_version()) for i in range(0, total, k)
+        ]
+        self._cum: List[int] | None = None
+        self._total = total
+
+    def _cumulative(self) -> List[int]:
+        if self._cum is None:
+            self._cum = [0, *accumulate(b.lines for b in self._blocks)]
+        return self._cum
+
+    def _block_of(self, line: int) -> int:
+        cum = self._cumulative()
+        lo, hi = 0, len(self._blocks) - 1
+        while lo < hi:
+            mid = (lo + hi + 1) // 2
+            if cum[mid] <= line:
+                lo = mid
+            else:
+                hi = mid - 1
+        return lo
+
+    def on_edit(self, first_line: int, old_count: int, new_count: int) -> None:
+        """Lines [first_line, first_line + old_count) became `new_count` lines."""
+        total = self._total + new_count - old_count
+        k = self.lines_per_block
+        if total > 2 * k * TARGET_ROWS or (k > 1 and total * 2 < k * TARGET_ROWS):
+            # file grew/shrank enough that the block size itself is wrong
+            self.reset(total)
+            return
+
+        b0 = self._block_of(first_line)
+        b1 = self._block_of(first_line + old_count - 1)
+        lines = sum(b.lines for b in self._blocks[b0:b1 + 1]) + new_count - old_count
+        if lines <= 2 * k:
+            fresh = [_Block(lines, self._next_version())]
+        else:
+            parts = math.ceil(lines / k)
+            fresh = [
+                _Block(lines * (i + 1) // parts - lines * i // parts, self._next_version())
+                for i in range(parts)
+            ]
+        self._blocks[b0:b1 + 1] = fresh
+        self._cum = None
+        self._total = total
+
+    def dirty_jobs(self) -> List[Job]:
+        cum = self._cumulative()
+        return [
+            (i, b.version, cum[i], b.lines)
+            for i, b in enumerate(self._blocks)
+            if b.row is None
+        ]
+
+    def fill(self, results: Sequence[Tuple[int, int, bytes]]) -> None:
+        for i, version, row in results:
+            # blocks touched again since the job was cut keep a new version
+            if i < len(self._blocks) and self._blocks[i].version == version:
+                self._blocks[i].row = row
+
+    def render(self) -> Tuple[bytes, int, int]:
+        blank = bytes([_BG]) * WIDTH
+        rows = [b.row if b.row is not None else blank for b in self._blocks]
+        return b"".join(rows), WIDTH, len(rows)
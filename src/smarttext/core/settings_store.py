@@ -17,6 +17,7 @@ def _app_data_dir() -> Path:
 class SettingsStore(QObject):
     # notify signals
     fontSizeChanged = Signal()
+    largeFileLinesChanged = Signal()
     shortcutNewChanged = Signal()
     shortcutOpenChanged = Signal()
     shortcutSaveChanged = Signal()
@@ -35,6 +36,8 @@ class SettingsStore(QObject):
 
         # defaults
         self._font_size = 11
+        # documents with more lines than this open in the virtualized line view
+        self._large_file_lines = 200_000
 
         self._shortcut_new = "Ctrl+N"
         self._shortcut_open = "Ctrl+O"
@@ -49,6 +52,7 @@ class SettingsStore(QObject):
     def _to_dict(self) -> Dict[str, Any]:
         return {
             "fontSize": int(self._font_size),
+            "largeFileLines": int(self._large_file_lines),
             "shortcuts": {
                 "new": self._shortcut_new,
                 "open": self._shortcut_open,
@@ -64,6 +68,7 @@ class SettingsStore(QObject):
         sc = data.get("shortcuts", {})
 
         self.setFontSize(int(fs))
+        self.setLargeFileLines(int(data.get("largeFileLines", self._large_file_lines)))
         self.setShortcutNew(str(sc.get("new", self._shortcut_new)))
         self.setShortcutOpen(str(sc.get("open", self._shortcut_open)))
         self.setShortcutSave(str(sc.get("save", self._shortcut_save)))
@@ -126,6 +131,21 @@ class SettingsStore(QObject):
 
     fontSize = Property(int, getFontSize, setFontSize, notify=fontSizeChanged)
 
+    def getLargeFileLines(self) -> int:
+        return self._large_file_lines
+
+    def setLargeFileLines(self, v: int) -> None:
+        v = max(1_000, int(v))
+        if v == self._large_file_lines:
+            return
+        self._large_file_lines = v
+        self.largeFileLinesChanged.emit()
+        self.save()
+
+    largeFileLines = Property(
+        int, getLargeFileLines, setLargeFileLines, notify=largeFileLinesChanged
+    )
+
     def getShortcutNew(self) -> str:
         return self._shortcut_new
 
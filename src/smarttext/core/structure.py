@@ -0,0 +1,526 @@
+from __future__ import annotations
+
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from dataclasses import dataclass
+from typing import List, Sequence, Tuple
+
+from .line_index import LineIndex
+
+# a repair that has to re-lex more lines than this (an unclosed comment or
+# string swallowing the rest of the file) is left to a rebuild off the GUI thread
+MAX_RELEX_LINES = 20_000
+INDENT_TAB = 4
+
+# a bracket on a line: column << 3 | position in Language.brackets (even = opening)
+Token = int
+# (line, column) of two brackets and whether their kinds agree
+BracketPair = Tuple[Tuple[int, int], Tuple[int, int], bool]
+
+_NO_TOKENS: Tuple[Token, ...] = ()
+
+
+@dataclass(frozen=True)
+class Language:
+    """How to find brackets (outside strings and comments) and where folds come from."""
+
+    name: str
+    # opening/closing pairs, e.g. "()[]{}"
+    brackets: str = "()[]{}"
+    # fold by indentation (Python, YAML, markup) instead of by brackets
+    indent_folds: bool = False
+    line_comment: str | None = None
+    block_comment: Tuple[str, str] | None = None
+    # quotes of strings that end with their line
+    quotes: str = "\"'"
+    # delimiters of strings that may run over several lines
+    long_strings: Tuple[str, ...] = ()
+
+
+_C_LIKE = dict(line_comment="//", block_comment=("/*", "*/"), long_strings=("`",))
+_MARKUP = dict(brackets="<>", indent_folds=True, block_comment=("<!--", "-->"), quotes="")
+
+# keyed by the file type labels the status bar shows
+LANGUAGES = {
+    "Python": Language("Python", indent_folds=True, line_comment="#", long_strings=('"""', "'''")),
+    "JSON": Language("JSON", quotes='"'),
+    "QML": Language("QML", **_C_LIKE),
+    "JavaScript": Language("JavaScript", **_C_LIKE),
+    "TypeScript": Language("TypeScript", **_C_LIKE),
+    "CSS": Language("CSS", block_comment=("/*", "*/")),
+    "XML": Language("XML", **_MARKUP),
+    "HTML": Language("HTML", **_MARKUP),
+    "YAML": Language("YAML", indent_folds=True, line_comment="#"),
+    "TOML": Language("TOML", line_comment="#"),
+}
+
+
+def language_for(label: str) -> Language | None:
+    return LANGUAGES.get(label)
+
+
+class _Lexer:
+    """Finds the brackets of one line at a time, carrying open comments/long strings across lines."""
+
+    def __init__(self, lang: Language) -> None:
+        self.lang = lang
+        parts = []
+        if lang.block_comment:
+            o, c = map(re.escape, lang.block_comment)
+            parts.append(f"(?P<block>{o}.*?(?:{c}|$))")
+        for i, d in enumerate(lang.long_strings):
+            d = re.escape(d)
+            parts.append(f"(?P<long{i}>{d}(?:\\\\.|[^\\\\])*?(?:{d}|$))")
+        if lang.line_comment:
+            parts.append(f"(?P<line>{re.escape(lang.line_comment)}.*)")
+        for q in lang.quotes:
+            q = re.escape(q)
+            parts.append(f"(?P<q{ord(q[-1])}>{q}(?:\\\\.|[^{q}\\\\])*{q}?)")
+        if lang.brackets:
+            parts.append(f"(?P<br>[{re.escape(lang.brackets)}])")
+        self._token = re.compile("|".join(parts))
+        self._kinds = {ch: i for i, ch in enumerate(lang.brackets)}
+        # how an open comment or long string goes on at the start of the next line
+        self._resume = {}
+        if lang.block_comment:
+            self._resume[lang.block_comment[1]] = re.compile(f".*?{re.escape(lang.block_comment[1])}")
+        for d in lang.long_strings:
+            self._resume[d] = re.compile(f"(?:\\\\.|[^\\\\])*?{re.escape(d)}")
+
+    def lex(self, line: str, state: str) -> tuple[Tuple[Token, ...], str]:
+        """Brackets of `line` and the state at its end ("" or the delimiter still awaited)."""
+        pos = 0
+        if state:
+            m = self._resume[state].match(line)
+            if m is None:
+                return _NO_TOKENS, state
+            pos = m.end()
+            state = ""
+        tokens: List[Token] = []
+        kinds = self._kinds
+        lang = self.lang
+        for m in self._token.finditer(line, pos):
+            group = m.lastgroup
+            if group == "br":
+                tokens.append(m.start() << 3 | kinds[m.group()])
+            elif group == "block":
+                o, c = lang.block_comment
+                s = m.group()
+                if len(s) < len(o) + len(c) or not s.endswith(c):
+                    state = c
+            elif group.startswith("long"):
+                d = lang.long_strings[int(group[4:])]
+                s = m.group()
+                if len(s) < 2 * len(d) or not s.endswith(d):
+                    state = d
+        return (tuple(tokens) if tokens else _NO_TOKENS), state
+
+
+def _summary(tokens: Sequence[Token]) -> tuple[int, int, int]:
+    """(opening minus closing, lowest running depth, most unclosed openers at the end of any suffix)."""
+    depth = low = 0
+    for t in tokens:
+        depth += -1 if t & 1 else 1
+        low = min(low, depth)
+    high = run = 0
+    for t in reversed(tokens):
+        run += -1 if t & 1 else 1
+        high = max(high, run)
+    return depth, low, high
+
+
+class StructureIndex:
+    """
+    Brackets per line (outside strings and comments) for one document.
+
+    Each line keeps its bracket tokens, the lexer state at its end and a
+    summary (net depth, lowest depth, unclosed openers), so matching skips
+    over whole lines and an edit re-lexes only the lines it touched — plus
+    any after them whose starting state it changed.
+    """
+
+    def __init__(self, language: Language) -> None:
+        self.language = language
+        self._lexer = _Lexer(language)
+        self._tokens: List[Tuple[Token, ...]] = []
+        self._states: List[str] = []
+        self._net = array("i")
+        self._low = array("i")
+        self._high = array("i")
+
+    @classmethod
+    def build(cls, text: str, language: Language) -> "StructureIndex":
+        index = cls(language)
+        index._set_lines(0, 0, text.split("\n"), "")
+        return index
+
+    def __len__(self) -> int:
+        return len(self._tokens)
+
+    def _lex_lines(self, lines: Sequence[str], state: str):
+        lex = self._lexer.lex
+        tokens, states = [], []
+        net, low, high = array("i"), array("i"), array("i")
+        for line in lines:
+            toks, state = lex(line, state)
+            tokens.append(toks)
+            states.append(state)
+            if toks:
+                n, lo, hi = _summary(toks)
+            else:
+                n = lo = hi = 0
+            net.append(n)
+            low.append(lo)
+            high.append(hi)
+        return tokens, states, net, low, high
+
+    def _set_lines(self, first: int, old_count: int, lines: Sequence[str], state: str) -> str:
+        tokens, states, net, low, high = self._lex_lines(lines, state)
+        end = first + old_count
+        self._tokens[first:end] = tokens
+        self._states[first:end] = states
+        self._net[first:end] = net
+        self._low[first:end] = low
+        self._high[first:end] = high
+        return states[-1] if states else state
+
+    def on_edit(self, text: str, index: LineIndex, first: int, old_count: int, new_count: int) -> bool:
+        """
+        Lines [first, first + old_count) became [first, first + new_count) of
+        `text`. Returns False when too much has to be re-lexed here.
+        """
+        if new_count > MAX_RELEX_LINES:
+            return False
+        # state the line after the edit used to start in
+        expected = self._states[first + old_count - 1]
+        start = index.line_start(first)
+        end = index.line_end(first + new_count - 1)
+        state = self._set_lines(
+            first, old_count, text[start:end].split("\n"), self._states[first - 1] if first else ""
+        )
+        line = first + new_count
+        total = len(self._tokens)
+        while state != expected and line < total:
+            if line - first > MAX_RELEX_LINES:
+                return False
+            expected = self._states[line]
+            state = self._set_lines(line, 1, (text[index.line_start(line):index.line_end(line)],), state)
+            line += 1
+        return True
+
+    # ---------- brackets ----------
+    def _kind(self, token: Token) -> int:
+        return token & 7
+
+    def bracket_at(self, line: int, column: int) -> int:
+        """Position in the line's tokens of the bracket at `column`, -1 if there is none."""
+        tokens = self._tokens[line]
+        cols = [t >> 3 for t in tokens]
+        i = bisect_left(cols, column)
+        return i if i < len(cols) and cols[i] == column else -1
+
+    def match(self, line: int, column: int) -> BracketPair | None:
+        """The bracket at (line, column) and its partner; None if either is missing."""
+        i = self.bracket_at(line, column)
+        if i < 0:
+            return None
+        token = self._tokens[line][i]
+        other = self._backward(line, i) if token & 1 else self._forward(line, i)
+        if other is None:
+            return None
+        o_line, o_token = other
+        ok = self._kind(token) >> 1 == self._kind(o_token) >> 1
+        return (line, column), (o_line, o_token >> 3), ok
+
+    def _forward(self, line: int, i: int) -> tuple[int, Token] | None:
+        depth = 0
+        tokens = self._tokens[line][i + 1:]
+        low, net = self._low, self._net
+        n = len(self._tokens)
+        while True:
+            for t in tokens:
+                if not t & 1:
+                    depth += 1
+                elif depth == 0:
+                    return line, t
+                else:
+                    depth -= 1
+            line += 1
+            # whole lines that cannot close the bracket are stepped over
+            while line < n and depth + low[line] >= 0:
+                depth += net[line]
+                line += 1
+            if line >= n:
+                return None
+            tokens = self._tokens[line]
+
+    def _backward(self, line: int, i: int) -> tuple[int, Token] | None:
+        depth = 0
+        tokens = self._tokens[line][:i]
+        high, net = self._high, self._net
+        while True:
+            for t in reversed(tokens):
+                if t & 1:
+                    depth += 1
+                elif depth == 0:
+                    return line, t
+                else:
+                    depth -= 1
+            line -= 1
+            while line >= 0 and high[line] <= depth:
+                depth -= net[line]
+                line -= 1
+            if line < 0:
+                return None
+            tokens = self._tokens[line]
+
+    # ---------- folds ----------
+    def fold_start(self, text: str, index: LineIndex, line: int) -> bool:
+        """Whether a region can be folded under `line` (cheap: looks at this line and the next ones only)."""
+        if self.language.indent_folds:
+            return self._indent_child(text, index, line) is not None
+        return self._high[line] > 0
+
+    def fold_end(self, text: str, index: LineIndex, line: int) -> int | None:
+        """Last line hidden when `line` is folded; None if nothing would be."""
+        if self.language.indent_folds:
+            return self._indent_end(text, index, line)
+        # the region ends with the partner of the line's last unclosed opener
+        stack: List[int] = []
+        for i, t in enumerate(self._tokens[line]):
+            if not t & 1:
+                stack.append(i)
+            elif stack:
+                stack.pop()
+        if not stack:
+            return None
+        found = self._forward(line, stack[-1])
+        if found is None:
+            return None
+        # the closing line stays visible
+        end = found[0] - 1
+        return end if end > line else None
+
+    @staticmethod
+    def _indent(text: str, index: LineIndex, line: int) -> int:
+        """Indent width of a line, -1 if it is blank."""
+        start = index.line_start(line)
+        s = text[start:start + index.line_length(line)]
+        body = s.lstrip(" \t")
+        if not body:
+            return -1
+        lead = s[:len(s) - len(body)]
+        return len(lead.expandtabs(INDENT_TAB))
+
+    def _indent_child(self, text: str, index: LineIndex, line: int) -> int | None:
+        """The first non-blank line after `line`, if it is indented deeper."""
+        own = self._indent(text, index, line)
+        if own < 0:
+            return None
+        n = len(index)
+        nxt = line + 1
+        while nxt < n:
+            ind = self._indent(text, index, nxt)
+            if ind >= 0:
+                return nxt if ind > own else None
+            nxt += 1
+        return None
+
+    def _indent_end(self, text: str, index: LineIndex, line: int) -> int | None:
+        if self._indent_child(text, index, line) is None:
+            return None
+        own = self._indent(text, index, line)
+        n = len(index)
+        last = line
+        for nxt in range(line + 1, n):
+            ind = self._indent(text, index, nxt)
+            if ind < 0:
+                continue
+            if ind <= own:
+                break
+            last = nxt
+        return last
+
+
+class Folds:
+    """
+    Folded regions of a document as (header line, last hidden line) pairs,
+    and the visible-row mapping they imply.
+
+    Edits shift the regions after them; a region whose hidden lines an edit
+    touches is unfolded.
+    """
+
+    def __init__(self) -> None:
+        self._regions: List[Tuple[int, int]] = []
+        self._revision = -1
+        # revision of the last edit that unfolded something
+        self.dropped = -1
+        # hidden line runs (first, last), merged, and the hidden lines before each
+        self._runs: List[Tuple[int, int]] | None = None
+        self._firsts: List[int] = []
+        self._before: List[int] = []
+
+    def __bool__(self) -> bool:
+        return bool(self._regions)
+
+    def regions(self) -> List[Tuple[int, int]]:
+        return list(self._regions)
+
+    def _changed(self) -> None:
+        self._runs = None
+
+    def _merged(self) -> List[Tuple[int, int]]:
+        if self._runs is None:
+            runs: List[Tuple[int, int]] = []
+            for start, end in self._regions:
+                a = start + 1
+                if runs and a <= runs[-1][1] + 1:
+                    if end > runs[-1][1]:
+                        runs[-1] = (runs[-1][0], end)
+                else:
+                    runs.append((a, end))
+            self._runs = runs
+            self._firsts = [a for a, _ in runs]
+            before, total = [], 0
+            for a, b in runs:
+                before.append(total)
+                total += b - a + 1
+            before.append(total)
+            self._before = before
+        return self._runs
+
+    # ---------- changes ----------
+    def is_folded(self, line: int) -> bool:
+        i = bisect_left(self._regions, (line, -1))
+        return i < len(self._regions) and self._regions[i][0] == line
+
+    def fold(self, start: int, end: int) -> None:
+        if end > start and not self.is_folded(start):
+            self._regions.insert(bisect_left(self._regions, (start, end)), (start, end))
+            self._changed()
+
+    def unfold(self, start: int) -> Tuple[int, int] | None:
+        i = bisect_left(self._regions, (start, -1))
+        if i < len(self._regions) and self._regions[i][0] == start:
+            region = self._regions.pop(i)
+            self._changed()
+            return region
+        return None
+
+    def clear(self) -> None:
+        if self._regions:
+            self._regions = []
+            self._changed()
+
+    def containing(self, line: int) -> List[Tuple[int, int]]:
+        """Folded regions hiding `line`."""
+        return [r for r in self._regions if r[0] < line <= r[1]]
+
+    def on_edit(self, revision: int, first: int, old_count: int, new_count: int) -> None:
+        """
+        Lines [first, first + old_count) became new_count lines. Every listener
+        of the document may call this; only the first call per revision counts.
+        A region whose hidden lines were edited is unfolded (see `dropped`);
+        an edit ending on its header line moves it (the header is then the
+        last line the edit wrote).
+        """
+        if revision == self._revision:
+            return
+        self._revision = revision
+        last = first + old_count - 1
+        delta = new_count - old_count
+        kept: List[Tuple[int, int]] = []
+        for start, end in self._regions:
+            if end < first:
+                kept.append((start, end))
+            elif start >= last:
+                kept.append((start + delta, end + delta))
+            else:
+                self.dropped = revision
+        if self.dropped == revision or delta:
+            self._regions = kept
+            self._changed()
+
+    # ---------- rows ----------
+    def hidden_count(self) -> int:
+        self._merged()
+        return self._before[-1] if self._before else 0
+
+    def is_hidden(self, line: int) -> bool:
+        runs = self._merged()
+        i = bisect_right(self._firsts, line) - 1
+        return i >= 0 and line <= runs[i][1]
+
+    def row_of(self, line: int) -> int:
+        """Visible row of `line` (a hidden line maps to the row of its header)."""
+        runs = self._merged()
+        i = bisect_right(self._firsts, line) - 1
+        if i < 0:
+            return line
+        a, b = runs[i]
+        if line <= b:
+            return a - 1 - self._before[i]
+        return line - self._before[i + 1]
+
+    def line_at(self, row: int) -> int:
+        runs = self._merged()
+        # the i-th run starts at row a - before[i]; find the last run starting at or before `row`
+        lo, hi = 0, len(runs)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if runs[mid][0] - self._before[mid] <= row:
+                lo = mid + 1
+            else:
+                hi = mid
+        return row + self._before[lo]
+
+    def hidden_between(self, first: int, last: int) -> int:
+        """Hidden lines among [first, last]."""
+        count = 0
+        for a, b in self._merged():
+            if b < first:
+                continue
+            if a > last:
+                break
+            count += min(b, last) - max(a, first) + 1
+        return count
+
+    def visible_lines(self, first: int, last: int):
+        """The lines among [first, last] that are not hidden, in order."""
+        runs = self._merged()
+        i = bisect_right(self._firsts, first) - 1
+        line = first
+        if i >= 0 and line <= runs[i][1]:
+            line = runs[i][1] + 1
+        i += 1
+        while line <= last:
+            if i < len(runs) and runs[i][0] <= line:
+                line = runs[i][1] + 1
+                i += 1
+                continue
+            yield line
+            line += 1
+
+    def runs(self) -> List[Tuple[int, int]]:
+        return list(self._merged())
+
+    # what a change would do to the visible rows: (first row, rows hidden or shown)
+    def rows_hidden_by(self, start: int, end: int) -> Tuple[int, int]:
+        return self._rows_in(start, end)
+
+    def rows_shown_by(self, start: int) -> Tuple[int, int]:
+        i = bisect_left(self._regions, (start, -1))
+        if i >= len(self._regions) or self._regions[i][0] != start:
+            return self.row_of(start), 0
+        rest = Folds()
+        rest._regions = self._regions[:i] + self._regions[i + 1:]
+        return rest._rows_in(start, self._regions[i][1])
+
+    def _rows_in(self, start: int, end: int) -> Tuple[int, int]:
+        # the visible lines of (start, end] always sit on consecutive rows
+        first = next(self.visible_lines(start + 1, end), None)
+        if first is None:
+            return self.row_of(start), 0
+        return self.row_of(first), (end - start) - self.hidden_between(start + 1, end)
@@ -0,0 +1,124 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+
+from .document import TextEdit
+
+# full counts walk the text in slices this big so a worker thread releases the
+# GIL regularly and never materializes one giant `split()` list
+_CHUNK = 1 << 20
+
+
+@dataclass
+class TextStats:
+    lines: int = 1
+    words: int = 0
+    chars: int = 0
+
+    def __add__(self, other: "TextStats") -> "TextStats":
+        return TextStats(
+            self.lines + other.lines,
+            self.words + other.words,
+            self.chars + other.chars,
+        )
+
+
+def _is_word(ch: str) -> bool:
+    return not ch.isspace()
+
+
+def count_text(text: str) -> TextStats:
+    """Exact line/word/char counts. Words are runs of non-whitespace, like `str.split()`."""
+    n = len(text)
+    words = 0
+    prev_word = False
+    for i in range(0, n, _CHUNK):
+        chunk = text[i:i + _CHUNK]
+        words += len(chunk.split())
+        # a word straddling the slice boundary was counted twice
+        if prev_word and _is_word(chunk[0]):
+            words -= 1
+        prev_word = _is_word(chunk[-1])
+    return TextStats(text.count("\n") + 1, words, n)
+
+
+def count_range(text: str, start: int, end: int) -> TextStats:
+    return count_text(text[start:end])
+
+
+def _joined(text: str, at: int) -> bool:
+    """True when offset `at` falls inside a word (so splitting there adds one word)."""
+    return 0 < at < len(text) and _is_word(text[at - 1]) and _is_word(text[at])
+
+
+def edit_delta(text_after: str, edit: TextEdit) -> TextStats:
+    """
+    Change in counts caused by `edit`, given the text after it was applied.
+
+    Only the edited strings and one neighbour character on each side are looked
+    at: a non-space neighbour stands in for the whole word run it belongs to.
+    """
+    s = edit.start
+    e = s + len(edit.inserted)
+    left = "x" if s > 0 and _is_word(text_after[s - 1]) else ""
+    right = "x" if e < len(text_after) and _is_word(text_after[e]) else ""
+    words = len((left + edit.inserted + right).split()) - len((left + edit.removed + right).split())
+    return TextStats(
+        edit.inserted.count("\n") - edit.removed.count("\n"),
+        words,
+        len(edit.inserted) - len(edit.removed),
+    )
+
+
+def concat(text: str, left: TextStats, right: TextStats, at: int) -> TextStats:
+    """Stats of two adjacent ranges that meet at offset `at`."""
+    return TextStats(
+        left.lines + right.lines - 1,
+        left.words + right.words - (1 if _joined(text, at) else 0),
+        left.chars + right.chars,
+    )
+
+
+def detach(text: str, whole: TextStats, part: TextStats, at: int) -> TextStats:
+    """Stats of `whole` minus an end range `part` that meets the rest at offset `at`."""
+    return TextStats(
+        whole.lines - part.lines + 1,
+        whole.words - part.words + (1 if _joined(text, at) else 0),
+        whole.chars - part.chars,
+    )
+
+
+class StatsTracker:
+    """
+    Keeps a document's counts exact across edits.
+
+    Counts are seeded (and periodically reconciled) from a full count of a text
+    snapshot that runs elsewhere; edits made while that count is in flight are
+    accumulated and folded in when it lands.
+    """
+
+    def __init__(self) -> None:
+        self.stats: TextStats | None = None
+        self._since: TextStats | None = None
+        self._generation = 0
+        # document revision of the last snapshot handed out for a full count
+        self.counted_revision = -1
+
+    def begin_count(self, revision: int) -> int:
+        self._generation += 1
+        self._since = TextStats(0, 0, 0)
+        self.counted_revision = revision
+        return self._generation
+
+    def finish_count(self, generation: int, counted: TextStats) -> bool:
+        if generation != self._generation or self._since is None:
+            return False
+        self.stats = counted + self._since
+        self._since = None
+        return True
+
+    def on_edit(self, delta: TextStats) -> None:
+        if self.stats is not None:
+            self.stats = self.stats + delta
+        if self._since is not None:
+            self._since = self._since + delta
@@ -0,0 +1,101 @@
+from __future__ import annotations
+
+from dataclasses import dataclass
+from typing import List, Sequence
+
+from .document import Document, Replacement, TextEdit
+
+
+def _replacements(edits: Sequence[TextEdit]) -> List[Replacement]:
+    return [(e.start, e.start + len(e.removed), e.inserted) for e in edits]
+
+
+def _inverse(edits: Sequence[TextEdit]) -> List[Replacement]:
+    """Replacements that take the text after `edits` back to the text before them."""
+    out: List[Replacement] = []
+    delta = 0
+    for e in edits:
+        start = e.start + delta
+        out.append((start, start + len(e.inserted), e.removed))
+        delta += len(e.inserted) - len(e.removed)
+    return out
+
+
+@dataclass
+class UndoEntry:
+    """
+    Edits applied together, and where the caret was around them.
+
+    The edits do not overlap and are in ascending order, each in the
+    coordinates of the text before any of them (as Document.apply_edits takes
+    them), so a multi-caret edit is undone or redone in one pass.
+    """
+
+    edits: List[TextEdit]
+    caret_before: int
+    caret_after: int
+    # plain typing: the next keystroke right after it may be folded in
+    typing: bool = False
+
+
+class UndoStack:
+    """Undo history for edits the Python side applies to a Document itself."""
+
+    def __init__(self, limit: int = 1000) -> None:
+        self._entries: List[UndoEntry] = []
+        self._index = 0  # entries[:index] are undoable, the rest redoable
+        self._limit = limit
+
+    def can_undo(self) -> bool:
+        return self._index > 0
+
+    def can_redo(self) -> bool:
+        return self._index < len(self._entries)
+
+    def push(
+        self, edits: Sequence[TextEdit], caret_before: int, caret_after: int, typing: bool = False
+    ) -> None:
+        del self._entries[self._index:]
+        last = self._entries[-1] if self._entries else None
+        if typing and last is not None and last.typing and self._extend(last, edits):
+            last.caret_after = caret_after
+            # a word boundary ends the run so undo goes word by word
+            last.typing = not any(e.inserted.isspace() for e in edits)
+            return
+        self._entries.append(UndoEntry(list(edits), caret_before, caret_after, typing))
+        if len(self._entries) > self._limit:
+            del self._entries[0]
+        self._index = len(self._entries)
+
+    @staticmethod
+    def _extend(last: UndoEntry, edits: Sequence[TextEdit]) -> bool:
+        """Fold typing right after each insertion of `last` into it (the same number of carets)."""
+        if len(edits) != len(last.edits):
+            return False
+        shift = 0
+        for prev, new in zip(last.edits, edits):
+            shift += len(prev.inserted)
+            # `new` is placed against the text with all of `last` already in
+            if prev.removed or new.removed or new.start != prev.start + shift:
+                return False
+        last.edits = [
+            TextEdit(prev.start, "", prev.inserted + new.inserted) for prev, new in zip(last.edits, edits)
+        ]
+        return True
+
+    def undo(self, doc: Document) -> int | None:
+        """Reverts the last entry on `doc`; returns the caret to restore."""
+        if not self.can_undo():
+            return None
+        self._index -= 1
+        entry = self._entries[self._index]
+        doc.replace_ranges(_inverse(entry.edits))
+        return entry.caret_before
+
+    def redo(self, doc: Document) -> int | None:
+        if not self.can_redo():
+            return None
+        entry = self._entries[self._index]
+        self._index += 1
+        doc.replace_ranges(_replacements(entry.edits))
+        return entry.caret_after
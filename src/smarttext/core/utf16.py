@@ -0,0 +1,41 @@
+from __future__ import annotations
+
+import re
+from array import array
+from bisect import bisect_left
+
+# characters outside the BMP take two UTF-16 units (a surrogate pair)
+_ASTRAL = re.compile("[\U00010000-\U0010FFFF]")
+
+
+class Utf16Index:
+    """
+    Offsets into one text as Python counts them (code points) and as Qt does
+    (UTF-16 units). Only the characters outside the BMP differ, so their
+    positions are all that is kept; for most texts there are none.
+    """
+
+    def __init__(self, text: str) -> None:
+        self._astral = array("q") if text.isascii() else array("q", (m.start() for m in _ASTRAL.finditer(text)))
+
+    def __bool__(self) -> bool:
+        """Whether the two kinds of offset differ anywhere."""
+        return bool(self._astral)
+
+    def to_utf16(self, pos: int) -> int:
+        return pos + bisect_left(self._astral, pos) if self._astral else pos
+
+    def from_utf16(self, pos: int) -> int:
+        """Code-point offset of a UTF-16 one; the middle of a surrogate pair maps to its character."""
+        astral = self._astral
+        if not astral:
+            return pos
+        # the i-th such character starts at UTF-16 offset astral[i] + i
+        lo, hi = 0, len(astral)
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if astral[mid] + mid < pos:
+                lo = mid + 1
+            else:
+                hi = mid
+        return pos - lo
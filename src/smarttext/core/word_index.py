@@ -0,0 +1,189 @@
+from __future__ import annotations
+
+import re
+from bisect import bisect_left
+from collections import Counter
+from heapq import nlargest
+from typing import List
+
+from .document import TextEdit
+
+# completion candidates: identifier-like words of 3..64 characters
+_WORD = re.compile(r"\b[^\W\d]\w{2,63}\b")
+_TRAILING = re.compile(r"\w*\Z")
+_LEADING = re.compile(r"\w*")
+# how far to look for the rest of a word around an edit
+_CONTEXT = 128
+# full counts walk the text in slices this big (cut at a non-word char)
+_CHUNK = 1 << 20
+# prefixes matching more words than this have their top words cached
+MAX_SCAN = 2000
+# how many top words are cached per broad prefix
+_TOP = 16
+# above this many new/gone words the sorted key list is rebuilt in one go
+_BULK = 64
+
+
+def _is_word_char(ch: str) -> bool:
+    return ch.isalnum() or ch == "_"
+
+
+def count_words(text: str) -> Counter:
+    """How often each completion word occurs in `text`."""
+    counts: Counter = Counter()
+    i, n = 0, len(text)
+    while i < n:
+        j = min(n, i + _CHUNK)
+        if j < n and _is_word_char(text[j - 1]):
+            # cut before the word run straddling the boundary; a run too long
+            # to be a word is swallowed whole instead
+            k = j - 1
+            while k > i and k > j - 64 and _is_word_char(text[k - 1]):
+                k -= 1
+            j = k if k > i and not _is_word_char(text[k - 1]) else _LEADING.match(text, j).end()
+        counts.update(_WORD.findall(text, i, j))
+        i = j
+    return counts
+
+
+def edit_words(text_after: str, edit: TextEdit) -> tuple[Counter, Counter]:
+    """
+    Words that `edit` took away and brought in, given the text after it.
+
+    Only the edited strings plus the partial words touching them are scanned;
+    words present on both sides cancel out.
+    """
+    s = edit.start
+    e = s + len(edit.inserted)
+    left = _TRAILING.search(text_after, max(0, s - _CONTEXT), s).group()
+    right = _LEADING.match(text_after, e, e + _CONTEXT).group()
+    gone = Counter(_WORD.findall(left + edit.removed + right))
+    new = Counter(_WORD.findall(left + edit.inserted + right))
+    common = gone & new
+    return gone - common, new - common
+
+
+def _key(word: str) -> str:
+    # case-insensitive order; ties broken by the original spelling
+    return word.lower() + "\0" + word
+
+
+def _after(prefix: str) -> str:
+    """Smallest string greater than every string starting with `prefix`."""
+    return prefix[:-1] + chr(ord(prefix[-1]) + 1) if prefix else "\U0010ffff"
+
+
+class WordIndex:
+    """
+    Word frequencies over several documents, searchable by prefix.
+
+    Counts live in a dict; `_keys` is kept sorted (with `_words` alongside) so
+    the words under a prefix are one contiguous slice found by bisection.
+    Prefixes matching more than MAX_SCAN words keep their top words cached
+    until a count change could alter them.
+    """
+
+    def __init__(self) -> None:
+        self._counts: dict[str, int] = {}
+        self._keys: List[str] = []
+        self._words: List[str] = []
+        # lowercase prefix -> (top words by count, smallest count among them)
+        self._top: dict[str, tuple[List[str], int]] = {}
+
+    def __len__(self) -> int:
+        return len(self._counts)
+
+    def count(self, word: str) -> int:
+        return self._counts.get(word, 0)
+
+    def add(self, words: Counter) -> None:
+        counts = self._counts
+        fresh = []
+        for w, c in words.items():
+            if c <= 0:
+                continue
+            if w in counts:
+                counts[w] += c
+            else:
+                counts[w] = c
+                fresh.append(w)
+        if len(fresh) > _BULK:
+            pairs = sorted(zip(self._keys + [_key(w) for w in fresh], self._words + fresh))
+            self._keys = [k for k, _ in pairs]
+            self._words = [w for _, w in pairs]
+        else:
+            for w in fresh:
+                k = _key(w)
+                i = bisect_left(self._keys, k)
+                self._keys.insert(i, k)
+                self._words.insert(i, w)
+        self._touched(words, True)
+
+    def remove(self, words: Counter) -> None:
+        counts = self._counts
+        gone = []
+        for w, c in words.items():
+            have = counts.get(w)
+            if have is None or c <= 0:
+                continue
+            if have > c:
+                counts[w] = have - c
+            else:
+                del counts[w]
+                gone.append(w)
+        if len(gone) > _BULK:
+            keep = [i for i, w in enumerate(self._words) if w in counts]
+            self._keys = [self._keys[i] for i in keep]
+            self._words = [self._words[i] for i in keep]
+        else:
+            for w in gone:
+                k = _key(w)
+                i = bisect_left(self._keys, k)
+                if i < len(self._keys) and self._keys[i] == k:
+                    del self._keys[i]
+                    del self._words[i]
+        self._touched(words, False)
+
+    def _touched(self, words: Counter, grew: bool) -> None:
+        """Bring cached top lists up to date with the count changes in `words`."""
+        if not self._top:
+            return
+        if len(words) > _BULK:
+            self._top.clear()
+            return
+        counts = self._counts
+        for w in words:
+            low = w.lower()
+            for p in [p for p in self._top if low.startswith(p)]:
+                top, floor = self._top[p]
+                if not grew:
+                    # a top word shrinking may let an uncached one overtake it
+                    if w in top:
+                        del self._top[p]
+                    continue
+                if w not in top:
+                    if counts[w] < floor:
+                        continue
+                    top.append(w)
+                top.sort(key=counts.__getitem__, reverse=True)
+                del top[_TOP:]
+                self._top[p] = (top, counts[top[-1]])
+
+    def complete(self, prefix: str, limit: int = 8) -> List[str]:
+        """Most frequent words starting with `prefix`, case-insensitively; exact-case matches first."""
+        low = prefix.lower()
+        keys, counts = self._keys, self._counts
+        lo = bisect_left(keys, low)
+        hi = bisect_left(keys, _after(low), lo)
+        want = limit + 1  # `prefix` itself may be among them
+        if hi - lo <= MAX_SCAN:
+            top = nlargest(want, self._words[lo:hi], key=counts.__getitem__)
+        else:
+            cached = self._top.get(low)
+            if cached is None or len(cached[0]) < want:
+                top = nlargest(max(want, _TOP), self._words[lo:hi], key=counts.__getitem__)
+                cached = self._top[low] = (top, counts[top[-1]])
+            top = cached[0][:want]
+        top = [w for w in top if w != prefix]
+        top.sort(key=lambda w: (not w.startswith(prefix), -counts[w], len(w), w))
+        return top[:limit]
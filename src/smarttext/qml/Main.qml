@@ -17,10 +17,13 @@ ApplicationWindow {
     property int cornerRadius: 10
     property var appSafe: (typeof app !== "undefined" && app !== null) ? app : null
     property var settingsSafe: (typeof settingsStore !== "undefined" && settingsStore !== null) ? settingsStore : null
-    property bool uiLocked: openDialog.visible || saveAsDialog.visible || settingsWindow.visible || searchOpen
+    property bool uiLocked: openDialog.visible || saveAsDialog.visible || projectDialog.visible
+                            || settingsWindow.visible || searchOpen
     property int _prevVisibility: Window.Windowed
 
     property bool restoring: false
+    property bool virtualMode: appSafe ? appSafe.virtualMode : false
+    property bool hexMode: appSafe ? appSafe.hexMode : false
     property bool pendingRestore: false
     property int restoreToken: 0
 
@@ -48,6 +51,85 @@ ApplicationWindow {
         })
     }
 
+    function formatCount(n) {
+        return String(n).replace(/\B(?=(\d{3})+(?!\d))/g, ",")
+    }
+
+    function statsLabel() {
+        if (!appSafe) return ""
+        if (appSafe.lineCount < 0) return "counting…"
+        if (appSafe.hasSelection)
+            return formatCount(appSafe.selectionWordCount) + " of " + formatCount(appSafe.wordCount) + " words · "
+                 + formatCount(appSafe.selectionCharCount) + " chars · "
+                 + formatCount(appSafe.selectionLineCount) + " lines"
+        return formatCount(appSafe.lineCount) + " lines · "
+             + formatCount(appSafe.wordCount) + " words · "
+             + formatCount(appSafe.charCount) + " chars"
+    }
+
+    function syncSelection() {
+        if (!appSafe || restoring || pendingRestore) return
+        if (virtualMode)
+            appSafe.set_selection(appSafe.virtualEditor.selectionStart, appSafe.virtualEditor.selectionEnd)
+        else
+            appSafe.set_selection(editor.selectionStart, editor.selectionEnd)
+    }
+
+    function syncViewport() {
+        // the large-file view reads change markers and carets per line instead
+        if (!appSafe || virtualMode || !editorScroll.contentItem) return
+        const f = editorScroll.contentItem
+        const first = editor.positionAt(0, f.contentY)
+        const last = editor.positionAt(editor.width, f.contentY + f.height)
+        appSafe.diff.set_viewport(first, last)
+        appSafe.carets.set_viewport(first, last)
+        appSafe.structure.set_viewport(first, last)
+    }
+
+    // hide the text blocks of folded lines; `reloaded`: the editor just got new text
+    function applyFolds(reloaded) {
+        if (!appSafe || virtualMode) return
+        if (appSafe.structure.apply_to_editor(editor.textDocument, reloaded)) {
+            // the TextArea only picks up the new content height on a relayout
+            const bp = editor.bottomPadding
+            editor.bottomPadding = bp + 1
+            editor.bottomPadding = bp
+        }
+        Qt.callLater(syncViewport)
+    }
+
+    // word completion for the TextArea; suggestions come from every open tab
+    property var completionWords: []
+    property string completionPrefix: ""
+    property int completionIndex: 0
+
+    function updateCompletion() {
+        if (!appSafe || virtualMode || editor.selectedText.length > 0) { closeCompletion(); return }
+        const pos = editor.cursorPosition
+        // no popup in the middle of a word
+        if (/\w/.test(editor.getText(pos, pos + 1))) { closeCompletion(); return }
+        const res = appSafe.completion.complete(editor.getText(Math.max(0, pos - 64), pos))
+        completionPrefix = res.prefix
+        completionWords = res.words
+        completionIndex = 0
+    }
+
+    function closeCompletion() {
+        completionWords = []
+        completionPrefix = ""
+    }
+
+    function acceptCompletion() {
+        const word = completionWords[completionIndex]
+        const end = editor.cursorPosition
+        const start = end - completionPrefix.length
+        closeCompletion()
+        appSafe.completion.accept(editor.textDocument, start, end, word)
+        editor.cursorPosition = start + word.length
+        appSafe.text = editor.text
+        appSafe.set_cursor_position(editor.cursorPosition)
+    }
+
     function restoreEditorState() {
         if (!appSafe) return
         restoring = true
@@ -59,11 +141,18 @@ ApplicationWindow {
             if (!appSafe || !editorScroll.contentItem) { restoring = false; return }
 
             // IMPORTANT: load doc text first (no binding!)
+            // (empty in virtual mode: the large-file view pulls lines from Python)
             editor.text = appSafe.text
+            win.applyFolds(true)
 
             const pos = Math.max(0, Math.min(appSafe.cursorPosition, editor.length))
             editor.cursorPosition = pos
-            editorScroll.contentItem.contentY = Math.max(0, appSafe.scrollY)
+            if (win.virtualMode) {
+                virtualView.flick.contentY = Math.max(0, appSafe.scrollY)
+                virtualView.forceActiveFocus()
+            } else {
+                editorScroll.contentItem.contentY = Math.max(0, appSafe.scrollY)
+            }
 
             win.pendingRestore = false
 
@@ -71,80 +160,269 @@ ApplicationWindow {
                 if (tok !== restoreToken) return
                 editor.cursorPosition = pos
                 restoring = false
+                win.syncViewport()
             })
         }))
     }
 
-    // ---- Shortcuts ----
-    Shortcut {
-        enabled: settingsSafe !== null && !win.uiLocked
-                && !win.uiLocked
-                && !(settingsWindow && settingsWindow.capturingShortcut)
-        sequence: settingsSafe ? settingsSafe.shortcutNew : ""
-        onActivated: if (appSafe) appSafe.new_file()
+    // ---- Key bindings ----
+    // Command shortcuts are dispatched by appSafe.commands from one key table;
+    // it only needs to know which of them may fire right now.
+    Binding {
+        target: appSafe ? appSafe.commands : null
+        property: "keyScope"
+        value: (openDialog.visible || saveAsDialog.visible || projectDialog.visible
+                || settingsWindow.visible || lineOpsPopup.visible) ? "none"
+             : win.searchOpen ? "palette" : "editor"
     }
 
-    Shortcut {
-        enabled: settingsSafe !== null && !win.uiLocked
-                && !win.uiLocked
-                && !(settingsWindow && settingsWindow.capturingShortcut)
-        sequence: settingsSafe ? settingsSafe.shortcutOpen : ""
-        onActivated: openDialog.open()
+    Connections {
+        target: appSafe ? appSafe.commands : null
+        function onUiRequested(name) {
+            switch (name) {
+            case "openDialog":    openDialog.open(); break
+            case "saveAsDialog":  saveAsDialog.open(); break
+            case "projectDialog": win.searchOpen = false; projectDialog.open(); break
+            case "quickOpen":     win.searchOpen = !win.searchOpen; break
+            case "commands":      win.openCommandPalette(); break
+            case "fullScreen":    win.toggleFullScreen(); break
+            case "settings":      settingsWindow.visible = true; break
+            case "lineOps":       lineOpsPopup.open(); break
+            }
+        }
     }
 
-    Shortcut {
-        enabled: settingsSafe !== null && !win.uiLocked
-                && !win.uiLocked
-                && !(settingsWindow && settingsWindow.capturingShortcut)
-        sequence: settingsSafe ? settingsSafe.shortcutSave : ""
-        onActivated: if (appSafe) appSafe.save()
+    function openCommandPalette() {
+        win.searchOpen = true
+        cmdSearchInput.text = ">"
     }
 
-    Shortcut {
-        enabled: settingsSafe !== null && !win.uiLocked
-                && !win.uiLocked
-                && !(settingsWindow && settingsWindow.capturingShortcut)
-        sequence: settingsSafe ? settingsSafe.shortcutSaveAs : ""
-        onActivated: saveAsDialog.open()
+    function toggleFullScreen() {
+        if (win.visibility === Window.FullScreen) {
+            // restore what we had before fullscreen
+            if (win._prevVisibility === Window.Maximized) win.showMaximized()
+            else win.showNormal()
+        } else {
+            // remember current state then go fullscreen
+            win._prevVisibility = win.visibility
+            win.showFullScreen()
+        }
     }
 
     Shortcut {
-        enabled: settingsSafe !== null && !win.uiLocked
-                && !win.uiLocked
-                && !(settingsWindow && settingsWindow.capturingShortcut)
-        sequence: settingsSafe ? settingsSafe.shortcutClose : ""
-        onActivated: if (appSafe) appSafe.close_current_tab()
+        enabled: win.searchOpen
+        sequence: "Escape"
+        onActivated: win.searchOpen = false
     }
 
     Shortcut {
-        enabled: settingsSafe !== null
-                && !openDialog.visible && !saveAsDialog.visible && !settingsWindow.visible
-                && !(settingsWindow && settingsWindow.capturingShortcut)
-
-        sequence: settingsSafe ? settingsSafe.shortcutSearch : ""
-        onActivated: win.searchOpen = !win.searchOpen
+        enabled: !win.searchOpen && appSafe !== null && appSafe.diff.compareOpen
+        sequence: "Escape"
+        onActivated: appSafe.diff.close_compare()
     }
 
     Shortcut {
-        enabled: win.searchOpen
+        enabled: !win.searchOpen && appSafe !== null && appSafe.jobsBusy
         sequence: "Escape"
-        onActivated: win.searchOpen = false
+        onActivated: appSafe.cancel_jobs()
     }
 
-    Shortcut {
-        enabled: !win.uiLocked
-        sequence: "F11"
-        onActivated: {
-            if (win.visibility === Window.FullScreen) {
-                // restore what we had before fullscreen
-                if (win._prevVisibility === Window.Maximized) win.showMaximized()
-                else win.showNormal()
+    Connections {
+        target: appSafe
+        function onReplaceEditorText() { appSafe.apply_pending_text(editor.textDocument) }
+    }
+
+    // ---- Line operations (sort / unique / filter / reverse / column) ----
+    Popup {
+        id: lineOpsPopup
+        x: Math.round((win.width - width) / 2)
+        y: 76
+        width: 460
+        padding: 12
+        modal: true
+        focus: true
+
+        property string op: "sort"
+        property bool toNewTab: false
+        readonly property bool needsPattern: op === "filter" || op === "exclude"
+        readonly property var ops: [
+            { id: "sort", label: "Sort" },
+            { id: "unique", label: "Unique" },
+            { id: "reverse", label: "Reverse" },
+            { id: "filter", label: "Keep matching" },
+            { id: "exclude", label: "Drop matching" },
+            { id: "column", label: "Column" }
+        ]
+
+        function run() {
+            if (!appSafe) return
+            if (needsPattern) {
+                if (lineOpsArg.text.length === 0) return
+                appSafe.lineOps.filter(lineOpsArg.text, op === "filter", toNewTab)
+            } else if (op === "column") {
+                appSafe.lineOps.extract_column(parseInt(lineOpsArg.text) || 0, lineOpsDelimiter.text, toNewTab)
             } else {
-                // remember current state then go fullscreen
-                win._prevVisibility = win.visibility
-                win.showFullScreen()
+                appSafe.lineOps.run(op, toNewTab)
+            }
+            close()
+        }
+
+        function focusInput() {
+            if (lineOpsArg.visible) lineOpsArg.forceActiveFocus()
+            else lineOpsBody.forceActiveFocus()
+        }
+
+        onOpened: Qt.callLater(focusInput)
+        onClosed: editor.forceActiveFocus()
+
+        background: Rectangle {
+            radius: 10
+            color: "#1b1b1b"
+            border.color: "#3a3a3a"
+            border.width: 1
+        }
+
+        contentItem: Column {
+            id: lineOpsBody
+            spacing: 10
+            focus: true
+
+            // Enter runs the chosen operation even when no text field is shown
+            Keys.onReturnPressed: lineOpsPopup.run()
+            Keys.onEnterPressed: lineOpsPopup.run()
+
+            Flow {
+                width: lineOpsPopup.availableWidth
+                spacing: 6
+
+                Repeater {
+                    model: lineOpsPopup.ops
+                    delegate: Rectangle {
+                        required property var modelData
+                        readonly property bool selected: lineOpsPopup.op === modelData.id
+                        width: opLabel.implicitWidth + 18
+                        height: 26
+                        radius: 13
+                        color: selected ? "#3a4f6e" : "#262626"
+                        border.color: selected ? "#4f7fbf" : "#333333"
+
+                        Text {
+                            id: opLabel
+                            anchors.centerIn: parent
+                            text: modelData.label
+                            color: "#eaeaea"
+                            font.pixelSize: 12
+                        }
+
+                        MouseArea {
+                            anchors.fill: parent
+                            cursorShape: Qt.PointingHandCursor
+                            onClicked: {
+                                lineOpsPopup.op = modelData.id
+                                lineOpsPopup.focusInput()
+                            }
+                        }
+                    }
+                }
+            }
+
+            Row {
+                spacing: 8
+                visible: lineOpsPopup.needsPattern || lineOpsPopup.op === "column"
+
+                Rectangle {
+                    width: lineOpsPopup.op === "column" ? 120 : lineOpsPopup.availableWidth
+                    height: 30
+                    radius: 6
+                    color: "#101010"
+                    border.color: lineOpsArg.activeFocus ? "#4f7fbf" : "#333333"
+
+                    Text {
+                        anchors.fill: parent
+                        anchors.leftMargin: 8
+                        verticalAlignment: Text.AlignVCenter
+                        text: lineOpsPopup.op === "column" ? "Column (1, 2, …)" : "Regular expression"
+                        color: "#8a8a8a"
+                        font.pixelSize: 12
+                        visible: lineOpsArg.text.length === 0
+                    }
+
+                    TextInput {
+                        id: lineOpsArg
+                        anchors.fill: parent
+                        anchors.leftMargin: 8
+                        anchors.rightMargin: 8
+                        verticalAlignment: Text.AlignVCenter
+                        color: "#eaeaea"
+                        font.family: "monospace"
+                        font.pixelSize: 12
+                        selectByMouse: true
+                        clip: true
+                        onAccepted: lineOpsPopup.run()
+                    }
+                }
+
+                Rectangle {
+                    visible: lineOpsPopup.op === "column"
+                    width: 150
+                    height: 30
+                    radius: 6
+                    color: "#101010"
+                    border.color: lineOpsDelimiter.activeFocus ? "#4f7fbf" : "#333333"
+
+                    Text {
+                        anchors.fill: parent
+                        anchors.leftMargin: 8
+                        verticalAlignment: Text.AlignVCenter
+                        text: "Delimiter (blank: spaces)"
+                        color: "#8a8a8a"
+                        font.pixelSize: 12
+                        visible: lineOpsDelimiter.text.length === 0
+                    }
+
+                    TextInput {
+                        id: lineOpsDelimiter
+                        anchors.fill: parent
+                        anchors.leftMargin: 8
+                        anchors.rightMargin: 8
+                        verticalAlignment: Text.AlignVCenter
+                        color: "#eaeaea"
+                        font.family: "monospace"
+                        font.pixelSize: 12
+                        maximumLength: 1
+                        onAccepted: lineOpsPopup.run()
+                    }
+                }
+            }
+
+            Item {
+                width: lineOpsPopup.availableWidth
+                height: 26
+
+                Text {
+                    anchors.left: parent.left
+                    anchors.verticalCenter: parent.verticalCenter
+                    text: (lineOpsPopup.toNewTab ? "☑" : "☐") + "  Open the result in a new tab"
+                    color: "#d6d6d6"
+                    font.pixelSize: 12
+
+                    MouseArea {
+                        anchors.fill: parent
+                        cursorShape: Qt.PointingHandCursor
+                        onClicked: lineOpsPopup.toNewTab = !lineOpsPopup.toNewTab
+                    }
+                }
+
+                Text {
+                    anchors.right: parent.right
+                    anchors.verticalCenter: parent.verticalCenter
+                    text: "Enter to run · Esc to close"
+                    color: "#8a8a8a"
+                    font.pixelSize: 11
+                }
             }
         }
+
     }
 
     Connections {
@@ -528,7 +806,16 @@ ApplicationWindow {
 
                             MouseArea {
                                 anchors.fill: parent
-                                onClicked: if (appSafe) appSafe.set_current_index(index)
+                                acceptedButtons: Qt.LeftButton | Qt.RightButton
+                                onClicked: (mouse) => {
+                                    if (!appSafe) return
+                                    if (mouse.button === Qt.RightButton) {
+                                        tabMenu.tabIndex = index
+                                        tabMenu.popup()
+                                    } else {
+                                        appSafe.set_current_index(index)
+                                    }
+                                }
                             }
 
                             Row {
@@ -582,6 +869,43 @@ ApplicationWindow {
                         }
                     }
 
+                    Menu {
+                        id: tabMenu
+                        property int tabIndex: -1
+
+                        MenuItem {
+                            text: "Compare with current tab"
+                            enabled: appSafe !== null && tabMenu.tabIndex !== appSafe.currentIndex
+                            onTriggered: appSafe.diff.compare_tabs(appSafe.currentIndex, tabMenu.tabIndex)
+                        }
+
+                        MenuSeparator {}
+
+                        MenuItem {
+                            text: "Save all"
+                            onTriggered: appSafe.save_all()
+                        }
+
+                        MenuSeparator {}
+
+                        MenuItem {
+                            text: "Close"
+                            onTriggered: appSafe.close_tab(tabMenu.tabIndex)
+                        }
+                        MenuItem {
+                            text: "Close others"
+                            onTriggered: appSafe.close_others(tabMenu.tabIndex)
+                        }
+                        MenuItem {
+                            text: "Close saved"
+                            onTriggered: appSafe.close_saved()
+                        }
+                        MenuItem {
+                            text: "Close all"
+                            onTriggered: appSafe.close_all()
+                        }
+                    }
+
                     Item {
                         id: windowControlsWrap
                         anchors.right: parent.right
@@ -764,7 +1088,9 @@ ApplicationWindow {
                     ScrollView {
                         id: editorScroll
                         anchors.fill: parent
+                        anchors.rightMargin: minimap.width
                         clip: true
+                        visible: !win.virtualMode && !win.hexMode
 
                         ScrollBar.vertical.policy: ScrollBar.AsNeeded
                         ScrollBar.horizontal.policy: ScrollBar.AlwaysOff
@@ -791,6 +1117,7 @@ ApplicationWindow {
                                 if (!editorScroll.contentItem) return
                                 if (win.restoring) return              // <- key: ignore while restoring
                                 appSafe.set_scroll_y(editorScroll.contentItem.contentY)
+                                Qt.callLater(win.syncViewport)
                             }
                         }
 
@@ -799,6 +1126,8 @@ ApplicationWindow {
                             width: editorScroll.availableWidth
                             wrapMode: TextArea.Wrap
                             padding: 12
+                            // room for the fold arrows
+                            leftPadding: appSafe && appSafe.structure.active ? 26 : 12
                             color: "#eeeeee"
                             font.pixelSize: settingsSafe ? settingsSafe.fontSize : 11
 
@@ -816,26 +1145,113 @@ ApplicationWindow {
                                 appSafe.text = text
                                 appSafe.set_cursor_position(editor.cursorPosition)
                                 customCaret.solidNow()
+                                Qt.callLater(win.syncViewport)
+                                Qt.callLater(win.updateCompletion)
                             }
 
+                            onHeightChanged: Qt.callLater(win.syncViewport)
+
                             onCursorPositionChanged: {
+                                // typing reopens it right after (updateCompletion is queued)
+                                win.closeCompletion()
                                 if (!appSafe) return
                                 // Block cursor writes during tab switching/restoring
                                 if (win.restoring || win.pendingRestore) return
                                 appSafe.set_cursor_position(cursorPosition)
                             }
 
+                            // both ends usually move together; callLater coalesces them
+                            onSelectionStartChanged: Qt.callLater(win.syncSelection)
+                            onSelectionEndChanged: Qt.callLater(win.syncSelection)
+
                             Keys.onPressed: (e) => {
                                 // keep caret solid for most keys
                                 if (e.key !== Qt.Key_Shift && e.key !== Qt.Key_Control && e.key !== Qt.Key_Alt && e.key !== Qt.Key_Meta)
                                     customCaret.solidNow()
 
+                                // several carets: every edit goes through Python as one batch
+                                if (appSafe && appSafe.carets.active && appSafe.carets.handle_key(e.key, e.modifiers, e.text)) {
+                                    e.accepted = true
+                                    return
+                                }
+
+                                if (win.completionWords.length > 0) {
+                                    const n = win.completionWords.length
+                                    e.accepted = true
+                                    if (e.key === Qt.Key_Down) win.completionIndex = (win.completionIndex + 1) % n
+                                    else if (e.key === Qt.Key_Up) win.completionIndex = (win.completionIndex + n - 1) % n
+                                    else if ((e.key === Qt.Key_Tab || e.key === Qt.Key_Return || e.key === Qt.Key_Enter)
+                                             && e.modifiers === Qt.NoModifier) win.acceptCompletion()
+                                    else if (e.key === Qt.Key_Escape) win.closeCompletion()
+                                    else e.accepted = false
+                                    if (e.accepted) return
+                                    // anything but typing ends the popup; typing refreshes it
+                                    if (e.text.length === 0 || e.text.charCodeAt(0) < 32) win.closeCompletion()
+                                }
+
                                 if (e.key === Qt.Key_Tab && e.modifiers === Qt.NoModifier) {
                                     e.accepted = true
                                     editor.insert(editor.cursorPosition, "    ")
                                 }
                             }
 
+                            onActiveFocusChanged: if (!activeFocus) win.closeCompletion()
+
+                            // ---- Word completion ----
+                            Rectangle {
+                                id: completionBox
+                                z: 10000
+                                visible: win.completionWords.length > 0 && editor.activeFocus
+                                x: Math.min(editor.cursorRectangle.x, Math.max(0, editor.width - width - 8))
+                                y: editor.cursorRectangle.y + editor.cursorRectangle.height + 4
+                                width: 220
+                                height: completionList.contentHeight + 8
+                                radius: 8
+                                color: "#1b1b1b"
+                                border.color: "#3a3a3a"
+                                border.width: 1
+
+                                Column {
+                                    id: completionList
+                                    readonly property real contentHeight: implicitHeight
+                                    x: 4
+                                    y: 4
+                                    width: parent.width - 8
+
+                                    Repeater {
+                                        model: win.completionWords
+
+                                        delegate: Rectangle {
+                                            required property int index
+                                            required property string modelData
+                                            width: completionList.width
+                                            height: 22
+                                            radius: 5
+                                            color: index === win.completionIndex ? "#264f78" : "transparent"
+
+                                            Text {
+                                                anchors.left: parent.left
+                                                anchors.leftMargin: 8
+                                                anchors.verticalCenter: parent.verticalCenter
+                                                text: modelData
+                                                textFormat: Text.PlainText
+                                                color: "#e6e6e6"
+                                                font.family: "monospace"
+                                                font.pixelSize: 12
+                                            }
+
+                                            MouseArea {
+                                                anchors.fill: parent
+                                                onClicked: {
+                                                    win.completionIndex = index
+                                                    win.acceptCompletion()
+                                                }
+                                            }
+                                        }
+                                    }
+                                }
+                            }
+
                             background: Rectangle {
                                 radius: cornerRadius
                                 color: "#111111"
@@ -852,6 +1268,240 @@ ApplicationWindow {
                                     // Tab switching is handled by restoreEditorState().
                                     if (!editor.activeFocus && !win.pendingRestore) {
                                         editor.text = appSafe.text
+                                        win.applyFolds(true)
+                                    }
+                                }
+                            }
+
+                            // ---- Multiple carets (see MultiCaretController) ----
+                            Connections {
+                                target: appSafe ? appSafe.carets : null
+                                function onEditorEditsReady() {
+                                    if (!win.virtualMode) appSafe.carets.apply_to_editor(editor.textDocument)
+                                }
+                                function onPrimaryMoved(anchor, caret) {
+                                    if (win.virtualMode) {
+                                        appSafe.virtualEditor.set_selection(anchor, caret)
+                                    } else {
+                                        editor.select(anchor, caret)
+                                        Qt.callLater(win.syncViewport)
+                                    }
+                                }
+                            }
+
+                            Repeater {
+                                model: appSafe && !win.virtualMode ? appSafe.carets.visibleCarets : []
+
+                                delegate: Item {
+                                    id: extraCaret
+                                    required property var modelData
+                                    readonly property rect startRect: (editor.contentHeight, editor.positionToRectangle(modelData.start))
+                                    readonly property rect endRect: (editor.contentHeight, editor.positionToRectangle(modelData.end))
+                                    readonly property rect caretRect: modelData.caret === modelData.start ? startRect : endRect
+
+                                    // selections on one visual line only; wrapped ones show their caret
+                                    Rectangle {
+                                        visible: extraCaret.endRect.y === extraCaret.startRect.y
+                                                 && extraCaret.endRect.x > extraCaret.startRect.x
+                                        x: extraCaret.startRect.x
+                                        y: extraCaret.startRect.y
+                                        width: extraCaret.endRect.x - extraCaret.startRect.x
+                                        height: extraCaret.startRect.height
+                                        color: "#264f78"
+                                        opacity: 0.8
+                                    }
+
+                                    Rectangle {
+                                        x: extraCaret.caretRect.x
+                                        y: extraCaret.caretRect.y
+                                        width: 1
+                                        height: extraCaret.caretRect.height
+                                        color: "#eaeaea"
+                                        visible: customCaret.visible
+                                        opacity: customCaret.opacity
+                                    }
+                                }
+                            }
+
+                            // Alt+click adds a caret, Alt+drag selects a column
+                            MouseArea {
+                                anchors.fill: parent
+                                property int anchorPos: -1
+                                onPressed: (mouse) => {
+                                    if (!appSafe || !(mouse.modifiers & Qt.AltModifier)) {
+                                        mouse.accepted = false
+                                        return
+                                    }
+                                    editor.forceActiveFocus()
+                                    anchorPos = editor.positionAt(mouse.x, mouse.y)
+                                    appSafe.carets.add_caret(anchorPos)
+                                }
+                                onPositionChanged: (mouse) => {
+                                    if (anchorPos >= 0 && pressed)
+                                        appSafe.carets.column_select(anchorPos, editor.positionAt(mouse.x, mouse.y))
+                                }
+                                onReleased: anchorPos = -1
+                            }
+
+                            // ---- Folding and bracket matching (see StructureController) ----
+                            Connections {
+                                target: appSafe ? appSafe.structure : null
+                                function onFoldsChanged() {
+                                    if (!win.restoring && !win.pendingRestore) win.applyFolds(false)
+                                }
+                                function onMoveCaret(pos) {
+                                    if (win.virtualMode) {
+                                        appSafe.virtualEditor.set_selection(pos, pos)
+                                    } else {
+                                        editor.cursorPosition = pos
+                                        Qt.callLater(win.syncViewport)
+                                    }
+                                }
+                            }
+
+                            Repeater {
+                                model: appSafe && !win.virtualMode ? appSafe.structure.markers : []
+
+                                delegate: Item {
+                                    id: foldMarker
+                                    required property var modelData
+                                    readonly property rect startRect: (editor.contentHeight, editor.positionToRectangle(Math.min(modelData.start, editor.length)))
+                                    readonly property rect endRect: (editor.contentHeight, editor.positionToRectangle(Math.min(modelData.end, editor.length)))
+
+                                    Text {
+                                        x: 11
+                                        y: foldMarker.startRect.y
+                                        width: 12
+                                        height: foldMarker.startRect.height
+                                        verticalAlignment: Text.AlignVCenter
+                                        horizontalAlignment: Text.AlignHCenter
+                                        text: foldMarker.modelData.folded ? "▸" : "▾"
+                                        color: foldMarker.modelData.folded ? "#d0d0d0" : "#6b6b6b"
+                                        font.pixelSize: 10
+
+                                        MouseArea {
+                                            anchors.fill: parent
+                                            cursorShape: Qt.PointingHandCursor
+                                            onClicked: appSafe.structure.toggle_fold(foldMarker.modelData.line)
+                                        }
+                                    }
+
+                                    // what a folded region hides
+                                    Rectangle {
+                                        visible: foldMarker.modelData.folded
+                                        x: foldMarker.endRect.x + 6
+                                        y: foldMarker.endRect.y + 2
+                                        width: 22
+                                        height: Math.max(4, foldMarker.endRect.height - 4)
+                                        radius: 4
+                                        color: "#2a2a2a"
+                                        border.color: "#444444"
+
+                                        Text {
+                                            anchors.centerIn: parent
+                                            text: "⋯"
+                                            color: "#a0a0a0"
+                                            font.pixelSize: 10
+                                        }
+
+                                        MouseArea {
+                                            anchors.fill: parent
+                                            cursorShape: Qt.PointingHandCursor
+                                            onClicked: appSafe.structure.toggle_fold(foldMarker.modelData.line)
+                                        }
+                                    }
+                                }
+                            }
+
+                            Repeater {
+                                model: appSafe && !win.virtualMode ? appSafe.structure.brackets : []
+
+                                delegate: Rectangle {
+                                    required property var modelData
+                                    readonly property rect startRect: (editor.contentHeight, editor.positionToRectangle(Math.min(modelData.offset, editor.length)))
+                                    readonly property rect endRect: (editor.contentHeight, editor.positionToRectangle(Math.min(modelData.offset + 1, editor.length)))
+
+                                    x: startRect.x
+                                    y: startRect.y
+                                    width: Math.max(2, endRect.y === startRect.y ? endRect.x - startRect.x : 7)
+                                    height: startRect.height
+                                    // drawn over the glyph, so only a tint
+                                    color: modelData.ok ? "#405f8f6f" : "#60b85c5c"
+                                    border.color: modelData.ok ? "#5f8f6f" : "#b85c5c"
+                                    border.width: 1
+                                }
+                            }
+
+                            // ---- Change markers vs. the saved file (see DiffController) ----
+                            Repeater {
+                                model: appSafe && !win.virtualMode ? appSafe.diff.markers : []
+
+                                delegate: Rectangle {
+                                    required property var modelData
+                                    readonly property rect startRect: (editor.contentHeight, editor.positionToRectangle(Math.min(modelData.start, editor.length)))
+                                    readonly property rect endRect: (editor.contentHeight, editor.positionToRectangle(Math.min(modelData.end, editor.length)))
+                                    readonly property bool deletion: modelData.kind === "deleted"
+
+                                    x: 3
+                                    y: deletion ? startRect.y - 2 : startRect.y
+                                    width: 3
+                                    height: deletion ? 4 : Math.max(4, endRect.y + endRect.height - startRect.y)
+                                    radius: 1
+                                    color: modelData.kind === "added" ? "#4e9a5f"
+                                         : modelData.kind === "modified" ? "#4f7fbf" : "#b85c5c"
+
+                                    MouseArea {
+                                        anchors.fill: parent
+                                        anchors.leftMargin: -3
+                                        anchors.rightMargin: -4
+                                        enabled: modelData.kind !== "added"
+                                        cursorShape: Qt.PointingHandCursor
+                                        onClicked: {
+                                            savedLinesPopup.y = parent.y + parent.height + 4
+                                            appSafe.diff.request_saved_lines(modelData.line)
+                                        }
+                                    }
+                                }
+                            }
+
+                            Popup {
+                                id: savedLinesPopup
+                                x: 12
+                                width: Math.min(editor.width - 24, 560)
+                                padding: 10
+                                property string savedText: ""
+
+                                Connections {
+                                    target: appSafe ? appSafe.diff : null
+                                    function onSavedLinesReady(line, text) {
+                                        savedLinesPopup.savedText = text
+                                        savedLinesPopup.open()
+                                    }
+                                }
+
+                                background: Rectangle {
+                                    radius: 8
+                                    color: "#1b1b1b"
+                                    border.color: "#3a3a3a"
+                                    border.width: 1
+                                }
+
+                                contentItem: Column {
+                                    spacing: 6
+                                    Text {
+                                        text: "Saved version"
+                                        color: "#8a8a8a"
+                                        font.pixelSize: 11
+                                    }
+                                    Text {
+                                        width: savedLinesPopup.availableWidth
+                                        text: savedLinesPopup.savedText
+                                        color: "#d6d6d6"
+                                        font.family: "monospace"
+                                        font.pixelSize: 12
+                                        elide: Text.ElideRight
+                                        maximumLineCount: 20
+                                        textFormat: Text.PlainText
                                     }
                                 }
                             }
@@ -905,6 +1555,38 @@ ApplicationWindow {
                         }
                     }
 
+                    VirtualEditor {
+                        id: virtualView
+                        anchors.fill: parent
+                        anchors.rightMargin: minimap.width
+                        visible: win.virtualMode
+                        editor: appSafe ? appSafe.virtualEditor : null
+                        carets: appSafe ? appSafe.carets : null
+                        structure: appSafe ? appSafe.structure : null
+                        fontPixelSize: settingsSafe ? settingsSafe.fontSize : 11
+
+                        Connections {
+                            target: virtualView.flick
+                            function onContentYChanged() {
+                                if (!appSafe || !win.virtualMode || win.restoring) return
+                                appSafe.set_scroll_y(virtualView.flick.contentY)
+                            }
+                        }
+
+                        Connections {
+                            target: appSafe ? appSafe.virtualEditor : null
+                            function onCaretChanged() { Qt.callLater(win.syncSelection) }
+                        }
+                    }
+
+                    HexView {
+                        id: hexView
+                        anchors.fill: parent
+                        visible: win.hexMode
+                        hex: appSafe ? appSafe.hexView : null
+                        fontPixelSize: settingsSafe ? settingsSafe.fontSize : 11
+                    }
+
                     // IMPORTANT: tracking mouse area must NOT cover arrow/sidebar.
                     // Put it BEFORE them (so they draw above), and keep it non-clickable.
                     MouseArea {
@@ -922,6 +1604,69 @@ ApplicationWindow {
                         }
                     }
 
+                    // ---- Minimap (overview rendered in Python, see MinimapController) ----
+                    Item {
+                        id: minimap
+                        z: 5
+                        width: 72
+                        visible: !win.hexMode
+                        anchors.top: parent.top
+                        anchors.bottom: parent.bottom
+                        anchors.right: parent.right
+
+                        readonly property var flick: win.virtualMode ? virtualView.flick : editorScroll.contentItem
+                        readonly property real contentH: flick ? Math.max(flick.contentHeight, flick.height) : 1
+                        readonly property real viewH: flick ? flick.height : 0
+
+                        function scrollTo(y) {
+                            if (!flick) return
+                            const maxY = Math.max(0, flick.contentHeight - flick.height)
+                            const target = (y / height) * contentH - viewH / 2
+                            flick.contentY = Math.max(0, Math.min(maxY, target))
+                        }
+
+                        Rectangle {
+                            anchors.fill: parent
+                            color: "#111111"
+                        }
+
+                        Image {
+                            anchors.fill: parent
+                            anchors.margins: 4
+                            source: (appSafe && appSafe.minimap) ? "image://minimap/" + appSafe.minimap.revision : ""
+                            cache: false
+                            asynchronous: false
+                            smooth: true
+                            fillMode: Image.Stretch
+                        }
+
+                        Rectangle {
+                            id: minimapViewport
+                            x: 0
+                            width: parent.width
+                            y: minimap.flick ? (minimap.flick.contentY / minimap.contentH) * minimap.height : 0
+                            height: Math.max(12, (minimap.viewH / minimap.contentH) * minimap.height)
+                            color: "#ffffff"
+                            opacity: minimapMouse.pressed ? 0.14 : (minimapMouse.containsMouse ? 0.10 : 0.06)
+                        }
+
+                        MouseArea {
+                            id: minimapMouse
+                            anchors.fill: parent
+                            hoverEnabled: true
+                            cursorShape: Qt.PointingHandCursor
+                            onPressed: (mouse) => minimap.scrollTo(mouse.y)
+                            onPositionChanged: (mouse) => { if (pressed) minimap.scrollTo(mouse.y) }
+                        }
+                    }
+
+                    CompareView {
+                        id: compareView
+                        z: 40
+                        anchors.fill: parent
+                        diff: appSafe ? appSafe.diff : null
+                    }
+
                     // ---- Left arrow hint (hover to open) ----
                     Item {
                         id: leftArrow
@@ -1088,13 +1833,11 @@ ApplicationWindow {
 
                             function trigger(actionId) {
                                 if (win.uiLocked) return
-                                switch (actionId) {
-                                case "new":      if (appSafe) appSafe.new_file(); break
-                                case "open":     openDialog.open(); break
-                                case "save":     if (appSafe) appSafe.save(); break
-                                case "saveAs":   saveAsDialog.open(); break
-                                case "settings": settingsWindow.visible = true; break
+                                const commandIds = {
+                                    "new": "file.new", "open": "file.open", "save": "file.save",
+                                    "saveAs": "file.saveAs", "settings": "view.settings"
                                 }
+                                if (appSafe && commandIds[actionId]) appSafe.commands.run(commandIds[actionId])
                             }
 
                             // --- Mouse wheel scroll rotates the sidebar wheel ---
@@ -1436,6 +2179,24 @@ ApplicationWindow {
                                     font.pixelSize: 11
                                     opacity: 0.70
                                 }
+
+                                Rectangle {
+                                    width: 3
+                                    height: 3
+                                    radius: 1.5
+                                    color: "#eaeaea"
+                                    opacity: 0.55
+                                    anchors.verticalCenter: parent.verticalCenter
+                                }
+
+                                // live counts (selection counts while something is selected)
+                                Text {
+                                    id: statsText
+                                    text: win.statsLabel()
+                                    color: "#eaeaea"
+                                    font.pixelSize: 11
+                                    opacity: 0.70
+                                }
                             }
                         }
 
@@ -1869,10 +2630,26 @@ ApplicationWindow {
 
             // play animations both ways (already handled by your Behaviors)
             onVisibleChanged: {
-                if (visible) Qt.callLater(() => cmdSearchInput.forceActiveFocus())
+                if (visible) {
+                    // empty query lists recently opened files
+                    if (appSafe) appSafe.quickOpen.search("")
+                    if (appSafe) appSafe.commands.search("")
+                    quickList.currentIndex = 0
+                    Qt.callLater(() => cmdSearchInput.forceActiveFocus())
+                }
                 else cmdSearchInput.text = ""
             }
 
+            // a leading ">" turns the file search into the command palette
+            readonly property bool commandMode: cmdSearchInput.text.startsWith(">")
+
+            function activateResult(row) {
+                if (!appSafe || row < 0 || row >= quickList.count) return
+                win.searchOpen = false
+                if (commandMode) appSafe.commands.activate(row)
+                else appSafe.quickOpen.activate(row)
+            }
+
             // ✅ when opening: show immediately
             // ✅ when closing: wait for the reverse animation to finish, then hide
             Connections {
@@ -1965,7 +2742,7 @@ ApplicationWindow {
                 anchors.left: parent.left
                 anchors.right: parent.right
                 anchors.top: parent.top
-                height: 86
+                height: searchCard.height + 32
 
                 opacity: win.searchOpen ? 1 : 0
                 Behavior on opacity { NumberAnimation { duration: 160; easing.type: Easing.OutCubic } }
@@ -1980,7 +2757,7 @@ ApplicationWindow {
                     id: searchCard
                     anchors.horizontalCenter: parent.horizontalCenter
                     width: Math.min(rootBg.width - 32, 640)
-                    height: 54
+                    height: 54 + 28 + (quickList.visible ? quickList.Layout.preferredHeight + 8 : 0)
                     radius: 14
                     antialiasing: true
                     color: "transparent"
@@ -2028,48 +2805,174 @@ ApplicationWindow {
                         anchors.fill: parent
                         anchors.margins: 10
 
-                        RowLayout {
+                        ColumnLayout {
                             anchors.fill: parent
-                            spacing: 10
+                            spacing: 8
 
-                            Item {
+                            RowLayout {
                                 Layout.fillWidth: true
-                                height: 34
+                                Layout.preferredHeight: 34
+                                spacing: 10
+
+                                Item {
+                                    Layout.fillWidth: true
+                                    height: 34
+
+                                    Text {
+                                        anchors.left: parent.left
+                                        anchors.right: parent.right
+                                        anchors.verticalCenter: parent.verticalCenter
+                                        anchors.leftMargin: 10
+                                        anchors.rightMargin: 10
+                                        text: "Search files, or > for commands…"
+                                        color: "#ffffff"
+                                        opacity: cmdSearchInput.text.length > 0 ? 0.0 : 0.75
+                                        font.pixelSize: 16
+                                        font.weight: Font.Medium
+                                        elide: Text.ElideRight
+                                    }
+
+                                    TextInput {
+                                        id: cmdSearchInput
+                                        anchors.fill: parent
+                                        anchors.leftMargin: 10
+                                        anchors.rightMargin: 10
+                                        color: "#ffffff"
+                                        font.pixelSize: 16
+                                        font.weight: Font.Medium
+                                        verticalAlignment: Text.AlignVCenter
+                                        selectByMouse: true
+                                        focus: true
+
+                                        onTextChanged: {
+                                            if (!appSafe || !searchLayer.visible) return
+                                            if (searchLayer.commandMode) appSafe.commands.search(text.slice(1))
+                                            else appSafe.quickOpen.search(text)
+                                            quickList.currentIndex = 0
+                                        }
+
+                                        Keys.onUpPressed: quickList.decrementCurrentIndex()
+                                        Keys.onDownPressed: quickList.incrementCurrentIndex()
+                                        onAccepted: searchLayer.activateResult(quickList.currentIndex)
+                                    }
+                                }
 
                                 Text {
-                                    anchors.left: parent.left
-                                    anchors.right: parent.right
-                                    anchors.verticalCenter: parent.verticalCenter
-                                    anchors.leftMargin: 10
-                                    anchors.rightMargin: 10
-                                    text: "Search…"
-                                    color: "#ffffff"
-                                    opacity: cmdSearchInput.text.length > 0 ? 0.0 : 0.75
-                                    font.pixelSize: 16
-                                    font.weight: Font.Medium
-                                    elide: Text.ElideRight
+                                    text: "Esc"
+                                    color: "#eaeaea"
+                                    opacity: 0.45
+                                    font.pixelSize: 11
+                                    Layout.alignment: Qt.AlignVCenter
                                 }
+                            }
 
-                                TextInput {
-                                    id: cmdSearchInput
-                                    anchors.fill: parent
-                                    anchors.leftMargin: 10
-                                    anchors.rightMargin: 10
-                                    color: "#ffffff"
-                                    font.pixelSize: 16
-                                    font.weight: Font.Medium
-                                    verticalAlignment: Text.AlignVCenter
-                                    selectByMouse: true
-                                    focus: true
+                            // ---- Quick-open results ----
+                            ListView {
+                                id: quickList
+                                Layout.fillWidth: true
+                                Layout.preferredHeight: Math.min(count, 8) * 36
+                                visible: count > 0
+                                clip: true
+                                boundsBehavior: Flickable.StopAtBounds
+                                highlightMoveDuration: 0
+                                model: !appSafe ? null
+                                     : searchLayer.commandMode ? appSafe.commands.results : appSafe.quickOpen.results
+
+                                highlight: Rectangle {
+                                    radius: 8
+                                    color: "#26ffffff"
+                                }
+
+                                delegate: Item {
+                                    width: quickList.width
+                                    height: 36
+
+                                    Column {
+                                        anchors.left: parent.left
+                                        anchors.right: recentTag.left
+                                        anchors.verticalCenter: parent.verticalCenter
+                                        anchors.leftMargin: 10
+                                        anchors.rightMargin: 8
+                                        spacing: 1
+
+                                        Text {
+                                            width: parent.width
+                                            text: searchLayer.commandMode ? model.title : model.name
+                                            color: "#ffffff"
+                                            font.pixelSize: 13
+                                            elide: Text.ElideRight
+                                        }
+
+                                        Text {
+                                            width: parent.width
+                                            text: searchLayer.commandMode ? model.category : model.folder
+                                            color: "#eaeaea"
+                                            opacity: 0.55
+                                            font.pixelSize: 10
+                                            elide: Text.ElideMiddle
+                                        }
+                                    }
+
+                                    Text {
+                                        id: recentTag
+                                        anchors.right: parent.right
+                                        anchors.rightMargin: 10
+                                        anchors.verticalCenter: parent.verticalCenter
+                                        text: searchLayer.commandMode ? model.shortcut : (model.recent ? "recent" : "")
+                                        color: "#eaeaea"
+                                        opacity: 0.45
+                                        font.pixelSize: 10
+                                    }
+
+                                    MouseArea {
+                                        anchors.fill: parent
+                                        hoverEnabled: true
+                                        onEntered: quickList.currentIndex = index
+                                        onClicked: searchLayer.activateResult(index)
+                                    }
                                 }
                             }
 
-                            Text {
-                                text: "Esc"
-                                color: "#eaeaea"
-                                opacity: 0.45
-                                font.pixelSize: 11
-                                Layout.alignment: Qt.AlignVCenter
+                            // ---- Project root footer ----
+                            RowLayout {
+                                Layout.fillWidth: true
+                                Layout.preferredHeight: 20
+                                spacing: 10
+
+                                Text {
+                                    Layout.fillWidth: true
+                                    Layout.leftMargin: 10
+                                    text: {
+                                        if (!appSafe || appSafe.quickOpen.projectRoot === "")
+                                            return "No project folder"
+                                        const qo = appSafe.quickOpen
+                                        return qo.projectRoot + "  ·  " + qo.indexedCount + " files"
+                                               + (qo.indexing ? "  ·  indexing…" : "")
+                                    }
+                                    color: "#eaeaea"
+                                    opacity: 0.45
+                                    font.pixelSize: 11
+                                    elide: Text.ElideLeft
+                                }
+
+                                Text {
+                                    Layout.rightMargin: 2
+                                    text: "Choose folder…"
+                                    color: "#eaeaea"
+                                    opacity: chooseFolderArea.containsMouse ? 0.9 : 0.6
+                                    font.pixelSize: 11
+
+                                    MouseArea {
+                                        id: chooseFolderArea
+                                        anchors.fill: parent
+                                        hoverEnabled: true
+                                        cursorShape: Qt.PointingHandCursor
+                                        onClicked: {
+                                            win.searchOpen = false
+                                            projectDialog.open()
+                                        }
+                                    }
+                                }
                             }
                         }
                     }
@@ -2124,5 +3027,12 @@ ApplicationWindow {
         onAccepted: if (appSafe) appSafe.save_as(selectedFile.toString())
     }
 
+    FolderDialog {
+        id: projectDialog
+        title: "Choose project folder"
+        options: FolderDialog.DontUseNativeDialog
+        onAccepted: if (appSafe) appSafe.quickOpen.set_project_root(selectedFolder.toString())
+    }
+
     SettingsWindow { id: settingsWindow; visible: false }
 }
\ No newline at end of file
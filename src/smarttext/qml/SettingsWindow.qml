@@ -191,6 +191,44 @@ ApplicationWindow {
                                     }
                                 }
 
+                                Rectangle {
+                                    Layout.fillWidth: true
+                                    height: 60
+                                    radius: 10
+                                    color: "#111111"
+                                    border.color: "#333333"
+                                    border.width: 1
+
+                                    RowLayout {
+                                        anchors.fill: parent
+                                        anchors.margins: 14
+                                        spacing: 12
+
+                                        Label { text: "Large file view above (lines)"; color: "#dddddd"; font.pixelSize: 13 }
+                                        Item { Layout.fillWidth: true }
+
+                                        SpinBox {
+                                            from: 1000
+                                            to: 100000000
+                                            value: settingsStore ? settingsStore.largeFileLines : 200000
+                                            editable: true
+                                            stepSize: 50000
+
+                                            onValueModified: if (settingsStore) settingsStore.largeFileLines = value
+
+                                            implicitWidth: 140
+                                            implicitHeight: 28
+
+                                            background: Rectangle {
+                                                radius: settingsWin.cornerRadius
+                                                color: "#1e1e1e"
+                                                border.color: "#333333"
+                                                border.width: 1
+                                            }
+                                        }
+                                    }
+                                }
+
                                 Item { Layout.fillHeight: true }
                             }
                         }
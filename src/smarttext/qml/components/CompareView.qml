@@ -0,0 +1,168 @@
+import QtQuick 2.15
+import QtQuick.Controls 2.15
+
+// Side-by-side compare of two tabs, driven by DiffController (app.diff).
+Rectangle {
+    id: view
+
+    required property var diff
+
+    color: "#151515"
+    radius: 10
+    border.color: "#2e2e2e"
+    border.width: 1
+    visible: diff !== null && diff.compareOpen
+
+    readonly property int numberWidth: 48
+
+    function jump(direction) {
+        if (!diff) return
+        const row = diff.next_change(rows.indexAt(0, rows.contentY + 1), direction)
+        if (row >= 0) rows.positionViewAtIndex(row, ListView.Beginning)
+    }
+
+    function kindColor(kind, side) {
+        if (kind === "modified") return "#1e2a3a"
+        if (kind === "deleted") return side === 0 ? "#3a1f1f" : "#1a1a1a"
+        if (kind === "added") return side === 1 ? "#1f3324" : "#1a1a1a"
+        return "transparent"
+    }
+
+    // swallow clicks so the editor underneath never gets them
+    MouseArea { anchors.fill: parent; acceptedButtons: Qt.AllButtons }
+
+    Item {
+        id: header
+        anchors.left: parent.left
+        anchors.right: parent.right
+        anchors.top: parent.top
+        height: 40
+
+        Column {
+            anchors.left: parent.left
+            anchors.leftMargin: 14
+            anchors.verticalCenter: parent.verticalCenter
+            spacing: 2
+
+            Text {
+                text: view.diff ? view.diff.compareTitle : ""
+                color: "#e6e6e6"
+                font.pixelSize: 13
+            }
+            Text {
+                text: view.diff ? view.diff.compareSummary : ""
+                color: "#8a8a8a"
+                font.pixelSize: 11
+            }
+        }
+
+        Row {
+            anchors.right: parent.right
+            anchors.rightMargin: 10
+            anchors.verticalCenter: parent.verticalCenter
+            spacing: 6
+
+            Repeater {
+                model: [
+                    { label: "↑", dir: -1 },
+                    { label: "↓", dir: 1 },
+                    { label: "×", dir: 0 }
+                ]
+
+                delegate: Rectangle {
+                    required property var modelData
+                    width: 26
+                    height: 26
+                    radius: 7
+                    color: navArea.containsMouse ? "#2f2f2f" : "#222222"
+
+                    Text {
+                        anchors.centerIn: parent
+                        text: modelData.label
+                        color: "#d0d0d0"
+                        font.pixelSize: 14
+                    }
+
+                    MouseArea {
+                        id: navArea
+                        anchors.fill: parent
+                        hoverEnabled: true
+                        onClicked: {
+                            if (modelData.dir === 0) view.diff.close_compare()
+                            else view.jump(modelData.dir)
+                        }
+                    }
+                }
+            }
+        }
+    }
+
+    ListView {
+        id: rows
+        anchors.top: header.bottom
+        anchors.left: parent.left
+        anchors.right: parent.right
+        anchors.bottom: parent.bottom
+        anchors.margins: 6
+        clip: true
+        model: view.diff ? view.diff.compareModel : null
+        boundsBehavior: Flickable.StopAtBounds
+        reuseItems: true
+
+        ScrollBar.vertical: ScrollBar { policy: ScrollBar.AsNeeded }
+
+        delegate: Row {
+            id: row
+            required property int leftNumber
+            required property string leftText
+            required property int rightNumber
+            required property string rightText
+            required property string kind
+
+            width: rows.width
+            height: 18
+
+            Repeater {
+                model: 2
+
+                delegate: Rectangle {
+                    required property int index
+                    readonly property int number: index === 0 ? row.leftNumber : row.rightNumber
+
+                    width: row.width / 2
+                    height: row.height
+                    color: view.kindColor(row.kind, index)
+                    clip: true
+
+                    Text {
+                        width: view.numberWidth - 8
+                        anchors.verticalCenter: parent.verticalCenter
+                        horizontalAlignment: Text.AlignRight
+                        text: parent.number > 0 ? parent.number : ""
+                        color: "#5f5f5f"
+                        font.family: "monospace"
+                        font.pixelSize: 11
+                    }
+
+                    Text {
+                        x: view.numberWidth
+                        width: parent.width - view.numberWidth - 6
+                        anchors.verticalCenter: parent.verticalCenter
+                        text: index === 0 ? row.leftText : row.rightText
+                        textFormat: Text.PlainText
+                        elide: Text.ElideRight
+                        color: "#d8d8d8"
+                        font.family: "monospace"
+                        font.pixelSize: 12
+                    }
+                }
+            }
+        }
+    }
+
+    BusyIndicator {
+        anchors.centerIn: rows
+        running: view.diff !== null && view.diff.compareBusy
+        visible: running
+    }
+}
@@ -0,0 +1,235 @@
+import QtQuick 2.15
+import QtQuick.Controls 2.15
+
+// Binary files: a ListView over app.hexView.model, sixteen bytes per row,
+// formatted in Python only for the rows on screen. Read-only.
+FocusScope {
+    id: view
+
+    required property var hex
+    property int fontPixelSize: 11
+    property alias flick: list
+    property alias offsetInput: offsetField.input
+    property alias patternInput: patternField.input
+
+    readonly property real lineHeight: Math.ceil(metrics.height) + 4
+    readonly property real charWidth: metrics.advanceWidth("0")
+    readonly property real hexX: 12 + charWidth * 10
+    // 16 bytes as "xx " plus the extra space between the two groups of eight
+    readonly property real asciiX: byteX(16) + charWidth * 2
+
+    function byteX(col) { return hexX + charWidth * (3 * col + (col >= 8 ? 1 : 0)) }
+
+    function focusOffset() { offsetInput.forceActiveFocus(); offsetInput.selectAll() }
+    function focusSearch() { patternInput.forceActiveFocus(); patternInput.selectAll() }
+
+    FontMetrics {
+        id: metrics
+        font.family: "monospace"
+        font.pixelSize: view.fontPixelSize
+    }
+
+    Connections {
+        target: view.hex
+        function onRevealRow(row) { list.positionViewAtIndex(row, ListView.Center) }
+    }
+
+    Rectangle {
+        anchors.fill: parent
+        radius: 10
+        color: "#111111"
+        border.color: "#333333"
+        border.width: 1
+    }
+
+    component Field: Rectangle {
+        id: field
+        property alias input: fieldInput
+        property string placeholder: ""
+        signal submitted(bool backwards)
+
+        height: 28
+        radius: 6
+        color: "#101010"
+        border.color: fieldInput.activeFocus ? "#4f7fbf" : "#333333"
+
+        Text {
+            anchors.fill: parent
+            anchors.leftMargin: 8
+            verticalAlignment: Text.AlignVCenter
+            text: field.placeholder
+            color: "#8a8a8a"
+            font.pixelSize: 12
+            visible: fieldInput.text.length === 0
+        }
+
+        TextInput {
+            id: fieldInput
+            anchors.fill: parent
+            anchors.leftMargin: 8
+            anchors.rightMargin: 8
+            verticalAlignment: Text.AlignVCenter
+            color: "#eaeaea"
+            font.family: "monospace"
+            font.pixelSize: 12
+            selectByMouse: true
+            clip: true
+            Keys.onReturnPressed: (e) => field.submitted((e.modifiers & Qt.ShiftModifier) !== 0)
+            Keys.onEnterPressed: (e) => field.submitted((e.modifiers & Qt.ShiftModifier) !== 0)
+        }
+    }
+
+    component StepButton: Rectangle {
+        id: step
+        property string label: ""
+        signal clicked()
+
+        width: 28
+        height: 28
+        radius: 6
+        color: stepMouse.pressed ? "#2a2a2a" : stepMouse.containsMouse ? "#1e1e1e" : "#151515"
+        border.color: "#333333"
+
+        Text {
+            anchors.centerIn: parent
+            text: step.label
+            color: "#cfcfcf"
+            font.pixelSize: 12
+        }
+
+        MouseArea {
+            id: stepMouse
+            anchors.fill: parent
+            hoverEnabled: true
+            cursorShape: Qt.PointingHandCursor
+            onClicked: step.clicked()
+        }
+    }
+
+    Row {
+        id: toolbar
+        x: 10
+        y: 8
+        spacing: 6
+
+        Field {
+            id: offsetField
+            width: 150
+            placeholder: "Go to offset (hex)"
+            onSubmitted: if (view.hex) view.hex.jump(input.text)
+        }
+
+        Field {
+            id: patternField
+            width: 240
+            placeholder: "Find bytes: de ad, or \"text\""
+            onSubmitted: (backwards) => { if (view.hex) view.hex.find(input.text, !backwards) }
+        }
+
+        StepButton {
+            label: "▲"
+            onClicked: if (view.hex) view.hex.find(patternField.input.text, false)
+        }
+
+        StepButton {
+            label: "▼"
+            onClicked: if (view.hex) view.hex.find(patternField.input.text, true)
+        }
+    }
+
+    Text {
+        anchors.right: parent.right
+        anchors.rightMargin: 14
+        anchors.verticalCenter: toolbar.verticalCenter
+        text: !view.hex ? ""
+            : view.hex.selectionText.length > 0 ? view.hex.selectionText + "  ·  " + view.hex.sizeText
+            : view.hex.sizeText
+        color: "#8a8a8a"
+        font.pixelSize: 12
+    }
+
+    ListView {
+        id: list
+        anchors.fill: parent
+        anchors.topMargin: toolbar.y + toolbar.height + 8
+        anchors.margins: 1
+        clip: true
+        model: view.hex ? view.hex.model : null
+        boundsBehavior: Flickable.StopAtBounds
+        reuseItems: true
+        cacheBuffer: 0
+
+        ScrollBar.vertical: ScrollBar {
+            width: 10
+            policy: ScrollBar.AsNeeded
+            contentItem: Rectangle {
+                radius: width / 2
+                color: "#6b6b6b"
+                opacity: parent.pressed ? 0.9 : 0.6
+            }
+        }
+
+        delegate: Item {
+            id: row
+            required property int index
+            required property string offsetText
+            required property string hexText
+            required property string asciiText
+
+            width: list.width
+            height: view.lineHeight
+
+            // selected byte columns of this row: [selLo, selHi)
+            readonly property int selLo: !view.hex || index < view.hex.selRow || index > view.hex.selEndRow ? 0
+                                         : index === view.hex.selRow ? view.hex.selColumn : 0
+            readonly property int selHi: !view.hex || index < view.hex.selRow || index > view.hex.selEndRow ? 0
+                                         : index === view.hex.selEndRow ? view.hex.selEndColumn : 16
+
+            Rectangle {
+                visible: row.selHi > row.selLo
+                x: view.byteX(row.selLo) - 2
+                width: view.byteX(row.selHi - 1) + view.charWidth * 2 - x + 2
+                height: parent.height
+                color: "#264f78"
+            }
+
+            Rectangle {
+                visible: row.selHi > row.selLo
+                x: view.asciiX + view.charWidth * row.selLo
+                width: view.charWidth * (row.selHi - row.selLo)
+                height: parent.height
+                color: "#264f78"
+            }
+
+            Text {
+                x: 12
+                anchors.verticalCenter: parent.verticalCenter
+                text: row.offsetText
+                color: "#6f6f6f"
+                font: metrics.font
+            }
+
+            Text {
+                x: view.hexX
+                anchors.verticalCenter: parent.verticalCenter
+                text: row.hexText
+                color: "#eeeeee"
+                font: metrics.font
+            }
+
+            Text {
+                x: view.asciiX
+                anchors.verticalCenter: parent.verticalCenter
+                text: row.asciiText
+                color: "#b5b5b5"
+                font: metrics.font
+            }
+        }
+    }
+
+    Keys.onPressed: (e) => {
+        const ctrl = (e.modifiers & Qt.ControlModifier) !== 0
+        if (ctrl && e.key === Qt.Key_G) { view.focusOffset(); e.accepted = true }
+        else if (ctrl && e.key === Qt.Key_F) { view.focusSearch(); e.accepted = true }
+    }
+}
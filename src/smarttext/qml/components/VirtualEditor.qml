@@ -0,0 +1,311 @@
+import QtQuick 2.15
+import QtQuick.Controls 2.15
+
+// Large-file editor: a ListView over app.virtualEditor.model that only creates
+// delegates for visible lines. Keys and clicks go to Python, which owns the text.
+FocusScope {
+    id: view
+
+    required property var editor
+    // app.carets: extra carets, shown per row and fed the keys while active
+    property var carets: null
+    // app.structure: fold arrows in the gutter and the matching bracket
+    property var structure: null
+    property int fontPixelSize: 11
+    property alias flick: list
+
+    readonly property bool folding: structure !== null && structure.active
+    readonly property int gutterWidth: folding ? 26 : 12
+    readonly property real lineHeight: Math.ceil(metrics.height) + 2
+    // horizontal scroll, kept so the caret stays visible
+    property real hOffset: 0
+
+    readonly property bool ready: editor !== null && editor.ready
+    readonly property int selStartLine: editor ? Math.min(editor.anchorLine, editor.caretLine) : 0
+    readonly property int selEndLine: editor ? Math.max(editor.anchorLine, editor.caretLine) : 0
+    readonly property int selStartColumn: !editor ? 0
+        : editor.anchorLine < editor.caretLine ? editor.anchorColumn
+        : editor.anchorLine > editor.caretLine ? editor.caretColumn
+        : Math.min(editor.anchorColumn, editor.caretColumn)
+    readonly property int selEndColumn: !editor ? 0
+        : editor.anchorLine > editor.caretLine ? editor.anchorColumn
+        : editor.anchorLine < editor.caretLine ? editor.caretColumn
+        : Math.max(editor.anchorColumn, editor.caretColumn)
+    readonly property bool hasSelection: editor !== null && editor.selectionEnd > editor.selectionStart
+
+    FontMetrics {
+        id: metrics
+        font.pixelSize: view.fontPixelSize
+    }
+
+    function ensureCaretVisible() {
+        if (!ready) return
+        list.positionViewAtIndex(editor.caretRow, ListView.Contain)
+        const item = list.itemAtIndex(editor.caretRow)
+        if (!item) return
+        const x = item.columnX(editor.caretColumn)
+        const visible = list.width - gutterWidth - 8
+        if (x < hOffset) hOffset = Math.max(0, x - 40)
+        else if (x > hOffset + visible) hOffset = x - visible + 40
+    }
+
+    function hit(mouse) {
+        const y = list.contentY + mouse.y
+        let row = list.indexAt(0, y)
+        if (row < 0) row = y < list.originY + lineHeight ? 0 : list.count - 1
+        // rows skip folded lines, so the delegate knows its line
+        const item = list.itemAtIndex(row)
+        const col = item ? item.columnAt(mouse.x - gutterWidth + hOffset) : 0
+        return { line: item ? item.lineNumber : row, column: col }
+    }
+
+    Connections {
+        target: view.editor
+        function onCaretChanged() { Qt.callLater(view.ensureCaretVisible) }
+    }
+
+    Rectangle {
+        anchors.fill: parent
+        radius: 10
+        color: "#111111"
+        border.color: "#333333"
+        border.width: 1
+    }
+
+    ListView {
+        id: list
+        anchors.fill: parent
+        anchors.margins: 1
+        clip: true
+        model: view.editor ? view.editor.model : null
+        boundsBehavior: Flickable.StopAtBounds
+        reuseItems: true
+        cacheBuffer: 0
+        onHeightChanged: if (view.editor) view.editor.pageLines = Math.max(1, Math.floor(height / view.lineHeight) - 1)
+
+        ScrollBar.vertical: ScrollBar {
+            width: 10
+            policy: ScrollBar.AsNeeded
+            contentItem: Rectangle {
+                radius: width / 2
+                color: "#6b6b6b"
+                opacity: parent.pressed ? 0.9 : 0.6
+            }
+        }
+
+        delegate: Item {
+            id: row
+            required property string lineText
+            required property string changeKind
+            required property int lineNumber
+            required property string foldState
+
+            width: list.width
+            height: view.lineHeight
+
+            readonly property bool inSelection: view.hasSelection
+                                                && lineNumber >= view.selStartLine && lineNumber <= view.selEndLine
+
+            function columnX(col) { return textItem.positionToRectangle(col).x }
+            function columnAt(x) { return textItem.positionAt(x, 1) }
+
+            Rectangle {
+                visible: row.changeKind !== ""
+                x: 3
+                width: 3
+                height: row.changeKind === "deleted" ? 4 : parent.height
+                y: row.changeKind === "deleted" ? -2 : 0
+                color: row.changeKind === "added" ? "#4e9a5f"
+                     : row.changeKind === "modified" ? "#4f7fbf" : "#b85c5c"
+            }
+
+            Text {
+                visible: row.foldState !== ""
+                x: 10
+                width: 12
+                height: parent.height
+                verticalAlignment: Text.AlignVCenter
+                horizontalAlignment: Text.AlignHCenter
+                text: row.foldState === "folded" ? "▸" : "▾"
+                color: row.foldState === "folded" ? "#d0d0d0" : "#6b6b6b"
+                font.pixelSize: 10
+            }
+
+            Item {
+                x: view.gutterWidth
+                width: parent.width - view.gutterWidth
+                height: parent.height
+                clip: true
+
+                Rectangle {
+                    visible: row.inSelection
+                    readonly property real x0: row.lineNumber === view.selStartLine ? row.columnX(view.selStartColumn) : 0
+                    readonly property real x1: row.lineNumber === view.selEndLine ? row.columnX(view.selEndColumn)
+                                                                             : textItem.contentWidth + 6
+                    x: x0 - view.hOffset
+                    width: Math.max(0, x1 - x0)
+                    height: parent.height
+                    color: "#264f78"
+                }
+
+                TextInput {
+                    id: textItem
+                    x: -view.hOffset
+                    anchors.verticalCenter: parent.verticalCenter
+                    text: row.lineText
+                    readOnly: true
+                    activeFocusOnPress: false
+                    selectByMouse: false
+                    color: "#eeeeee"
+                    font.pixelSize: view.fontPixelSize
+                }
+
+                // what a folded line hides
+                Rectangle {
+                    visible: row.foldState === "folded"
+                    x: textItem.contentWidth + 6 - view.hOffset
+                    y: 2
+                    width: 22
+                    height: parent.height - 4
+                    radius: 4
+                    color: "#2a2a2a"
+                    border.color: "#444444"
+
+                    Text {
+                        anchors.centerIn: parent
+                        text: "⋯"
+                        color: "#a0a0a0"
+                        font.pixelSize: 10
+                    }
+                }
+
+                Repeater {
+                    model: view.structure ? view.structure.brackets.filter(b => b.line === row.lineNumber) : []
+
+                    delegate: Rectangle {
+                        required property var modelData
+                        x: row.columnX(modelData.column) - view.hOffset
+                        width: Math.max(2, row.columnX(modelData.column + 1) - row.columnX(modelData.column))
+                        height: parent.height
+                        color: modelData.ok ? "#405f8f6f" : "#60b85c5c"
+                        border.color: modelData.ok ? "#5f8f6f" : "#b85c5c"
+                        border.width: 1
+                    }
+                }
+
+                Repeater {
+                    model: view.carets && view.carets.active && view.carets.revision >= 0
+                           ? view.carets.on_line(row.lineNumber) : []
+
+                    delegate: Item {
+                        required property var modelData
+                        height: parent.height
+
+                        Rectangle {
+                            x: row.columnX(modelData.start) - view.hOffset
+                            width: row.columnX(modelData.end) - row.columnX(modelData.start)
+                            height: parent.height
+                            color: "#264f78"
+                            opacity: 0.8
+                        }
+
+                        Rectangle {
+                            visible: modelData.caret >= 0
+                            x: row.columnX(Math.max(0, modelData.caret)) - view.hOffset
+                            width: 1
+                            height: parent.height
+                            color: "#eaeaea"
+                        }
+                    }
+                }
+
+                Rectangle {
+                    visible: view.activeFocus && view.ready && row.lineNumber === view.editor.caretLine
+                    x: (visible ? row.columnX(view.editor.caretColumn) : 0) - view.hOffset
+                    width: 1
+                    height: parent.height
+                    color: "#eaeaea"
+                }
+            }
+        }
+    }
+
+    MouseArea {
+        anchors.fill: list
+        anchors.rightMargin: 12
+        cursorShape: Qt.IBeamCursor
+        property int columnAnchor: -1
+        onPressed: (mouse) => {
+            view.forceActiveFocus()
+            if (!view.ready) return
+            const p = view.hit(mouse)
+            columnAnchor = -1
+            // a click on a fold arrow toggles it
+            if (view.folding && mouse.x < view.gutterWidth && view.structure.toggle_fold(p.line)) return
+            // Alt+click adds a caret, Alt+drag selects a column
+            if (view.carets && (mouse.modifiers & Qt.AltModifier)) {
+                columnAnchor = view.carets.offset(p.line, p.column)
+                view.carets.add_caret(columnAnchor)
+                return
+            }
+            view.editor.set_caret(p.line, p.column, (mouse.modifiers & Qt.ShiftModifier) !== 0)
+        }
+        onPositionChanged: (mouse) => {
+            if (!pressed || !view.ready) return
+            const p = view.hit(mouse)
+            if (columnAnchor >= 0) view.carets.column_select(columnAnchor, view.carets.offset(p.line, p.column))
+            else view.editor.set_caret(p.line, p.column, true)
+        }
+        onWheel: (wheel) => {
+            if (wheel.angleDelta.x !== 0 || (wheel.modifiers & Qt.ShiftModifier)) {
+                const d = wheel.angleDelta.x !== 0 ? wheel.angleDelta.x : wheel.angleDelta.y
+                view.hOffset = Math.max(0, view.hOffset - d / 2)
+            } else {
+                wheel.accepted = false
+            }
+        }
+    }
+
+    Text {
+        anchors.centerIn: parent
+        visible: view.editor !== null && !view.ready
+        text: "Indexing lines…"
+        color: "#8a8a8a"
+        font.pixelSize: 13
+    }
+
+    Keys.onPressed: (e) => {
+        if (!view.ready) return
+        if (view.carets && view.carets.active && view.carets.handle_key(e.key, e.modifiers, e.text)) {
+            e.accepted = true
+            return
+        }
+        const ed = view.editor
+        const shift = (e.modifiers & Qt.ShiftModifier) !== 0
+        const ctrl = (e.modifiers & Qt.ControlModifier) !== 0
+        const moves = {}
+        moves[Qt.Key_Left] = ctrl ? "wordLeft" : "left"
+        moves[Qt.Key_Right] = ctrl ? "wordRight" : "right"
+        moves[Qt.Key_Up] = "up"
+        moves[Qt.Key_Down] = "down"
+        moves[Qt.Key_Home] = ctrl ? "docStart" : "home"
+        moves[Qt.Key_End] = ctrl ? "docEnd" : "end"
+        moves[Qt.Key_PageUp] = "pageUp"
+        moves[Qt.Key_PageDown] = "pageDown"
+
+        e.accepted = true
+        if (moves[e.key] !== undefined) ed.move(moves[e.key], shift)
+        else if (e.key === Qt.Key_Backspace) ed.backspace()
+        else if (e.key === Qt.Key_Delete) ed.delete_forward()
+        else if (e.key === Qt.Key_Return || e.key === Qt.Key_Enter) ed.insert_text("\n")
+        else if (e.key === Qt.Key_Tab && e.modifiers === Qt.NoModifier) ed.insert_text("    ")
+        else if (ctrl && e.key === Qt.Key_A) ed.select_all()
+        else if (ctrl && e.key === Qt.Key_C) ed.copy()
+        else if (ctrl && e.key === Qt.Key_X) ed.cut()
+        else if (ctrl && e.key === Qt.Key_V) ed.paste()
+        else if (ctrl && e.key === Qt.Key_Z) { if (shift) ed.redo(); else ed.undo() }
+        else if (ctrl && e.key === Qt.Key_Y) ed.redo()
+        else if (!ctrl && e.text.length > 0 && e.text.charCodeAt(0) >= 32) ed.insert_text(e.text)
+        else e.accepted = false
+    }
+}
@@ -0,0 +1,13 @@
+from unittest.mock import MagicMock
+
+from smarttext.core.commands import BUILTIN_COMMANDS, CommandRegistry
+
+
+def test_every_builtin_target_resolves():
+    registry = CommandRegistry(BUILTIN_COMMANDS)
+    assert len(registry) == len(BUILTIN_COMMANDS)
+    for command in BUILTIN_COMMANDS:
+        app = MagicMock()
+        registry.run(command.id, app)
+        assert registry.is_loaded(command.id)
+        assert app.mock_calls, command.id
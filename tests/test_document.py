@@ -0,0 +1,87 @@
+import random
+
+import pytest
+
+from smarttext.core import line_index
+from smarttext.core.document import Document, TextEdit, diff_text
+from smarttext.core.line_index import LineIndex
+
+
+def _applied(text: str, edit: TextEdit) -> str:
+    assert text[edit.start:edit.start + len(edit.removed)] == edit.removed
+    return text[:edit.start] + edit.inserted + text[edit.start + len(edit.removed):]
+
+
+def _random_replacements(rnd: random.Random, n: int, count: int):
+    cuts = sorted(rnd.randrange(n + 1) for _ in range(2 * count))
+    return [(cuts[i], cuts[i + 1], rnd.choice(["", "x", "\n", "ab\ncd", "😀"])) for i in range(0, len(cuts), 2)]
+
+
+def _naive(text: str, replacements) -> str:
+    for start, end, inserted in reversed(replacements):
+        text = text[:start] + inserted + text[end:]
+    return text
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_diff_text_is_the_smallest_single_edit(seed, monkeypatch):
+    rnd = random.Random(seed)
+    # small probes so the doubling and the bisection both run
+    monkeypatch.setattr("smarttext.core.document._MIN_PROBE", 2)
+    monkeypatch.setattr("smarttext.core.document._MAX_PROBE", 16)
+    for _ in range(300):
+        old = "".join(rnd.choice("ab\n") for _ in range(rnd.randrange(80)))
+        new = _naive(old, _random_replacements(rnd, len(old), rnd.randrange(1, 3)))
+        edit = diff_text(old, new)
+        if old == new:
+            assert edit is None
+            continue
+        assert _applied(old, edit) == new
+        # nothing shared is left at either end of the edit
+        assert not (edit.removed and edit.inserted and edit.removed[0] == edit.inserted[0])
+        assert not (edit.removed and edit.inserted and edit.removed[-1] == edit.inserted[-1])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_replace_ranges_matches_edits_applied_one_by_one(seed, monkeypatch):
+    rnd = random.Random(seed)
+    monkeypatch.setattr(line_index, "_CHUNK_LINES", 4)
+    doc = Document(text="\n".join("line %d" % i for i in range(40)))
+    doc.line_index()
+    seen = []
+    doc.add_listener(lambda d, edit: seen.append(edit))
+    for _ in range(200):
+        old = doc.text
+        replacements = _random_replacements(rnd, len(old), rnd.randrange(1, 6))
+        revision = doc.revision
+        edits = doc.apply_edits(replacements)
+        assert doc.text == _naive(old, replacements)
+        assert [(e.start, e.start + len(e.removed), e.inserted) for e in edits] == replacements
+        # listeners hear of one edit covering them all
+        assert doc.revision == revision + 1 and len(seen) == 1
+        assert _applied(old, seen.pop()) == doc.text
+        expected = LineIndex.from_text(doc.text)
+        assert list(doc.line_index().lengths()) == list(expected.lengths())
+
+
+def test_empty_replacements_change_nothing():
+    doc = Document(text="abc")
+    doc.replace_ranges([])
+    assert doc.revision == 0 and not doc.modified
+
+
+def test_edits_made_while_indexing_are_replayed():
+    doc = Document(text="a\nb\nc")
+    snapshot, revision = doc.begin_line_index_build()
+    doc.apply_edit(1, 1, "\nx\n")
+    doc.replace_ranges([(0, 0, "y"), (4, 5, "")])
+    doc.finish_line_index_build(LineIndex.from_text(snapshot), revision)
+    assert list(doc.line_index().lengths()) == list(LineIndex.from_text(doc.text).lengths())
+
+
+def test_utf16_offsets_follow_the_text():
+    doc = Document(text="a😀b")
+    assert doc.utf16().to_utf16(2) == 3
+    doc.set_text("😀😀b")
+    assert doc.utf16().to_utf16(2) == 4
+    assert doc.utf16().from_utf16(4) == 2
@@ -0,0 +1,193 @@
+import json
+import random
+import time
+from pathlib import Path
+from xml.etree import ElementTree
+
+import pytest
+
+from smarttext.core import formatting
+from smarttext.core.formatting import (
+    FormatError,
+    detect_kind,
+    format_json,
+    format_xml,
+    minify_json,
+    minify_xml,
+    run_action,
+    supports,
+    validate_json,
+    validate_toml,
+    validate_xml,
+)
+
+
+def _fails_quickly(text: str) -> FormatError:
+    start = time.perf_counter()
+    with pytest.raises(FormatError) as info:
+        validate_json(text)
+    assert time.perf_counter() - start < 1.0
+    return info.value
+
+
+def test_unterminated_string_at_end_of_text():
+    err = _fails_quickly('{"a": "' + "x" * 5000)
+    assert (err.line, err.column) == (1, 7)
+
+
+def test_string_broken_by_newline():
+    err = _fails_quickly('{"a": "' + "x" * 5000 + '\n", "b": 1}')
+    assert (err.line, err.column) == (1, 7)
+
+
+def _value(rnd: random.Random, depth: int = 0):
+    pick = rnd.randrange(8 if depth < 3 else 5)
+    if pick == 0:
+        return rnd.randint(-10**6, 10**6)
+    if pick == 1:
+        return rnd.choice([0.5, -2.25, 1e21, 3.0e-5])
+    if pick == 2:
+        return rnd.choice([True, False, None])
+    if pick in (3, 4):
+        return "".join(rnd.choice('ab "\\/\n\té😀\x01') for _ in range(rnd.randrange(6)))
+    if pick in (5, 6):
+        return [_value(rnd, depth + 1) for _ in range(rnd.randrange(4))]
+    return {f"k{i}": _value(rnd, depth + 1) for i in range(rnd.randrange(4))}
+
+
+def _spaced(rnd: random.Random, value) -> str:
+    """`value` as JSON with random whitespace between the tokens."""
+    ws = lambda: "".join(rnd.choice(" \t\r\n") for _ in range(rnd.randrange(3)))
+    if isinstance(value, list):
+        return "[" + ws() + ",".join(ws() + _spaced(rnd, v) + ws() for v in value) + "]"
+    if isinstance(value, dict):
+        items = (ws() + json.dumps(k) + ws() + ":" + ws() + _spaced(rnd, v) + ws() for k, v in value.items())
+        return "{" + ws() + ",".join(items) + "}"
+    return json.dumps(value, ensure_ascii=False)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_json_layout_matches_the_json_module(seed, monkeypatch):
+    rnd = random.Random(seed)
+    # tiny slices so tokens straddle slice ends
+    monkeypatch.setattr(formatting, "_JSON_CHUNK", 7)
+    for _ in range(200):
+        value = _value(rnd)
+        source = _spaced(rnd, value)
+        assert format_json(source) == json.dumps(value, indent=4, ensure_ascii=False) + "\n"
+        assert minify_json(source) == json.dumps(value, separators=(",", ":"), ensure_ascii=False)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_string_spelling_is_kept(seed):
+    rnd = random.Random(seed)
+    for _ in range(200):
+        value = _value(rnd)
+        escaped = json.dumps(value, indent=1, ensure_ascii=True)
+        assert minify_json(escaped) == json.dumps(value, separators=(",", ":"), ensure_ascii=True)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_validate_json_agrees_with_the_json_module(seed, monkeypatch):
+    rnd = random.Random(seed)
+    monkeypatch.setattr(formatting, "_JSON_CHUNK", rnd.choice([5, 64, 1 << 18]))
+    alphabet = list('{}[],:"\\ \nabu0123e.-') + ["true", "null", "\\u00e9", "é", "😀"]
+    for _ in range(500):
+        text = json.dumps(_value(rnd), ensure_ascii=rnd.random() < 0.5)
+        for _ in range(rnd.randrange(3)):
+            k = rnd.randrange(len(text) + 1)
+            text = text[:k] + rnd.choice(alphabet) + text[k + rnd.randrange(2):]
+        try:
+            json.loads(text)
+            valid = True
+        except ValueError:
+            valid = False
+        try:
+            validate_json(text)
+            assert valid, text
+        except FormatError:
+            assert not valid, text
+
+
+def test_json_error_position():
+    with pytest.raises(FormatError) as info:
+        validate_json('{\n  "a": 1,\n  "b": tru\n}')
+    assert (info.value.line, info.value.column) == (3, 8)
+
+
+def test_xml_layout():
+    text = '<a><b>t</b><c/><d> <e/> </d><p>mixed <i>x</i></p><!-- note --></a>'
+    assert format_xml(text, indent=2) == (
+        "<a>\n"
+        "  <b>t</b>\n"
+        "  <c/>\n"
+        "  <d>\n"
+        "    <e/>\n"
+        "  </d>\n"
+        "  <p>mixed <i>x</i></p>\n"
+        "  <!-- note -->\n"
+        "</a>\n"
+    )
+    assert minify_xml(format_xml(text)) == minify_xml(text)
+
+
+def test_xml_space_preserve_is_kept():
+    text = '<a><pre xml:space="preserve">\n  <b/>\n</pre><c> </c></a>'
+    assert '<pre xml:space="preserve">\n  <b/>\n</pre>' in format_xml(text)
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_xml_round_trip_keeps_the_tree(seed):
+    rnd = random.Random(seed)
+
+    def element(depth: int) -> str:
+        name = rnd.choice("abc")
+        if depth > 3 or rnd.random() < 0.3:
+            return f"<{name}/>"
+        children = [element(depth + 1) for _ in range(rnd.randrange(4))]
+        if rnd.random() < 0.3:
+            children.insert(rnd.randrange(len(children) + 1), "text &amp; more")
+        sep = rnd.choice(["", " ", "\n  "])
+        return f"<{name} x='1'>" + sep + sep.join(children) + sep + f"</{name}>"
+
+    for _ in range(100):
+        text = element(0)
+        formatted = format_xml(text)
+        validate_xml(formatted)
+        assert _tree(formatted) == _tree(text)
+        assert _tree(minify_xml(text)) == _tree(text)
+
+
+def _tree(text: str):
+    """Element structure and non-blank text of an XML document."""
+    def walk(el):
+        return el.tag, dict(el.attrib), (el.text or "").strip(), [walk(c) for c in el], (el.tail or "").strip()
+
+    return walk(ElementTree.fromstring(text))
+
+
+def test_invalid_xml_is_reported():
+    with pytest.raises(FormatError) as info:
+        format_xml("<a>\n<b></a>")
+    assert info.value.line == 2
+
+
+def test_toml_errors_are_located():
+    validate_toml('a = 1\n[t]\nb = "x"\n')
+    with pytest.raises(FormatError) as info:
+        validate_toml("a = 1\nb = \n")
+    assert info.value.line == 2
+
+
+def test_run_action_and_supports():
+    assert run_action("json", "minify", '{ "a" : 1 }') == '{"a":1}'
+    assert run_action("json", "validate", "[]") is None
+    assert supports("json", "format") and not supports("toml", "format")
+    assert not supports(None, "validate")
+
+
+def test_detect_kind():
+    assert detect_kind(Path("x.YML"), "") == "yaml"
+    assert detect_kind(None, "  \n[1]") == "json"
+    assert detect_kind(None, "<a/>") == "xml"
+    assert detect_kind(None, "plain") is None
@@ -0,0 +1,73 @@
+import heapq
+import json
+import random
+
+import pytest
+
+from smarttext.core.fuzzy_index import FuzzyIndex, fuzzy_score
+
+_PARTS = ["src", "lib", "main", "Main", "app_controller", "test", "docs", "read", "me", "x", "Qt"]
+
+
+def _random_path(rnd: random.Random) -> str:
+    dirs = "/".join(rnd.choice(_PARTS) for _ in range(rnd.randrange(1, 4)))
+    return f"/{dirs}/{rnd.choice(_PARTS)}{rnd.choice(['', '_', '-'])}{rnd.choice(_PARTS)}.{rnd.choice(['py', 'qml', 'md'])}"
+
+
+def _naive(paths, query: str, limit: int):
+    scored = ((fuzzy_score(query, p), p) for p in paths)
+    return heapq.nlargest(limit, ((s, p) for s, p in scored if s > 0))
+
+
+def test_fuzzy_score():
+    assert fuzzy_score("", "/a/b") == 1.0
+    assert fuzzy_score("zz", "/a/b") == 0.0
+    # the file name beats the directories, a shorter path beats a longer one
+    assert fuzzy_score("main", "/src/main.py") > fuzzy_score("main", "/main/src.py")
+    assert fuzzy_score("ac", "/AppController.py") > fuzzy_score("ac", "/abc.py")
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_search_finds_what_a_full_scan_finds(seed):
+    rnd = random.Random(seed)
+    live = set()
+    index = FuzzyIndex()
+    for _ in range(300):
+        path = _random_path(rnd)
+        if path in live and rnd.random() < 0.5:
+            index.remove(path)
+            live.discard(path)
+        else:
+            index.add(path)
+            live.add(path)
+        assert len(index) == len(live) and (path in index) == (path in live)
+        query = rnd.choice(["main", "mpy", "appc", "test", "rdme", "qt", "x", "lib/x", "zzz", "Main Py"])
+        got = index.search(query, 10)
+        q = "".join(query.lower().split())
+        # the trigram prefilter may narrow the results, never invent or lose all of them
+        assert got == sorted(got, reverse=True)
+        assert all(p in live and s == fuzzy_score(q, p) > 0 for s, p in got)
+        assert bool(got) == bool(_naive(live, q, 10))
+        if len(q) < 3:
+            assert got == _naive(live, q, 10)
+
+
+def test_removed_paths_are_not_found():
+    index = FuzzyIndex(["/a/main.py", "/b/main.py", "/b/c/main.py"])
+    index.remove_prefix("/b/")
+    assert [p for _, p in index.search("main")] == ["/a/main.py"]
+    assert index.paths() == ["/a/main.py"]
+
+
+@pytest.mark.parametrize("seed", range(3))
+def test_saved_index_searches_the_same(seed):
+    rnd = random.Random(seed)
+    index = FuzzyIndex(_random_path(rnd) for _ in range(200))
+    for p in rnd.sample(index.paths(), 50):
+        index.remove(p)
+    loaded = FuzzyIndex.from_dict(json.loads(json.dumps(index.to_dict())))
+    assert sorted(loaded.paths()) == sorted(index.paths())
+    for query in ["main", "appc", "rdme", "qt"]:
+        assert loaded.search(query) == index.search(query)
+    # an older file without postings is rebuilt from the paths
+    assert FuzzyIndex.from_dict({"paths": index.paths()}).search("main") == index.search("main")
@@ -0,0 +1,73 @@
+import random
+
+import pytest
+
+from smarttext.core import hex_dump
+from smarttext.core.hex_dump import HexFile, format_row, looks_binary, parse_offset, parse_pattern
+
+
+def test_format_row():
+    assert format_row(b"AB\x00\xff") == ("41 42 00 ff", "AB..")
+    row = bytes(range(0x41, 0x51))
+    assert format_row(row) == ("41 42 43 44 45 46 47 48  49 4a 4b 4c 4d 4e 4f 50", "ABCDEFGHIJKLMNOP")
+
+
+def test_parsing():
+    assert parse_offset(" 0x1F ") == 31
+    assert parse_offset("ff") == 255
+    assert parse_pattern("de ad BE ef") == b"\xde\xad\xbe\xef"
+    assert parse_pattern("0xCAFE") == b"\xca\xfe"
+    assert parse_pattern('"é"') == "é".encode("utf-8")
+    with pytest.raises(ValueError):
+        parse_offset("xyz")
+    for bad in ("0x", '""', "abc"):
+        with pytest.raises(ValueError):
+            parse_pattern(bad)
+
+
+def test_looks_binary():
+    assert looks_binary(b"a\x00b")
+    assert looks_binary(b"\xff\xfe")
+    assert not looks_binary("héllo".encode("utf-8"))
+    # cut in the middle of a character
+    assert not looks_binary("é".encode("utf-8")[:1])
+
+
+def _expected(data: bytes, pattern: bytes, start: int, forward: bool) -> int:
+    start = max(0, min(start, len(data)))
+    if forward:
+        i = data.find(pattern, start)
+        return i if i >= 0 else data.find(pattern)
+    i = data.rfind(pattern, 0, min(len(data), start + len(pattern) - 1))
+    return i if i >= 0 else data.rfind(pattern)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_find_wraps_like_a_plain_search(seed, tmp_path, monkeypatch):
+    rnd = random.Random(seed)
+    # small chunks so matches straddle them
+    monkeypatch.setattr(hex_dump, "_SEARCH_CHUNK", rnd.choice([3, 5, 16]))
+    data = bytes(rnd.choice(b"abc") for _ in range(rnd.randrange(1, 200)))
+    path = tmp_path / "data.bin"
+    path.write_bytes(data)
+    f = HexFile(path)
+    try:
+        assert f.size == len(data) and f.rows() == -(-len(data) // 16)
+        assert b"".join(f.row(i) for i in range(f.rows())) == data
+        for _ in range(200):
+            pattern = bytes(rnd.choice(b"abc") for _ in range(rnd.randrange(1, 5)))
+            start = rnd.randrange(-2, len(data) + 3)
+            forward = rnd.random() < 0.5
+            reported = []
+            assert f.find(pattern, start, forward, reported.append) == _expected(data, pattern, start, forward)
+            assert all(0 < p <= 1 for p in reported)
+    finally:
+        f.close()
+
+
+def test_empty_file(tmp_path):
+    path = tmp_path / "empty.bin"
+    path.write_bytes(b"")
+    f = HexFile(path)
+    assert f.rows() == 0 and f.find(b"a", 0) == -1
+    f.close()
@@ -0,0 +1,104 @@
+import random
+from array import array
+
+import pytest
+
+from smarttext.core.line_diff import (
+    ADDED,
+    DELETED,
+    MODIFIED,
+    ChangeTracker,
+    Hunk,
+    diff_hashes,
+    line_hashes,
+    read_saved_lines,
+)
+
+
+def _lcs(a, b) -> int:
+    row = [0] * (len(b) + 1)
+    for x in a:
+        prev = 0
+        for j, y in enumerate(b):
+            prev, row[j + 1] = row[j + 1], prev + 1 if x == y else max(row[j + 1], row[j])
+    return row[-1]
+
+
+def _check_hunks(a, b, hunks) -> int:
+    """Asserts the hunks turn `a` into `b`; returns how many lines they leave alone."""
+    kept = 0
+    x = y = 0
+    for h in hunks:
+        assert h.a0 - x == h.b0 - y >= 0
+        assert list(a[x:h.a0]) == list(b[y:h.b0])
+        assert (h.a0, h.b0) != (h.a1, h.b1)
+        kept += h.a0 - x
+        x, y = h.a1, h.b1
+    assert list(a[x:]) == list(b[y:])
+    # adjacent hunks are merged
+    assert all((p.a1, p.b1) != (q.a0, q.b0) for p, q in zip(hunks, hunks[1:]))
+    return kept + len(a) - x
+
+
+def _mutate(rnd: random.Random, lines):
+    lines = list(lines)
+    for _ in range(rnd.randrange(1, 6)):
+        i = rnd.randrange(len(lines) + 1)
+        j = min(len(lines), i + rnd.randrange(4))
+        lines[i:j] = [rnd.randrange(5) for _ in range(rnd.randrange(4))]
+    return lines
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_diff_keeps_a_longest_common_subsequence(seed):
+    rnd = random.Random(seed)
+    for _ in range(300):
+        a = [rnd.randrange(5) for _ in range(rnd.randrange(30))]
+        b = _mutate(rnd, a) if rnd.random() < 0.7 else [rnd.randrange(5) for _ in range(rnd.randrange(30))]
+        hunks = diff_hashes(a, b)
+        assert _check_hunks(a, b, hunks) == _lcs(a, b)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_tracker_follows_edits(seed):
+    rnd = random.Random(seed)
+    baseline = array("q", (rnd.randrange(8) for _ in range(60)))
+    tracker = ChangeTracker(baseline, array("q", baseline))
+    assert tracker.hunks == []
+    for _ in range(200):
+        current = list(tracker.current)
+        first = rnd.randrange(len(current))
+        old_count = rnd.randrange(1, min(4, len(current) - first) + 1)
+        new = array("q", (rnd.randrange(8) for _ in range(rnd.randrange(1, 4))))
+        assert tracker.on_edit(first, old_count, new)
+        current[first:first + old_count] = new
+        assert list(tracker.current) == current
+        _check_hunks(tracker.baseline, tracker.current, tracker.hunks)
+        for line in range(len(current)):
+            h = tracker.hunk_at(line)
+            if h is not None:
+                assert h.b0 <= line < max(h.b1, h.b0 + 1)
+    tracker.mark_saved()
+    assert tracker.hunks == [] and list(tracker.baseline) == list(tracker.current)
+
+
+def test_hunk_kinds():
+    assert Hunk(2, 2, 2, 4).kind == ADDED
+    assert Hunk(2, 4, 2, 2).kind == DELETED
+    assert Hunk(2, 3, 2, 4).kind == MODIFIED
+
+
+def test_line_hashes_compare_like_lines(monkeypatch):
+    monkeypatch.setattr("smarttext.core.line_diff._SCAN", 3)
+    text = "one\ntwo\n\none\nlonger line"
+    assert list(line_hashes(text)) == [hash(s) for s in text.split("\n")]
+
+
+def test_saved_lines_are_read_back_only_if_unchanged(tmp_path):
+    path = tmp_path / "a.txt"
+    path.write_text("a\nb\nc", encoding="utf-8")
+    hashes = line_hashes("a\nb\nc")
+    assert read_saved_lines(path, hashes, 1, 3) == ["b", "c"]
+    path.write_text("a\nB\nc", encoding="utf-8")
+    assert read_saved_lines(path, hashes, 1, 3) is None
+    assert read_saved_lines(tmp_path / "gone.txt", hashes, 0, 1) is None
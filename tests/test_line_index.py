@@ -0,0 +1,49 @@
+import random
+
+import pytest
+
+from smarttext.core import line_index
+from smarttext.core.document import TextEdit
+from smarttext.core.line_index import LineIndex
+
+
+def _check(index: LineIndex, text: str) -> None:
+    lines = text.split("\n")
+    assert len(index) == len(lines)
+    assert list(index.lengths()) == [len(s) for s in lines]
+    start = 0
+    for i, s in enumerate(lines):
+        assert index.line_start(i) == start
+        assert index.line_end(i) == start + len(s)
+        for offset in range(start, start + len(s) + 1):
+            assert index.line_of(offset) == i
+        start += len(s) + 1
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_edits_keep_the_index_equal_to_a_fresh_one(seed, monkeypatch):
+    rnd = random.Random(seed)
+    # tiny chunks so edits split and span them
+    monkeypatch.setattr(line_index, "_CHUNK_LINES", 3)
+    text = "\n".join("x" * rnd.randrange(4) for _ in range(30))
+    index = LineIndex.from_text(text)
+    for _ in range(200):
+        start = rnd.randrange(len(text) + 1)
+        end = min(len(text), start + rnd.randrange(10))
+        inserted = "".join(rnd.choice("ab\n") for _ in range(rnd.randrange(12)))
+        index.apply(TextEdit(start, text[start:end], inserted))
+        text = text[:start] + inserted + text[end:]
+        _check(index, text)
+    assert len(index._chunks) > 1
+
+
+@pytest.mark.parametrize("text", ["", "\n", "abc", "a\n\nbc\n", "\n" * 7])
+def test_from_text_in_slices(text, monkeypatch):
+    monkeypatch.setattr(line_index, "_SCAN", 2)
+    _check(LineIndex.from_text(text), text)
+
+
+def test_lengths_between():
+    index = LineIndex.from_text("a\nbb\nccc\n")
+    assert list(index.lengths_between(1, 3)) == [2, 3]
+    assert list(index.lengths_between(2, 2)) == []
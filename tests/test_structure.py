@@ -0,0 +1,161 @@
+import random
+
+import pytest
+
+from smarttext.core.document import Document
+from smarttext.core.structure import LANGUAGES, Folds, StructureIndex
+
+_PIECES = {
+    "JSON": ["{", "}", "[", "]", '"', '"{"', "1", ",", "\n", "\\", " "],
+    "JavaScript": ["{", "}", "(", ")", "/*", "*/", "//", "`", '"', "'", "\n", "x", " "],
+    "Python": ["(", ")", "[", "]", '"""', "'''", "#", '"', "\n", "    ", "x", ":"],
+}
+
+
+def _state(index: StructureIndex):
+    return index._tokens, index._states, list(index._net), list(index._low), list(index._high)
+
+
+def _random_text(rnd: random.Random, pieces, size: int) -> str:
+    return "".join(rnd.choice(pieces) for _ in range(size))
+
+
+def _naive_partner(index: StructureIndex, line: int, column: int):
+    """The partner found by walking every bracket of the document one by one."""
+    flat = [(ln, t) for ln, tokens in enumerate(index._tokens) for t in tokens]
+    i = next(k for k, (ln, t) in enumerate(flat) if ln == line and t >> 3 == column)
+    opening = not flat[i][1] & 1
+    step = 1 if opening else -1
+    depth = 0
+    k = i + step
+    while 0 <= k < len(flat):
+        closing = flat[k][1] & 1
+        if closing == opening:  # points back towards the bracket
+            if depth == 0:
+                return flat[k][0], flat[k][1] >> 3
+            depth -= 1
+        else:
+            depth += 1
+        k += step
+    return None
+
+
+@pytest.mark.parametrize("seed", range(4))
+@pytest.mark.parametrize("name", sorted(_PIECES))
+def test_repair_after_an_edit_matches_a_rebuild(name, seed):
+    rnd = random.Random(seed)
+    language = LANGUAGES[name]
+    pieces = _PIECES[name]
+    doc = Document(text=_random_text(rnd, pieces, 300))
+    index = StructureIndex.build(doc.text, language)
+    lines = doc.line_index()
+
+    def on_edit(d, edit):
+        first = lines.line_of(edit.start)
+        old_count = edit.removed.count("\n") + 1
+        new_count = edit.inserted.count("\n") + 1
+        assert index.on_edit(d.text, lines, first, old_count, new_count)
+
+    # the document's own line index is updated first, as in the editor
+    doc.add_listener(on_edit)
+    for _ in range(150):
+        start = rnd.randrange(len(doc.text) + 1)
+        end = min(len(doc.text), start + rnd.randrange(12))
+        doc.apply_edit(start, end, _random_text(rnd, pieces, rnd.randrange(6)))
+        assert _state(index) == _state(StructureIndex.build(doc.text, language))
+
+
+@pytest.mark.parametrize("seed", range(4))
+def test_matching_brackets_agrees_with_a_linear_walk(seed):
+    rnd = random.Random(seed)
+    language = LANGUAGES["JavaScript"]
+    text = _random_text(rnd, ["{", "}", "(", ")", "[", "]", "\n", "x", "/*", "*/"], 400)
+    index = StructureIndex.build(text, language)
+    for line, tokens in enumerate(index._tokens):
+        for t in tokens:
+            found = index.match(line, t >> 3)
+            expected = _naive_partner(index, line, t >> 3)
+            if expected is None:
+                assert found is None
+            else:
+                assert found[1] == expected
+
+
+def test_brackets_in_strings_and_comments_are_skipped():
+    text = 'let a = {\n  s: "}", // }\n  /* {\n  } */ t: `\n}`\n}'
+    index = StructureIndex.build(text, LANGUAGES["JavaScript"])
+    assert index.match(0, 8) == ((0, 8), (5, 0), True)
+
+
+def test_too_long_a_repair_gives_up(monkeypatch):
+    monkeypatch.setattr("smarttext.core.structure.MAX_RELEX_LINES", 10)
+    doc = Document(text="{\n" + "x\n" * 50 + "}")
+    index = StructureIndex.build(doc.text, LANGUAGES["JavaScript"])
+    lines = doc.line_index()
+    # an unclosed comment changes the state of every following line
+    doc.apply_edit(0, 0, "/*")
+    assert not index.on_edit(doc.text, lines, 0, 1, 1)
+
+
+def test_fold_ranges():
+    text = "a = {\n  b: [\n    1\n  ]\n}\n"
+    doc = Document(text=text)
+    index = StructureIndex.build(text, LANGUAGES["JavaScript"])
+    lines = doc.line_index()
+    assert [index.fold_start(text, lines, i) for i in range(5)] == [True, True, False, False, False]
+    assert index.fold_end(text, lines, 0) == 3
+    assert index.fold_end(text, lines, 1) == 2
+
+    py = "def f():\n    x = 1\n\n    return x\ny = 2\n"
+    doc = Document(text=py)
+    index = StructureIndex.build(py, LANGUAGES["Python"])
+    assert index.fold_end(py, doc.line_index(), 0) == 3
+    assert index.fold_end(py, doc.line_index(), 4) is None
+
+
+def _random_folds(rnd: random.Random, n: int) -> Folds:
+    folds = Folds()
+    for _ in range(rnd.randrange(6)):
+        start = rnd.randrange(n - 1)
+        folds.fold(start, rnd.randrange(start + 1, min(n, start + 8)))
+    return folds
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_visible_rows_match_the_hidden_lines(seed):
+    rnd = random.Random(seed)
+    n = 40
+    for _ in range(100):
+        folds = _random_folds(rnd, n)
+        hidden = {line for start, end in folds.regions() for line in range(start + 1, end + 1)}
+        visible = [line for line in range(n) if line not in hidden]
+        assert folds.hidden_count() == len(hidden)
+        assert list(folds.visible_lines(0, n - 1)) == visible
+        for row, line in enumerate(visible):
+            assert folds.line_at(row) == line
+            assert folds.row_of(line) == row
+        for line in range(n):
+            assert folds.is_hidden(line) == (line in hidden)
+        first, last = sorted(rnd.randrange(n) for _ in range(2))
+        assert folds.hidden_between(first, last) == len([h for h in hidden if first <= h <= last])
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_edits_keep_folds_on_the_lines_they_hid(seed):
+    rnd = random.Random(seed)
+    for revision in range(200):
+        lines = list(range(30))
+        folds = _random_folds(rnd, len(lines))
+        before = {(s, e): lines[s + 1:e + 1] for s, e in folds.regions()}
+        first = rnd.randrange(len(lines))
+        old_count = rnd.randrange(1, min(5, len(lines) - first) + 1)
+        new_count = rnd.randrange(1, 5)
+        last = first + old_count - 1
+        lines[first:first + old_count] = [100 + revision] * new_count
+        folds.on_edit(revision, first, old_count, new_count)
+
+        # a region survives edits after it, and ones ending on or before its header
+        survivors = [hid for (s, e), hid in before.items() if e < first or s >= last]
+        after = [lines[s + 1:e + 1] for s, e in folds.regions()]
+        assert sorted(after) == sorted(survivors)
+        assert (folds.dropped == revision) == (len(after) < len(before))
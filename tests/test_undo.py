@@ -0,0 +1,138 @@
+import random
+
+import pytest
+
+from smarttext.core.carets import (
+    delete_at_selections,
+    merge_selections,
+    occurrences,
+    replace_selections,
+)
+from smarttext.core.document import Document
+from smarttext.core.undo import UndoStack
+
+
+def _random_selections(rnd: random.Random, n: int, count: int):
+    sels = []
+    for _ in range(count):
+        a = rnd.randrange(n + 1)
+        c = a if rnd.random() < 0.5 else rnd.randrange(n + 1)
+        sels.append((a, c))
+    return merge_selections(sels)
+
+
+def _naive_replace(text: str, sels, texts):
+    """Replace from the last selection backwards; returns the text and each caret's offset."""
+    carets = []
+    for (a, c), t in reversed(list(zip(sels, texts))):
+        lo, hi = min(a, c), max(a, c)
+        text = text[:lo] + t + text[hi:]
+        carets = [p + len(t) - (hi - lo) for p in carets]
+        carets.insert(0, lo + len(t))
+    return text, carets
+
+
+def test_merge_selections():
+    # the merged selection keeps the direction of the one that extended it
+    assert merge_selections([(5, 2), (1, 3), (9, 9), (7, 7), (7, 7)]) == [(5, 1), (7, 7), (9, 9)]
+    # a bare caret at the edge of a selection is swallowed by it
+    assert merge_selections([(0, 4), (4, 4)]) == [(0, 4)]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_typing_at_many_carets(seed):
+    rnd = random.Random(seed)
+    for _ in range(200):
+        text = "".join(rnd.choice("ab \n") for _ in range(rnd.randrange(60)))
+        sels = _random_selections(rnd, len(text), rnd.randrange(1, 8))
+        texts = [rnd.choice(["", "x", "yz", "\n"]) for _ in sels]
+        edits, carets = replace_selections(sels, texts)
+        doc = Document(text=text)
+        doc.replace_ranges(edits)
+        expected, positions = _naive_replace(text, sels, texts)
+        assert doc.text == expected
+        assert carets == [(p, p) for p in positions]
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_deleting_at_many_carets(seed):
+    rnd = random.Random(seed)
+    for _ in range(200):
+        text = "".join(rnd.choice("ab\n") for _ in range(rnd.randrange(1, 40)))
+        sels = _random_selections(rnd, len(text), rnd.randrange(1, 8))
+        forward = rnd.random() < 0.5
+        edits, carets = delete_at_selections(sels, len(text), forward)
+        doc = Document(text=text)
+        doc.replace_ranges(edits)
+        # every offset covered by a selection, or next to a bare caret, goes
+        gone = set()
+        for a, c in sels:
+            lo, hi = min(a, c), max(a, c)
+            if lo == hi:
+                lo, hi = (lo, min(len(text), lo + 1)) if forward else (max(0, lo - 1), lo)
+            gone.update(range(lo, hi))
+        assert doc.text == "".join(ch for i, ch in enumerate(text) if i not in gone)
+        assert carets == sorted(set(carets))
+        assert all(0 <= p <= len(doc.text) for p, _ in carets)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_undo_and_redo_restore_every_state(seed):
+    rnd = random.Random(seed)
+    doc = Document(text="\n".join("word %d" % i for i in range(20)))
+    doc.line_index()
+    stack = UndoStack()
+    history = [doc.text]
+    for _ in range(100):
+        sels = _random_selections(rnd, len(doc.text), rnd.randrange(1, 10))
+        if rnd.random() < 0.3:
+            replacements, carets = delete_at_selections(sels, len(doc.text), rnd.random() < 0.5)
+        else:
+            replacements, carets = replace_selections(sels, [rnd.choice(["q", "", "\n", "rs"]) for _ in sels])
+        if not replacements:
+            continue
+        stack.push(doc.apply_edits(replacements), sels[0][1], carets[0][1])
+        history.append(doc.text)
+
+    for state in reversed(history[:-1]):
+        assert stack.undo(doc) is not None
+        assert doc.text == state
+    assert not stack.can_undo() and stack.undo(doc) is None
+    for state in history[1:]:
+        assert stack.redo(doc) is not None
+        assert doc.text == state
+    assert not stack.can_redo()
+    # the line index was kept current through all of it
+    assert doc.line_index().line_start(len(doc.line_index()) - 1) == doc.text.rfind("\n") + 1
+
+
+def test_typing_is_undone_a_word_at_a_time():
+    doc = Document(text="a\nb\nc")
+    stack = UndoStack()
+    sels = [(1, 1), (3, 3), (5, 5)]
+    for ch in "xy z":
+        edits, sels = replace_selections(sels, [ch] * len(sels))
+        before = doc.text
+        stack.push(doc.apply_edits(edits), 0, 0, typing=True)
+        assert doc.text != before
+    assert doc.text == "axy z\nbxy z\ncxy z"
+    stack.undo(doc)
+    assert doc.text == "axy \nbxy \ncxy "
+    stack.undo(doc)
+    assert doc.text == "a\nb\nc"
+
+
+def test_a_new_edit_drops_the_redo_history():
+    doc = Document(text="abc")
+    stack = UndoStack()
+    stack.push(doc.apply_edits([(0, 1, "")]), 0, 0)
+    stack.undo(doc)
+    stack.push(doc.apply_edits([(3, 3, "d")]), 3, 4)
+    assert not stack.can_redo()
+    assert doc.text == "abcd"
+
+
+def test_occurrences():
+    assert occurrences("aaaa", "aa", 10) == [(0, 2), (2, 4)]
+    assert occurrences("abab", "b", 1) == [(1, 2)]
+    assert occurrences("abc", "", 5) == []
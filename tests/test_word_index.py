@@ -0,0 +1,71 @@
+import random
+from collections import Counter
+
+import pytest
+
+from smarttext.core import word_index
+from smarttext.core.document import TextEdit
+from smarttext.core.word_index import WordIndex, count_words, edit_words
+
+_WORDS = ["alpha", "alps", "also", "beta", "bet", "better", "_x1", "x", "9lives", "a" * 70]
+
+
+def _random_text(rnd: random.Random, size: int) -> str:
+    return "".join(rnd.choice(_WORDS + [" ", "\n", ".", "-"]) for _ in range(size))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_count_words_in_slices(seed, monkeypatch):
+    rnd = random.Random(seed)
+    monkeypatch.setattr(word_index, "_CHUNK", rnd.choice([7, 16, 100]))
+    text = _random_text(rnd, 400)
+    assert count_words(text) == Counter(word_index._WORD.findall(text))
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_edit_words_keeps_counts_current(seed):
+    rnd = random.Random(seed)
+    text = _random_text(rnd, 100)
+    counts = count_words(text)
+    for _ in range(300):
+        start = rnd.randrange(len(text) + 1)
+        end = min(len(text), start + rnd.randrange(15))
+        inserted = _random_text(rnd, rnd.randrange(3)) if rnd.random() < 0.5 else rnd.choice("ab _")
+        edit = TextEdit(start, text[start:end], inserted)
+        text = text[:start] + inserted + text[end:]
+        gone, new = edit_words(text, edit)
+        counts = counts - gone + new
+        assert counts == count_words(text)
+
+
+@pytest.mark.parametrize("seed", range(5))
+def test_complete_returns_the_most_frequent_words(seed, monkeypatch):
+    rnd = random.Random(seed)
+    # small enough that busy prefixes go through the cached top lists
+    monkeypatch.setattr(word_index, "MAX_SCAN", 3)
+    index = WordIndex()
+    counts = Counter()
+    vocab = ["".join(rnd.choice("abc") for _ in range(rnd.randrange(2, 5))) for _ in range(60)]
+    for _ in range(300):
+        batch = Counter(rnd.choice(vocab) for _ in range(rnd.randrange(1, 5)))
+        if rnd.random() < 0.3:
+            batch = batch & counts
+            index.remove(batch)
+            counts -= batch
+        else:
+            index.add(batch)
+            counts += batch
+        assert len(index) == len(counts)
+        prefix = rnd.choice(["a", "ab", "b", "ca", "abc"])
+        got = index.complete(prefix, 4)
+        candidates = [w for w in counts if w.startswith(prefix) and w != prefix]
+        best = sorted((counts[w] for w in candidates), reverse=True)[:4]
+        assert all(w in candidates for w in got)
+        assert sorted((counts[w] for w in got), reverse=True) == best
+
+
+def test_exact_case_comes_first():
+    index = WordIndex()
+    index.add(Counter({"Table": 5, "tablet": 1, "TABS": 9}))
+    assert index.complete("ta") == ["tablet", "TABS", "Table"]
+    assert index.count("TABS") == 9